@@ -0,0 +1,197 @@
+"""
+End-to-end benchmark of the audio pipeline.
+
+Drives the full path
+
+    host server -> ClientAudioSource -> SynchronizedMicrophone -> AudioBackendService -> CachedAudioStorage
+    -> StorageService -> N concurrent live readers
+
+with a synthetic audio source on the host server, and reports latency from capture to the readers, capture to
+storage, throughput, dropped frames, CPU utilization and memory for each combination of the benchmark parameters.
+"""
+import argparse
+import itertools
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from typing import List, Dict, Any
+
+import numpy as np
+from cltl.combot.infra.event.memory import SynchronousEventBus
+from werkzeug.serving import make_server
+
+from cltl.backend.api.camera import CameraResolution
+from cltl.backend.api.metrics import Histogram
+from cltl.backend.impl.cached_storage import CachedAudioStorage
+from cltl.backend.impl.sync_microphone import SimpleMicrophone
+from cltl.backend.source.client_source import ClientAudioSource
+from cltl.backend.source.pacing import Pacer
+from cltl.backend.source.synthetic_source import SyntheticAudioSource, SyntheticImageSource
+from cltl_service.backend.backend import AudioBackendService
+from cltl_service.backend.schema import AudioSignalStarted, AudioSignalStopped
+from cltl_service.backend.storage import StorageService
+from host.server import BackendServer
+from util import ResourceUsage, write_results
+
+logger = logging.getLogger(__name__)
+
+
+class ServerThread(threading.Thread):
+    def __init__(self, app):
+        super().__init__(daemon=True)
+        self.server = make_server('localhost', 0, app, threaded=True)
+
+    @property
+    def url(self):
+        return f"http://localhost:{self.server.server_port}"
+
+    def run(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+class Reader(threading.Thread):
+    """
+    Live reader of a recording from the storage service, collecting latency and sequence gaps.
+    """
+    def __init__(self, url: str, storage_url: str, latency: Histogram, retries: int = 50):
+        super().__init__(daemon=True)
+        self._url = url
+        self._storage_url = storage_url
+        self._latency = latency
+        self._retries = retries
+        self.frames = 0
+        self.dropped = 0
+        self.error = None
+
+    def run(self):
+        for _ in range(self._retries):
+            try:
+                self._read()
+                return
+            except ValueError as e:
+                # The recording may not be available yet right after it was announced
+                self.error = e
+                time.sleep(0.01)
+
+    def _read(self):
+        last_sequence = None
+        with ClientAudioSource(self._url, self._storage_url) as source:
+            for frame in source.audio:
+                self._latency.observe(time.time() - frame.timestamp)
+                if last_sequence is not None and frame.sequence > last_sequence + 1:
+                    self.dropped += frame.sequence - last_sequence - 1
+                last_sequence = frame.sequence
+                self.frames += 1
+        self.error = None
+
+
+def run_pipeline(consumers: int, channels: int, rate: int, frame_duration: int, duration: float) -> Dict[str, Any]:
+    frame_size = frame_duration * rate // 1000
+    tmp_dir = tempfile.mkdtemp()
+
+    audio_source = SyntheticAudioSource(rate, channels, frame_size, "noise", duration=duration, pacer=Pacer(1.0))
+    image_source = SyntheticImageSource(CameraResolution.QQQVGA)
+    host = ServerThread(BackendServer(rate, channels, frame_size, image_source.resolution, 0,
+                                      audio_source, image_source).app)
+    storage = CachedAudioStorage(tmp_dir)
+    storage_server = ServerThread(StorageService(storage, None).app)
+    event_bus = SynchronousEventBus()
+    mic = SimpleMicrophone(ClientAudioSource(f"{host.url}/audio", max_reconnects=0))
+    service = AudioBackendService("benchmark", mic, storage, event_bus)
+
+    latency = Histogram(window=1_000_000)
+    readers: List[Reader] = []
+    started = threading.Event()
+    stopped = threading.Event()
+    audio_ids = []
+
+    def handle_event(event):
+        if event.payload.type == AudioSignalStarted.__name__:
+            audio_ids.append(event.payload.signal_id)
+            for _ in range(consumers):
+                reader = Reader(event.payload.files[0], storage_server.url, latency)
+                readers.append(reader)
+                reader.start()
+            started.set()
+        if event.payload.type == AudioSignalStopped.__name__:
+            stopped.set()
+
+    event_bus.subscribe("benchmark", handle_event)
+
+    usage = ResourceUsage()
+    try:
+        host.start()
+        storage_server.start()
+        usage.start()
+        service.start()
+
+        if not started.wait(10):
+            raise RuntimeError("Recording did not start")
+        # Stop after the first recording
+        service.stop()
+        if not stopped.wait(duration + 10):
+            raise RuntimeError("Recording did not stop")
+        for reader in readers:
+            reader.join(duration + 10)
+        usage.stop()
+
+        capture = storage._read_meta_from_file(audio_ids[0]).capture
+        errors = [str(reader.error) for reader in readers if reader.error]
+        frames_read = sum(reader.frames for reader in readers)
+
+        metrics = {
+            "frames_recorded": int(round((capture.end - capture.start) * rate / frame_size)),
+            "frames_read": frames_read,
+            "throughput_fps": frames_read / duration,
+            "latency_p50_ms": 1000 * latency.percentile(50),
+            "latency_p99_ms": 1000 * latency.percentile(99),
+            "latency_max_ms": 1000 * (latency.snapshot()["max"]),
+            "storage_latency_mean_ms": 1000 * capture.mean_latency,
+            "storage_latency_max_ms": 1000 * capture.max_latency,
+            "dropped_frames_storage": sum(gap[1] for gap in capture.gaps),
+            "dropped_frames_readers": sum(reader.dropped for reader in readers),
+            "reader_errors": len(errors),
+        }
+        metrics.update(usage.to_dict())
+
+        return metrics
+    finally:
+        host.shutdown()
+        storage_server.shutdown()
+        shutil.rmtree(tmp_dir)
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING,
+                        format='%(asctime)s.%(msecs)03d %(levelname)s %(module)s - %(funcName)s: %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description='End-to-end latency and throughput benchmark of the audio pipeline')
+    parser.add_argument('--consumers', type=int, nargs='+', default=[1, 4, 16],
+                        help="Numbers of concurrent live readers from the storage.")
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 2], help="Numbers of audio channels.")
+    parser.add_argument('--rates', type=int, nargs='+', default=[16000, 48000], help="Sampling rates.")
+    parser.add_argument('--frame_duration', type=int, default=30, help="Frame duration in milliseconds.")
+    parser.add_argument('--duration', type=float, default=5.0, help="Duration of each recording in seconds.")
+    parser.add_argument('--output', type=str, default="audio_pipeline.json", help="Result file.")
+    args = parser.parse_args()
+
+    results = []
+    for consumers, channels, rate in itertools.product(args.consumers, args.channels, args.rates):
+        parameters = {"consumers": consumers, "channels": channels, "rate": rate,
+                      "frame_duration": args.frame_duration, "duration": args.duration}
+        metrics = run_pipeline(consumers, channels, rate, args.frame_duration, args.duration)
+        results.append({"parameters": parameters, "metrics": metrics})
+
+        print(parameters, {key: np.round(value, 2) for key, value in metrics.items()})
+
+    write_results(args.output, "audio_pipeline", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import argparse
+import sys
+
+from util import read_results, compare, print_comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files')
+    parser.add_argument('baseline', type=str, help="Benchmark results of the baseline version.")
+    parser.add_argument('current', type=str, help="Benchmark results of the current version.")
+    parser.add_argument('--metrics', type=str, nargs='*', help="Metrics to compare, all if not set.")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Relative change of a metric in the unfavourable direction that is reported as "
+                             "regression.")
+    args = parser.parse_args()
+
+    comparison = compare(read_results(args.baseline), read_results(args.current), args.metrics, args.threshold)
+    print_comparison(comparison)
+
+    if any(entry["regression"] for entry in comparison):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
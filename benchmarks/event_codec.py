@@ -0,0 +1,103 @@
+"""
+Benchmark of the serialization of backend signal events.
+
+Compares the JSON serialization of the event bus with bzip2 compression, as configured by default for Kombu, with
+the compact binary format of :mod:`cltl_service.backend.event_codec`. For each event type reports the median time
+to encode and decode an event and the size of the encoded event.
+"""
+import argparse
+import bz2
+import enum
+import json
+import logging
+import statistics
+import timeit
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+from cltl.combot.infra.event import Event
+
+from cltl.backend.api.camera import Bounds
+from cltl.backend.api.microphone import AudioParameters
+from cltl_service.backend.event_codec import encode, decode
+from cltl_service.backend.schema import AudioSignalStarted, AudioSignalStopped, AudioSignalProgress, \
+    TextSignalEvent, ImageSignalEvent
+from util import write_results
+
+logger = logging.getLogger(__name__)
+
+
+SIGNAL_ID = "9f2a3c1e-0d4b-4c8e-a7f1-3b6d5e2c9a10"
+
+EVENTS = {
+    "AudioSignalStarted": AudioSignalStarted.create(SIGNAL_ID, 1650000000.123, [f"cltl-storage:audio/{SIGNAL_ID}"],
+                                                    AudioParameters(16000, 1, 480, 2)),
+    "AudioSignalStopped": AudioSignalStopped.create(SIGNAL_ID, 1650000003.456, 52320),
+    "AudioSignalProgress": AudioSignalProgress.create(SIGNAL_ID, 1650000001.5, 24000),
+    "TextSignalEvent": TextSignalEvent.create(SIGNAL_ID, 1650000000.0, "Hello, how are you doing today?"),
+    "ImageSignalEvent": ImageSignalEvent.create(SIGNAL_ID, 1650000000.0, [f"cltl-storage:video/{SIGNAL_ID}"],
+                                                Bounds(0, 640, 0, 480)),
+}
+
+
+def _json_default(obj):
+    return obj.name if isinstance(obj, enum.Enum) else vars(obj)
+
+
+def json_bzip2() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    def encode_json(event):
+        return bz2.compress(json.dumps(event, default=_json_default).encode("utf-8"))
+
+    def decode_json(data):
+        return json.loads(bz2.decompress(data), object_hook=lambda d: SimpleNamespace(**d))
+
+    return encode_json, decode_json
+
+
+def binary() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    return encode, decode
+
+
+CODECS = {"json_bzip2": json_bzip2, "binary": binary}
+
+
+def _median_us(operation: Callable[[], Any], number: int, repeat: int) -> float:
+    return 1e6 * statistics.median(timeit.repeat(operation, number=number, repeat=repeat)) / number
+
+
+def run(codec: str, event_type: str, number: int, repeat: int) -> Dict[str, float]:
+    encoder, decoder = CODECS[codec]()
+    event = Event.for_payload(EVENTS[event_type])
+    data = encoder(event)
+
+    return {
+        "encode_us": _median_us(lambda: encoder(event), number, repeat),
+        "decode_us": _median_us(lambda: decoder(data), number, repeat),
+        "size_bytes": len(data),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description='Serialization of backend signal events')
+    parser.add_argument('--number', type=int, default=1000, help="Operations per timing.")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of timings.")
+    parser.add_argument('--output', type=str, default="event_codec.json", help="Result file.")
+    args = parser.parse_args()
+
+    results = []
+    for event_type in EVENTS:
+        for codec in CODECS:
+            parameters = {"codec": codec, "event": event_type}
+            metrics = run(codec, event_type, args.number, args.repeat)
+            results.append({"parameters": parameters, "metrics": metrics})
+
+            print(parameters, {key: np.round(value, 2) for key, value in metrics.items()})
+
+    write_results(args.output, "event_codec", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark of the handoff of the audio resource between microphone and speaker.
+
+A listener listens continuously through a persistent `SynchronizedMicrophone` on a synthetic audio source, while a
+competing speaker repeatedly acquires the write lock on the `AUDIO_RESOURCE_NAME` resource, holds it for the
+duration of an utterance and releases it again. Reports the time the speaker waits for the microphone to be muted,
+the mute and unmute times of the microphone and the CPU time used by the process per cycle.
+"""
+import argparse
+import logging
+import threading
+import time
+from typing import Dict, Any
+
+import numpy as np
+from cltl.combot.infra.resource.threaded import ThreadedResourceManager
+
+from cltl.backend.api.metrics import Histogram
+from cltl.backend.api.microphone import AUDIO_RESOURCE_NAME
+from cltl.backend.impl.sync_microphone import SynchronizedMicrophone
+from cltl.backend.source.pacing import Pacer
+from cltl.backend.source.synthetic_source import SyntheticAudioSource
+from util import write_results
+
+logger = logging.getLogger(__name__)
+
+
+def run_cycles(rate: int, frame_duration: int, cycles: int, utterance: float, pause: float) -> Dict[str, Any]:
+    frame_size = frame_duration * rate // 1000
+    resource_manager = ThreadedResourceManager()
+    source = SyntheticAudioSource(rate, 1, frame_size, "noise", pacer=Pacer(1.0))
+    mic = SynchronizedMicrophone(source, resource_manager, persistent=True)
+
+    stopped = threading.Event()
+
+    def listen():
+        while not stopped.is_set():
+            with mic.listen() as (audio, params):
+                for frame in audio:
+                    if frame is None:
+                        break
+
+    speaker_wait = Histogram(window=cycles)
+    mic.start()
+    # Start muted, such that listening acquires the audio resource
+    mic.mute()
+    listener = threading.Thread(name="listener", target=listen, daemon=True)
+    listener.start()
+    try:
+        speaker_lock = resource_manager.get_write_lock(AUDIO_RESOURCE_NAME)
+        cpu_start = time.process_time()
+        for _ in range(cycles):
+            time.sleep(pause)
+            start = time.monotonic()
+            speaker_lock.acquire()
+            speaker_wait.observe(time.monotonic() - start)
+            time.sleep(utterance)
+            speaker_lock.release()
+        cpu_time = time.process_time() - cpu_start
+    finally:
+        stopped.set()
+        mic.stop()
+        listener.join(timeout=1)
+
+    metrics = mic.metrics
+
+    return {
+        "speaker_wait_p50_ms": 1000 * speaker_wait.percentile(50),
+        "speaker_wait_p99_ms": 1000 * speaker_wait.percentile(99),
+        "speaker_wait_max_ms": 1000 * speaker_wait.snapshot()["max"],
+        "mute_p50_ms": 1000 * metrics["mute_time"]["p50"],
+        "mute_max_ms": 1000 * metrics["mute_time"]["max"],
+        "unmute_p50_ms": 1000 * metrics["unmute_time"]["p50"],
+        "unmute_max_ms": 1000 * metrics["unmute_time"]["max"],
+        "cpu_ms_per_cycle": 1000 * cpu_time / cycles,
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description='Handoff latency between microphone and speaker')
+    parser.add_argument('--rates', type=int, nargs='+', default=[16000], help="Sampling rates.")
+    parser.add_argument('--frame_duration', type=int, default=30, help="Frame duration in milliseconds.")
+    parser.add_argument('--cycles', type=int, default=20, help="Number of speaker utterances.")
+    parser.add_argument('--utterance', type=float, default=0.5, help="Seconds the speaker holds the audio lock.")
+    parser.add_argument('--pause', type=float, default=0.3, help="Seconds of listening between utterances.")
+    parser.add_argument('--output', type=str, default="handoff_latency.json", help="Result file.")
+    args = parser.parse_args()
+
+    results = []
+    for rate in args.rates:
+        parameters = {"rate": rate, "frame_duration": args.frame_duration, "cycles": args.cycles,
+                      "utterance": args.utterance}
+        metrics = run_cycles(rate, args.frame_duration, args.cycles, args.utterance, args.pause)
+        results.append({"parameters": parameters, "metrics": metrics})
+
+        print(parameters, {key: np.round(value, 2) for key, value in metrics.items()})
+
+    write_results(args.output, "handoff_latency", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""
+Microbenchmarks of hot helpers and storage operations.
+
+Each benchmark case times a single operation at a realistic size and reports the median, mean and minimum time
+per operation. Results can be saved as baseline and later runs compared against it, failing if the median time of
+an operation increased by more than a threshold:
+
+    PYTHONPATH=../src python microbenchmarks.py --output baseline.json
+    PYTHONPATH=../src python microbenchmarks.py --output current.json --baseline baseline.json --threshold 0.2
+"""
+import argparse
+import itertools
+import json
+import logging
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import timeit
+from typing import Callable, Dict, Any, List
+
+import numpy as np
+
+from cltl.backend.api.camera import Bounds, Image, CameraResolution
+from cltl.backend.api.microphone import AudioFrame
+from cltl.backend.api.util import raw_frames_to_np, np_to_raw_frames, raw_batch_to_np
+from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
+from cltl_service.backend.storage import NumpyJSONEncoder
+from util import write_results, read_results, compare, print_comparison
+
+logger = logging.getLogger(__name__)
+
+
+FRAME_FORMATS = {
+    "16k_mono": (480, 1),
+    "48k_stereo": (1440, 2),
+}
+"""Frame size and channels of 30ms frames."""
+
+RECORDING_FRAMES = 333
+"""Number of 30ms frames in a ten second recording."""
+
+TRACKED_METRIC = "median_us"
+
+
+class Benchmark:
+    """
+    A benchmark case with optional setup and teardown that are not timed.
+    """
+    def __init__(self, name: str, parameters: Dict[str, Any], setup: Callable[[], Callable[[], Any]],
+                 teardown: Callable[[], None] = None, number: int = 10):
+        self.name = name
+        self.parameters = parameters
+        self.setup = setup
+        self.teardown = teardown
+        self.number = number
+
+    def run(self, repeat: int) -> Dict[str, float]:
+        operation = self.setup()
+        try:
+            times = timeit.repeat(operation, number=self.number, repeat=repeat)
+        finally:
+            if self.teardown:
+                self.teardown()
+
+        per_operation = [1e6 * time / self.number for time in times]
+
+        return {"median_us": statistics.median(per_operation),
+                "mean_us": statistics.mean(per_operation),
+                "min_us": min(per_operation)}
+
+
+def _audio(frame_format: str, timestamps: bool = False) -> List[np.ndarray]:
+    frame_size, channels = FRAME_FORMATS[frame_format]
+    frames = [np.random.randint(-1000, 1000, (frame_size, channels), dtype=np.int16)
+              for _ in range(RECORDING_FRAMES)]
+
+    return [AudioFrame(frame, 100.0 + i * 0.03, i) for i, frame in enumerate(frames)] if timestamps else frames
+
+
+def util_benchmarks() -> List[Benchmark]:
+    benchmarks = []
+    for frame_format in FRAME_FORMATS:
+        frame_size, channels = FRAME_FORMATS[frame_format]
+        for timestamps in (False, True):
+            parameters = {"format": frame_format, "frames": RECORDING_FRAMES, "timestamps": timestamps}
+
+            def raw_to_np(frame_format=frame_format, timestamps=timestamps, frame_size=frame_size,
+                          channels=channels):
+                raw = list(np_to_raw_frames(_audio(frame_format, timestamps), timestamps=timestamps))
+                return lambda: list(raw_frames_to_np(raw, frame_size, channels, 2, timestamps=timestamps))
+
+            def np_to_raw(frame_format=frame_format, timestamps=timestamps):
+                audio = _audio(frame_format, timestamps)
+                return lambda: list(np_to_raw_frames(audio, timestamps=timestamps))
+
+            def batch_to_np(frame_format=frame_format, timestamps=timestamps, frame_size=frame_size,
+                            channels=channels):
+                raw = b''.join(np_to_raw_frames(_audio(frame_format, timestamps), timestamps=timestamps))
+                return lambda: list(raw_batch_to_np(raw, frame_size, channels, 2, timestamps=timestamps)[0])
+
+            benchmarks.append(Benchmark("raw_frames_to_np", parameters, raw_to_np))
+            benchmarks.append(Benchmark("raw_batch_to_np", parameters, batch_to_np))
+            benchmarks.append(Benchmark("np_to_raw_frames", parameters, np_to_raw))
+
+    return benchmarks
+
+
+class _StorageFixture:
+    def __init__(self):
+        self.tmp_dir = None
+
+    def setup(self) -> str:
+        self.tmp_dir = tempfile.mkdtemp()
+        return self.tmp_dir
+
+    def teardown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+def audio_storage_benchmarks() -> List[Benchmark]:
+    benchmarks = []
+    for frame_format in FRAME_FORMATS:
+        parameters = {"format": frame_format, "frames": RECORDING_FRAMES}
+
+        store_fixture = _StorageFixture()
+
+        def store(frame_format=frame_format, fixture=store_fixture):
+            storage = CachedAudioStorage(fixture.setup())
+            audio = _audio(frame_format, timestamps=True)
+            return lambda: storage.store("benchmark", audio, 16000)
+
+        file_fixture = _StorageFixture()
+
+        def get_from_file(frame_format=frame_format, fixture=file_fixture):
+            storage = CachedAudioStorage(fixture.setup())
+            storage.store("benchmark", _audio(frame_format, timestamps=True), 16000)
+            return lambda: list(storage.get("benchmark")[0])
+
+        cache_fixture = _CachedRecording(frame_format)
+
+        benchmarks.append(Benchmark("audio_storage_store", parameters, store, store_fixture.teardown, number=3))
+        benchmarks.append(Benchmark("audio_storage_get_file", parameters, get_from_file, file_fixture.teardown))
+        benchmarks.append(Benchmark("audio_storage_get_cache", parameters, cache_fixture.setup,
+                                    cache_fixture.teardown))
+
+    return benchmarks
+
+
+class _CachedRecording(_StorageFixture):
+    """
+    Keep a recording in progress, such that reads are served from the cache.
+    """
+    def __init__(self, frame_format: str):
+        super().__init__()
+        self._frame_format = frame_format
+        self._written = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+
+    def setup(self):
+        storage = CachedAudioStorage(super().setup())
+        audio = _audio(self._frame_format)
+
+        def recording():
+            yield from audio
+            self._written.set()
+            self._done.wait()
+
+        self._thread = threading.Thread(target=lambda: storage.store("benchmark", recording(), 16000))
+        self._thread.start()
+        self._written.wait()
+
+        return lambda: list(storage.get("benchmark", length=len(audio) * len(audio[0]))[0])
+
+    def teardown(self):
+        self._done.set()
+        self._thread.join()
+        super().teardown()
+
+
+def image_benchmarks() -> List[Benchmark]:
+    benchmarks = []
+    for resolution in (CameraResolution.QVGA, CameraResolution.VGA):
+        parameters = {"resolution": resolution.name}
+        image = Image(np.random.randint(0, 256, (resolution.height, resolution.width, 3), dtype=np.uint8),
+                      Bounds(0.0, 1.0, 0.0, 1.0),
+                      np.random.rand(resolution.height, resolution.width).astype(np.float32))
+
+        write_fixture = _StorageFixture()
+
+        def write(fixture=write_fixture, image=image):
+            storage = CachedImageStorage(fixture.setup())
+            ids = itertools.count()
+            return lambda: storage.store(str(next(ids)), image)
+
+        read_fixture = _StorageFixture()
+
+        def read(fixture=read_fixture, image=image):
+            storage = CachedImageStorage(fixture.setup(), max_buffer=1)
+            storage.store("benchmark", image)
+            storage.store("other", image)
+            # Alternate reads to always miss the cache
+            ids = iter(["benchmark", "other"] * 10000)
+            return lambda: storage.get(next(ids))
+
+        cache_fixture = _StorageFixture()
+
+        def read_cached(fixture=cache_fixture, image=image):
+            storage = CachedImageStorage(fixture.setup())
+            storage.store("benchmark", image)
+            return lambda: storage.get("benchmark")
+
+        def serialize(image=image):
+            return lambda: json.dumps(image, cls=NumpyJSONEncoder)
+
+        benchmarks.append(Benchmark("image_storage_write", parameters, write, write_fixture.teardown))
+        benchmarks.append(Benchmark("image_storage_read_file", parameters, read, read_fixture.teardown))
+        benchmarks.append(Benchmark("image_storage_read_cache", parameters, read_cached, cache_fixture.teardown,
+                                    number=1000))
+        benchmarks.append(Benchmark("image_json_serialization", parameters, serialize, number=3))
+
+    return benchmarks
+
+
+def bounds_benchmarks() -> List[Benchmark]:
+    def setup():
+        corners = np.sort(np.random.rand(1000, 2, 2), axis=1)
+        bounds = [Bounds(x[0], x[1], y[0], y[1]) for x, y in corners]
+        pairs = list(zip(bounds, bounds[1:]))
+
+        return lambda: [(a.intersection(b), a.overlap(b), a.is_subset_of(b), a.contains(b.center))
+                        for a, b in pairs]
+
+    return [Benchmark("bounds_geometry", {"pairs": 999}, setup)]
+
+
+def benchmarks() -> List[Benchmark]:
+    return util_benchmarks() + audio_storage_benchmarks() + image_benchmarks() + bounds_benchmarks()
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description='Microbenchmarks of hot helpers and storage operations')
+    parser.add_argument('--filter', type=str, default=None, help="Only run benchmarks containing this string.")
+    parser.add_argument('--repeat', type=int, default=7, help="Number of timing rounds per benchmark.")
+    parser.add_argument('--output', type=str, default="microbenchmarks.json", help="Result file.")
+    parser.add_argument('--baseline', type=str, default=None, help="Baseline result file to compare against.")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Relative increase of the median time reported as regression.")
+    args = parser.parse_args()
+
+    results = []
+    for benchmark in benchmarks():
+        if args.filter and args.filter not in benchmark.name:
+            continue
+
+        parameters = dict(benchmark.parameters, benchmark=benchmark.name)
+        metrics = benchmark.run(args.repeat)
+        results.append({"parameters": parameters, "metrics": metrics})
+
+        print(f"{benchmark.name} {benchmark.parameters}: {metrics[TRACKED_METRIC]:.1f}us")
+
+    write_results(args.output, "microbenchmarks", results)
+
+    if args.baseline:
+        comparison = compare(read_results(args.baseline), read_results(args.output), [TRACKED_METRIC],
+                             args.threshold)
+        print_comparison(comparison)
+        if any(entry["regression"] for entry in comparison):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
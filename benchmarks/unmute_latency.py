@@ -0,0 +1,95 @@
+"""
+Benchmark of the time from unmuting the microphone to the first audio frame.
+
+Listens repeatedly for a short time to a host server with a synthetic audio source through a
+`SynchronizedMicrophone`, muting the microphone in between, and reports the time from the start of
+listening to the first frame, and the age of that frame, for the microphone with and without persistent
+audio source.
+"""
+import argparse
+import itertools
+import logging
+import time
+from typing import Dict, Any
+
+import numpy as np
+
+from audio_pipeline import ServerThread
+from cltl.backend.api.camera import CameraResolution
+from cltl.backend.api.metrics import Histogram
+from cltl.backend.impl.sync_microphone import SimpleMicrophone
+from cltl.backend.source.client_source import ClientAudioSource
+from cltl.backend.source.pacing import Pacer
+from cltl.backend.source.synthetic_source import SyntheticAudioSource, SyntheticImageSource
+from host.server import BackendServer
+from util import write_results
+
+logger = logging.getLogger(__name__)
+
+
+def run_cycles(persistent: bool, rate: int, frame_duration: int, cycles: int, listen_frames: int,
+               pause: float) -> Dict[str, Any]:
+    frame_size = frame_duration * rate // 1000
+
+    audio_source = SyntheticAudioSource(rate, 1, frame_size, "noise", pacer=Pacer(1.0))
+    image_source = SyntheticImageSource(CameraResolution.QQQVGA)
+    host = ServerThread(BackendServer(rate, 1, frame_size, image_source.resolution, 0,
+                                      audio_source, image_source).app)
+    mic = SimpleMicrophone(ClientAudioSource(f"{host.url}/audio", max_reconnects=0), persistent=persistent)
+
+    first_frame = Histogram(window=cycles)
+    frame_age = Histogram(window=cycles)
+    try:
+        host.start()
+        mic.start()
+
+        for _ in range(cycles):
+            start = time.monotonic()
+            with mic.listen() as (audio, params):
+                frame = next(audio)
+                first_frame.observe(time.monotonic() - start)
+                frame_age.observe(time.time() - frame.timestamp)
+                for _ in range(listen_frames - 1):
+                    next(audio)
+            mic.mute()
+            time.sleep(pause)
+    finally:
+        mic.stop()
+        host.shutdown()
+
+    return {
+        "first_frame_p50_ms": 1000 * first_frame.percentile(50),
+        "first_frame_p99_ms": 1000 * first_frame.percentile(99),
+        "first_frame_max_ms": 1000 * first_frame.snapshot()["max"],
+        "frame_age_p50_ms": 1000 * frame_age.percentile(50),
+        "frame_age_max_ms": 1000 * frame_age.snapshot()["max"],
+        "dropped_frames": mic.metrics["dropped_frames"],
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description='Unmute to first frame latency of the microphone')
+    parser.add_argument('--rates', type=int, nargs='+', default=[16000], help="Sampling rates.")
+    parser.add_argument('--frame_duration', type=int, default=30, help="Frame duration in milliseconds.")
+    parser.add_argument('--cycles', type=int, default=20, help="Number of listen cycles.")
+    parser.add_argument('--listen_frames', type=int, default=10, help="Number of frames read per cycle.")
+    parser.add_argument('--pause', type=float, default=0.2, help="Seconds muted between listen cycles.")
+    parser.add_argument('--output', type=str, default="unmute_latency.json", help="Result file.")
+    args = parser.parse_args()
+
+    results = []
+    for persistent, rate in itertools.product((False, True), args.rates):
+        parameters = {"persistent": persistent, "rate": rate, "frame_duration": args.frame_duration,
+                      "cycles": args.cycles}
+        metrics = run_cycles(persistent, rate, args.frame_duration, args.cycles, args.listen_frames, args.pause)
+        results.append({"parameters": parameters, "metrics": metrics})
+
+        print(parameters, {key: np.round(value, 2) for key, value in metrics.items()})
+
+    write_results(args.output, "unmute_latency", results)
+
+
+if __name__ == '__main__':
+    main()
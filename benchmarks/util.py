@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+VERSION_FILE = Path(__file__).resolve().parent.parent / "VERSION"
+
+
+def version() -> str:
+    try:
+        with open(VERSION_FILE) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return "unknown"
+
+
+class ResourceUsage:
+    """
+    Measure CPU utilization and memory of the current process between :meth:`start` and :meth:`stop`.
+    """
+    def __init__(self):
+        self._wall = None
+        self._cpu = None
+        self.cpu_percent = None
+        self.rss_mb = None
+        self.max_rss_mb = None
+
+    def start(self):
+        self._wall = time.monotonic()
+        self._cpu = time.process_time()
+
+        return self
+
+    def stop(self):
+        wall = time.monotonic() - self._wall
+        self.cpu_percent = 100 * (time.process_time() - self._cpu) / wall if wall else 0.0
+        self.rss_mb = current_rss_mb()
+        self.max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        return self
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"cpu_percent": self.cpu_percent, "rss_mb": self.rss_mb, "max_rss_mb": self.max_rss_mb}
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (FileNotFoundError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_results(path: str, benchmark: str, results: List[Dict[str, Any]]):
+    """
+    Write benchmark results to a JSON file, together with information about the environment.
+
+    Each result contains the parameters of the benchmark run under `parameters` and the measured values
+    under `metrics`.
+    """
+    report = {
+        "benchmark": benchmark,
+        "version": version(),
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    logger.info("Wrote %s results to %s", len(results), path)
+
+
+def read_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+HIGHER_IS_BETTER = {"frames_recorded", "frames_read", "throughput_fps"}
+"""Metrics for which a higher value is better, all other metrics are compared as lower-is-better."""
+
+
+def _key(parameters: Dict[str, Any]) -> str:
+    return json.dumps(parameters, sort_keys=True)
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric in HIGHER_IS_BETTER or metric.endswith("_fps")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], metrics: Iterable[str] = None,
+            threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Compare the metrics of benchmark results with matching parameters.
+
+    A regression is a change of more than `threshold` relative to the baseline in the unfavourable direction,
+    i.e. a decrease of metrics in :data:`HIGHER_IS_BETTER`, such as throughput, and an increase of all other
+    metrics, such as latency, CPU utilization, memory and dropped frames.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        One entry per compared metric with the baseline and current value, the relative change and whether
+        it is a regression.
+    """
+    baseline_results = {_key(result["parameters"]): result["metrics"] for result in baseline["results"]}
+
+    comparison = []
+    for result in current["results"]:
+        key = _key(result["parameters"])
+        if key not in baseline_results:
+            continue
+
+        for metric, value in result["metrics"].items():
+            if metrics and metric not in metrics:
+                continue
+            baseline_value = baseline_results[key].get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(baseline_value, (int, float)):
+                continue
+
+            change = (value - baseline_value) / abs(baseline_value) if baseline_value else 0.0
+            regression = change < -threshold if higher_is_better(metric) else change > threshold
+            comparison.append({"parameters": result["parameters"], "metric": metric,
+                               "baseline": baseline_value, "current": value, "change": change,
+                               "regression": regression})
+
+    return comparison
+
+
+def print_comparison(comparison: List[Dict[str, Any]]):
+    for entry in comparison:
+        marker = "REGRESSION" if entry["regression"] else ""
+        print(f"{_key(entry['parameters'])} {entry['metric']}: "
+              f"{entry['baseline']:.6g} -> {entry['current']:.6g} ({entry['change']:+.1%}) {marker}")
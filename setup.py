@@ -27,11 +27,18 @@ setup(
             "requests",
             "parameterized"
         ],
+        "async": [
+            "aiohttp"
+        ],
+        "vad": [
+            "webrtcvad"
+        ],
         "host": [
             "cachetools",
             "pyaudio",
             "opencv-python",
-            "flask"
+            "flask",
+            "soundfile"
         ],
         "service": [
             "cltl.backend",
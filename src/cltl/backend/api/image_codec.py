@@ -0,0 +1,58 @@
+import dataclasses
+import json
+import struct
+from typing import List, Union
+
+import numpy as np
+
+from cltl.backend.api.camera import Image, Bounds
+
+
+IMAGE_MIME_TYPE = "application/x-cltl-image"
+"""Content type of images in binary representation, see :func:`image_to_raw`."""
+
+IMAGE_HEADER_SIZE = struct.Struct("<I")
+
+
+def image_to_raw(image: Image) -> List[Union[bytes, memoryview]]:
+    """
+    Convert an image to its binary representation.
+
+    The binary representation consists of the size of a JSON header (uint32), the JSON header with the bounds
+    and the shape and dtype of the image and depth arrays, followed by the raw image and depth data.
+
+    Returns
+    -------
+    List[Union[bytes, memoryview]]
+        The parts of the binary representation, the array data is not copied.
+    """
+    arrays = [np.ascontiguousarray(image.image)]
+    if image.depth is not None:
+        arrays.append(np.ascontiguousarray(image.depth))
+
+    header = json.dumps({
+        "bounds": dataclasses.asdict(image.bounds),
+        "arrays": [{"shape": array.shape, "dtype": array.dtype.str} for array in arrays],
+    }).encode("utf-8")
+
+    return [IMAGE_HEADER_SIZE.pack(len(header)), header] + [memoryview(array).cast("B") for array in arrays]
+
+
+def raw_to_image(data: Union[bytes, bytearray, memoryview]) -> Image:
+    """
+    Convert the binary representation of an image created by :func:`image_to_raw` to an :class:`Image`.
+
+    The arrays of the image are views on `data`.
+    """
+    header_size, = IMAGE_HEADER_SIZE.unpack_from(data)
+    offset = IMAGE_HEADER_SIZE.size + header_size
+    header = json.loads(bytes(data[IMAGE_HEADER_SIZE.size:offset]).decode("utf-8"))
+
+    arrays = []
+    for spec in header["arrays"]:
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        arrays.append(np.frombuffer(data, dtype, count=count, offset=offset).reshape(spec["shape"]))
+        offset += count * dtype.itemsize
+
+    return Image(arrays[0], Bounds(**header["bounds"]), arrays[1] if len(arrays) > 1 else None)
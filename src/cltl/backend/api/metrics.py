@@ -0,0 +1,99 @@
+import threading
+from collections import deque
+from typing import Dict, Union
+
+import numpy as np
+
+
+class Counter:
+    """
+    Thread-safe monotonic counter.
+    """
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Gauge:
+    """
+    Current value of a quantity, keeping track of the maximum observed value.
+    """
+    def __init__(self, value: float = 0):
+        self._value = value
+        self._max = value
+
+    def set(self, value: float):
+        self._value = value
+        self._max = max(self._max, value)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {"value": self._value, "max": self._max}
+
+
+class Histogram:
+    """
+    Distribution of observed values.
+
+    Count, sum and maximum are tracked over all observations, percentiles are calculated over the most recent
+    `window` observations.
+
+    Parameters
+    ----------
+    window : int
+        The number of recent observations retained to calculate percentiles.
+    """
+    def __init__(self, window: int = 1024):
+        self._values = deque(maxlen=window)
+        self._count = 0
+        self._sum = 0.0
+        self._max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._values.append(value)
+            self._count += 1
+            self._sum += value
+            self._max = value if self._max is None else max(self._max, value)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        with self._lock:
+            values = list(self._values)
+
+        return float(np.percentile(values, percentile)) if values else 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        return {"count": self._count, "mean": self.mean, "max": self._max or 0.0,
+                "p50": self.percentile(50), "p99": self.percentile(99)}
+
+
+def snapshot(metrics: Dict[str, Union[Counter, Gauge, Histogram]]) -> Dict[str, Union[int, float, Dict[str, float]]]:
+    """
+    Convert a dictionary of metrics to a JSON serializable dictionary of their current values.
+    """
+    return {name: metric.snapshot() if hasattr(metric, "snapshot") else metric.value
+            for name, metric in metrics.items()}
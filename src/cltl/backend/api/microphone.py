@@ -2,7 +2,7 @@ import abc
 import logging
 from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterable, Optional, AsyncIterable, AsyncContextManager, Tuple
 
 import numpy as np
 
@@ -31,6 +31,43 @@ class AudioFormat:
     L16_MONO_16K_30MS = AudioParameters(16000, 1, 480, 2)
 
 
+class AudioFrame(np.ndarray):
+    """
+    Audio frame with capture metadata.
+
+    The frame behaves as a regular numpy array of shape (frame_size, channels) and additionally carries the
+    capture time and the sequence number assigned by the :class:`~cltl.backend.spi.audio.AudioSource`.
+    Consumers that are not aware of the metadata can treat it as plain numpy array.
+
+    Parameters
+    ----------
+    audio: np.ndarray
+        The audio samples, wrapped without copying.
+    timestamp: float, optional
+        Capture time of the first sample in the frame in seconds since the epoch.
+    sequence: int, optional
+        Sequence number of the frame within the stream of the audio source.
+    """
+    def __new__(cls, audio: np.ndarray, timestamp: Optional[float] = None, sequence: Optional[int] = None):
+        frame = np.asarray(audio).view(cls)
+        frame.timestamp = timestamp
+        frame.sequence = sequence
+
+        return frame
+
+    def __array_finalize__(self, obj):
+        self.timestamp = getattr(obj, 'timestamp', None)
+        self.sequence = getattr(obj, 'sequence', None)
+
+    def __reduce__(self):
+        reconstruct, args, state = super().__reduce__()
+        return reconstruct, args, (state, self.timestamp, self.sequence)
+
+    def __setstate__(self, state):
+        array_state, self.timestamp, self.sequence = state
+        super().__setstate__(array_state)
+
+
 class Microphone(abc.ABC):
     def __enter__(self):
         self.start()
@@ -68,6 +105,14 @@ class Microphone(abc.ABC):
         """
         raise NotImplementedError()
 
+    def listen_async(self) -> AsyncContextManager[Tuple[AsyncIterable[np.ndarray], AudioParameters]]:
+        """
+        Retrieve an asynchronous audio stream from the microphone.
+
+        Same as :meth:`listen` as asynchronous context manager for use on an asyncio event loop.
+        """
+        raise NotImplementedError()
+
     @property
     def muted(self) -> bool:
         """
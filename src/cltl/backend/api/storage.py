@@ -3,7 +3,7 @@ from typing import Iterable, List, Union
 
 import numpy as np
 
-from cltl.backend.api.camera import Image
+from cltl.backend.api.camera import Image, CameraResolution
 from cltl.backend.api.microphone import AudioParameters
 
 STORAGE_SCHEME = "cltl-storage"
@@ -41,7 +41,7 @@ class ImageStorage(abc.ABC):
     def store(self, id: str, image: Image):
         raise NotImplementedError()
 
-    def get(self, id: str) -> Image:
+    def get(self, id: str, resolution: CameraResolution = None) -> Image:
         """
         Return image data for the given id.
 
@@ -49,6 +49,9 @@ class ImageStorage(abc.ABC):
         ----------
         id : str
             The id of the audio data.
+        resolution : CameraResolution, optional
+            The requested resolution. Storages that keep images at lower resolutions return the smallest
+            available image that is at least as large as requested, by default the full image is returned.
 
         Returns
         -------
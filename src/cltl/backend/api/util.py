@@ -1,19 +1,91 @@
-from typing import Iterable, Tuple
+import math
+import struct
+from typing import Iterable, Tuple, Optional
 
 import numpy as np
 
+from cltl.backend.api.microphone import AudioFrame
 
-def raw_frames_to_np(audio: Iterable[bytes], frame_size: int, channels: int, sample_depth: int) -> Iterable[np.ndarray]:
+
+FRAME_HEADER = struct.Struct("<dQ")
+"""Header prepended to each raw audio frame on the wire if timestamps are requested.
+
+Contains the capture timestamp (float64, NaN if unknown) and the sequence number (uint64) of the frame.
+"""
+
+
+def raw_frames_to_np(audio: Iterable[bytes], frame_size: int, channels: int, sample_depth: int,
+                     timestamps: bool = False) -> Iterable[np.ndarray]:
+    """
+    Convert raw audio frames to numpy arrays of shape (frame_size, channels).
+
+    If `timestamps` is set, each raw frame is expected to be prefixed with a :data:`FRAME_HEADER` and
+    the frames are returned as :class:`~cltl.backend.api.microphone.AudioFrame`.
+    """
     if sample_depth == 2:
         dtype = np.int16
     else:
         raise ValueError("Only sample_width of 2 is supported")
 
-    return (np.frombuffer(frame, dtype).reshape((frame_size, channels)) for frame in audio)
+    if not timestamps:
+        return (np.frombuffer(frame, dtype).reshape((frame_size, channels)) for frame in audio)
+
+    return (_timestamped_frame(frame, dtype, frame_size, channels) for frame in audio)
+
+
+def _timestamped_frame(frame: bytes, dtype, frame_size: int, channels: int) -> AudioFrame:
+    timestamp, sequence = FRAME_HEADER.unpack_from(frame)
+    data = np.frombuffer(frame, dtype, offset=FRAME_HEADER.size).reshape((frame_size, channels))
+
+    return AudioFrame(data, None if math.isnan(timestamp) else timestamp, sequence)
+
+
+def raw_batch_to_np(data: bytes, frame_size: int, channels: int, sample_depth: int, timestamps: bool = False) \
+        -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Convert a buffer of consecutive raw audio frames to an array of shape (frames, frame_size, channels).
+
+    The array is a view on `data`, no audio data is copied. If `timestamps` is set, each raw frame is
+    expected to be prefixed with a :data:`FRAME_HEADER` and the audio array is a strided view skipping the
+    headers.
+
+    Returns
+    -------
+    Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]
+        The audio frames, and if `timestamps` is set, the capture timestamps (NaN if unknown) and sequence
+        numbers of the frames.
+    """
+    if sample_depth != 2:
+        raise ValueError("Only sample_width of 2 is supported")
+
+    if not timestamps:
+        return np.frombuffer(data, np.int16).reshape((-1, frame_size, channels)), None, None
+
+    dtype = np.dtype([("timestamp", "<f8"), ("sequence", "<u8"), ("audio", "<i2", (frame_size, channels))])
+    records = np.frombuffer(data, dtype)
+
+    return records["audio"], records["timestamp"], records["sequence"]
+
+
+def np_to_raw_frames(audio: Iterable[np.array], timestamps: bool = False) -> Iterable[bytes]:
+    """
+    Convert numpy audio frames to raw bytes.
+
+    If `timestamps` is set, each frame is prefixed with a :data:`FRAME_HEADER` containing the capture
+    timestamp and sequence number of the frame, if available.
+    """
+    if not timestamps:
+        return (frame.tobytes() for frame in audio)
+
+    return (_frame_header(frame, sequence) + frame.tobytes() for sequence, frame in enumerate(audio))
+
 
+def _frame_header(frame: np.ndarray, default_sequence: int) -> bytes:
+    timestamp = getattr(frame, 'timestamp', None)
+    sequence = getattr(frame, 'sequence', None)
 
-def np_to_raw_frames(audio: Iterable[np.array]) -> Iterable[bytes]:
-    return (frame.tobytes() for frame in audio)
+    return FRAME_HEADER.pack(float('nan') if timestamp is None else timestamp,
+                             default_sequence if sequence is None else sequence)
 
 
 def bytes_per_frame(frame_size: int, channels: int, sample_depth: int) -> int:
@@ -1,12 +1,14 @@
+import bisect
 import json
 import logging
 import os.path
 import pickle
+import threading
 import time
 from pathlib import Path
 from queue import Queue, Empty
 from types import SimpleNamespace
-from typing import Iterable, Union
+from typing import Iterable, Optional, Tuple, Union
 
 import cv2
 import numpy as np
@@ -14,7 +16,8 @@ import soundfile as sf
 from cachetools import LRUCache
 from cltl.combot.infra.config import ConfigurationManager
 
-from cltl.backend.api.camera import Image, Bounds
+from cltl.backend.api.camera import Image, Bounds, CameraResolution
+from cltl.backend.api.microphone import AudioFrame
 from cltl.backend.api.storage import AudioStorage, AudioParameters, ImageStorage
 
 logger = logging.getLogger(__name__)
@@ -28,28 +31,45 @@ class CachedAudioStorage(AudioStorage):
         return cls(backend_config.get("audio_storage_path"), backend_config.get_int("audio_source_buffer"))
 
     def __init__(self, storage_path: str, min_buffer: int = 16):
+        """
+        Audio storage that writes recordings to WAV files and serves recordings in progress from memory.
+
+        Recordings with different ids can be stored concurrently from multiple threads.
+
+        The capture timestamps of stored frames are not persisted. Frames read from the WAV files are timestamped
+        from the capture start and their position in the recording, corrected for gaps in the sequence numbers
+        of the captured frames. Frames dropped before they were assigned a sequence number are not accounted for.
+        """
         self._storage_path = Path(storage_path).resolve()
         self._cache = dict()
         self._cache_params = dict()
+        self._cache_lock = threading.Lock()
         self._min_buffer = min_buffer
 
     def store(self, audio_id: str, audio: Union[np.array, Iterable[np.array]], sampling_rate: int):
         if isinstance(audio, np.ndarray):
             audio = [audio]
 
-        self._cache[audio_id] = Queue()
-
-        for frame in audio:
-            if audio_id not in self._cache_params:
-                self._cache_params[audio_id] = self._audio_params(frame, sampling_rate)
-            self._cache[audio_id].put(frame)
+        cached = Queue()
+        with self._cache_lock:
+            if audio_id in self._cache:
+                raise ValueError(f"Audio {audio_id} is already being stored")
+            self._cache[audio_id] = cached
+        capture = _CaptureInfo(sampling_rate)
 
-        if not self._cache[audio_id].qsize() == 0:
-            self._write(audio_id, self._cache[audio_id].queue, sampling_rate)
-
-        del self._cache[audio_id]
-        if audio_id in self._cache_params:
-            del self._cache_params[audio_id]
+        try:
+            for frame in audio:
+                if audio_id not in self._cache_params:
+                    self._cache_params[audio_id] = self._audio_params(frame, sampling_rate)
+                cached.put(frame)
+                capture.update(frame)
+
+            if not cached.qsize() == 0:
+                self._write(audio_id, cached.queue, sampling_rate, capture)
+        finally:
+            with self._cache_lock:
+                del self._cache[audio_id]
+                self._cache_params.pop(audio_id, None)
 
     def _audio_params(self, audio, sampling_rate):
         channels = 1 if audio.ndim == 1 else audio.shape[1]
@@ -60,7 +80,7 @@ class CachedAudioStorage(AudioStorage):
 
         return AudioParameters(sampling_rate, channels, audio.shape[0], sample_wid_th)
 
-    def _write(self, id_, audio, sampling_rate: int):
+    def _write(self, id_, audio, sampling_rate: int, capture: "_CaptureInfo" = None):
         if isinstance(audio, np.ndarray):
             data = audio
         else:
@@ -72,6 +92,8 @@ class CachedAudioStorage(AudioStorage):
         sf.write(str(self._storage_path / f"{id_}.wav"), data, sampling_rate)
 
         metadata = {"timestamp": time.time(), "parameters": self._cache_params[id_]}
+        if capture and capture.start is not None:
+            metadata["capture"] = capture.to_dict()
         with open(self._storage_path / f"{id_}_meta.json", 'w') as f:
             json.dump(metadata, f, default=vars)
 
@@ -109,7 +131,9 @@ class CachedAudioStorage(AudioStorage):
             if cached.qsize() < current_frame:
                 raise ValueError(f"Offset too large, expected {current_frame}, was {cached.qsize()}")
             if buffer.qsize() < self._min_buffer:
-                pulled = list(cached.queue)[current_frame:]
+                # Copy under the lock of the queue, the frames are appended concurrently by store()
+                with cached.mutex:
+                    pulled = list(cached.queue)[current_frame:]
                 current_frame += len(pulled)
                 [buffer.put(frame) for frame in pulled]
 
@@ -122,7 +146,8 @@ class CachedAudioStorage(AudioStorage):
 
     def _get_from_file(self, id_, offset, length):
         try:
-            frame_size = self._read_meta_from_file(id_).parameters.frame_size
+            metadata = self._read_meta_from_file(id_)
+            frame_size = metadata.parameters.frame_size
 
             audio, sampling_rate = sf.read(self._storage_path / f"{id_}.wav", dtype=np.int16,
                                            frames=length, start=offset)
@@ -130,6 +155,19 @@ class CachedAudioStorage(AudioStorage):
             stop = len(audio) if length < 0 else length
             frames = (audio[i:i + frame_size] for i in range(0, stop, frame_size))
 
+            if hasattr(metadata, "capture"):
+                # Derive capture metadata from the position of the frame in the recording and the frames
+                # missing before it
+                capture = metadata.capture
+                missing = _MissingFrames(capture)
+                first_frame = offset // frame_size
+                frames = (AudioFrame(frame,
+                                     capture.start + (first_frame + i + missing(first_frame + i)) * frame_size
+                                     / sampling_rate,
+                                     capture.first_sequence + first_frame + i + missing(first_frame + i)
+                                     if capture.first_sequence is not None else None)
+                          for i, frame in enumerate(frames))
+
             yield from frames
         except FileNotFoundError:
             raise KeyError(f"No audio with id {id_} found in the storage")
@@ -144,24 +182,131 @@ class _CacheKeyError(Exception):
         self.offset = offset
 
 
+class _CaptureInfo:
+    """
+    Collect capture metadata of the frames of a recording.
+
+    Tracks the capture time span, gaps in the frame sequence and the latency between capture and
+    storage of the frames.
+    """
+    def __init__(self, sampling_rate: int):
+        self._sampling_rate = sampling_rate
+        self._next_sequence = None
+        self._latency_sum = 0.0
+        self._frames = 0
+
+        self.start = None
+        self.end = None
+        self.first_sequence = None
+        self.gaps = []
+        self.max_latency = 0.0
+
+    def update(self, frame: np.ndarray):
+        timestamp = getattr(frame, 'timestamp', None)
+        if timestamp is not None:
+            if self.start is None:
+                self.start = timestamp
+            self.end = timestamp + len(frame) / self._sampling_rate
+
+            latency = time.time() - timestamp
+            self._latency_sum += latency
+            self._frames += 1
+            self.max_latency = max(self.max_latency, latency)
+
+        sequence = getattr(frame, 'sequence', None)
+        if sequence is not None:
+            if self.first_sequence is None:
+                self.first_sequence = sequence
+            elif sequence != self._next_sequence:
+                logger.warning("Gap in audio frames: expected sequence %s, was %s", self._next_sequence, sequence)
+                self.gaps.append([self._next_sequence, sequence - self._next_sequence])
+            self._next_sequence = sequence + 1
+
+    @property
+    def mean_latency(self) -> float:
+        return self._latency_sum / self._frames if self._frames else 0.0
+
+    def to_dict(self):
+        return {"start": self.start, "end": self.end, "first_sequence": self.first_sequence, "gaps": self.gaps,
+                "mean_latency": self.mean_latency, "max_latency": self.max_latency}
+
+
+class _MissingFrames:
+    """
+    The number of frames missing in a recording before a stored frame, from the gaps recorded in its capture
+    metadata. Gaps are only detected for frames with sequence numbers.
+    """
+    def __init__(self, capture):
+        self._positions = []
+        self._missing = []
+
+        missing = 0
+        for expected_sequence, count in getattr(capture, "gaps", []):
+            missing += count
+            # Index of the first stored frame after the gap
+            self._positions.append(expected_sequence - capture.first_sequence - (missing - count))
+            self._missing.append(missing)
+
+    def __call__(self, frame_index: int) -> int:
+        idx = bisect.bisect_right(self._positions, frame_index)
+
+        return self._missing[idx - 1] if idx else 0
+
+
 class CachedImageStorage(ImageStorage):
     @classmethod
     def from_config(cls, config_manager: ConfigurationManager):
         backend_config = config_manager.get_config("cltl.backend")
 
-        return cls(backend_config.get("image_storage_path"), backend_config.get_int("image_cache"))
-
-    def __init__(self, storage_path: str, max_buffer: int = 16):
+        options = {}
+        if "image_resolutions" in backend_config:
+            options["resolutions"] = backend_config.get_enum("image_resolutions", CameraResolution, multi=True)
+        if "image_pyramid" in backend_config:
+            options["eager"] = backend_config.get("image_pyramid") == "eager"
+
+        return cls(backend_config.get("image_storage_path"), backend_config.get_int("image_cache"), **options)
+
+    def __init__(self, storage_path: str, max_buffer: int = 16, resolutions: Iterable[CameraResolution] = (),
+                 eager: bool = False):
+        """
+        Image storage that writes images to PNG files and keeps recently used images in memory.
+
+        Optionally the storage keeps a pyramid of downscaled versions of the images at lower resolutions, such
+        that consumers that need only a small image don't have to retrieve and scale the full image.
+
+        Parameters
+        ----------
+        storage_path : str
+            The directory to store the images in
+        max_buffer : int
+            The maximum number of images kept in memory, each level of the pyramid counts as an image
+        resolutions : Iterable[CameraResolution]
+            The resolutions of the pyramid levels, images are scaled to fit into them keeping their aspect ratio
+        eager : bool
+            Compute and store all levels of the pyramid when an image is stored, by default levels are computed
+            on first request
+        """
         self._storage_path = Path(storage_path).resolve()
         self._cache = LRUCache(maxsize=max_buffer)
+        self._cache_lock = threading.Lock()
+        self._resolutions = sorted((resolution for resolution in resolutions
+                                    if resolution != CameraResolution.NATIVE),
+                                   key=lambda resolution: resolution.height * resolution.width)
+        self._eager = eager
 
     def store(self, image_id: str, image: Image):
-        if image_id in self._cache:
-            logger.warning("Image %s was already stored", image_id)
+        with self._cache_lock:
+            if image_id in self._cache:
+                logger.warning("Image %s was already stored", image_id)
+            self._cache[image_id] = image
 
-        self._cache[image_id] = image
         self._write(image_id, image)
 
+        if self._eager:
+            for resolution in self._resolutions:
+                if self._is_smaller(resolution, image):
+                    self._store_level(image_id, resolution, image)
+
     def _write(self, image_id: str, image: Image):
         cv2.imwrite(str(self._storage_path / f"{image_id}.png"), image.image)
 
@@ -172,27 +317,90 @@ class CachedImageStorage(ImageStorage):
             with open(self._storage_path / f"{image_id}_depth.pkl", 'wb') as f:
                 pickle.dump(image.depth, f)
 
-    def get(self, image_id: str) -> Image:
-        try:
-            return self._cache[image_id]
-        except KeyError:
+    def get(self, image_id: str, resolution: CameraResolution = None) -> Image:
+        level = self._level(resolution)
+        if level:
+            try:
+                return self._get_level(image_id, level)
+            except KeyError:
+                pass
+
+        with self._cache_lock:
+            image = self._cache.get(image_id)
+
+        if image is None:
             image = self._read(image_id)
-            self._cache[image_id] = image
+            with self._cache_lock:
+                self._cache[image_id] = image
+
+        if level and self._is_smaller(level, image):
+            return self._store_level(image_id, level, image)
+
+        return image
+
+    def _level(self, resolution: Optional[CameraResolution]) -> Optional[CameraResolution]:
+        """The smallest level of the pyramid that is at least as large as the requested resolution."""
+        if resolution is None or resolution == CameraResolution.NATIVE:
+            return None
+
+        return next((level for level in self._resolutions
+                     if level.height >= resolution.height and level.width >= resolution.width), None)
+
+    @staticmethod
+    def _is_smaller(resolution: CameraResolution, image: Image) -> bool:
+        height, width = image.image.shape[:2]
+
+        return resolution.height < height or resolution.width < width
 
+    @staticmethod
+    def _fit(resolution: CameraResolution, image: Image) -> Tuple[int, int]:
+        """The size (width, height) of the image scaled to fit into the resolution, keeping its aspect ratio."""
+        height, width = image.image.shape[:2]
+        scale = min(resolution.width / width, resolution.height / height)
+
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def _get_level(self, image_id: str, level: CameraResolution) -> Image:
+        with self._cache_lock:
+            image = self._cache.get((image_id, level))
+        if image is not None:
             return image
 
-    def _read(self, image_id: str):
-        if not os.path.isfile(self._storage_path / f"{image_id}.png"):
-            raise KeyError(f"No image with id {image_id} found in the storage")
+        image = self._read(image_id, level)
+        with self._cache_lock:
+            self._cache[(image_id, level)] = image
+
+        return image
+
+    def _store_level(self, image_id: str, level: CameraResolution, image: Image) -> Image:
+        size = self._fit(level, image)
+        scaled = Image(cv2.resize(image.image, size, interpolation=cv2.INTER_AREA), image.bounds,
+                       cv2.resize(image.depth, size, interpolation=cv2.INTER_NEAREST)
+                       if image.depth is not None else None)
+
+        with self._cache_lock:
+            self._cache[(image_id, level)] = scaled
+
+        cv2.imwrite(str(self._storage_path / f"{image_id}_{level.name}.png"), scaled.image)
+        if scaled.depth is not None:
+            with open(self._storage_path / f"{image_id}_{level.name}_depth.pkl", 'wb') as f:
+                pickle.dump(scaled.depth, f)
+
+        return scaled
+
+    def _read(self, image_id: str, level: CameraResolution = None):
+        name = f"{image_id}_{level.name}" if level else image_id
+        if not os.path.isfile(self._storage_path / f"{name}.png"):
+            raise KeyError(f"No image with id {name} found in the storage")
 
-        image = cv2.imread(str(self._storage_path / f"{image_id}.png"))
+        image = cv2.imread(str(self._storage_path / f"{name}.png"))
 
         with open(self._storage_path / f"{image_id}_meta.json", 'r') as f:
             bounds = Bounds(**json.load(f)['bounds'])
 
         depth = None
-        if os.path.isfile(self._storage_path / f"{image_id}_depth.pkl"):
-            with open(self._storage_path / f"{image_id}_depth.pkl", 'rb') as f:
+        if os.path.isfile(self._storage_path / f"{name}_depth.pkl"):
+            with open(self._storage_path / f"{name}_depth.pkl", 'rb') as f:
                 depth = pickle.load(f)
 
         return Image(image, bounds, depth)
@@ -0,0 +1,250 @@
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+
+from cltl.backend.api.metrics import Counter
+from cltl.backend.api.microphone import AudioFrame
+
+logger = logging.getLogger(__name__)
+
+
+class RingCursor:
+    """
+    Read position of a consumer in an :class:`AudioRingBuffer`.
+
+    The position is the absolute index of the next frame to be read, frames that were overwritten before the
+    consumer could read them are counted in `dropped`.
+    """
+    def __init__(self, position: int):
+        self.position = position
+        self.dropped = Counter()
+
+
+class AudioRingBuffer:
+    """
+    Preallocated ring buffer of audio frames for a single writer and independent readers.
+
+    The writer never blocks: frames are copied into the preallocated buffer and published by advancing the
+    write position, overwriting the oldest frames if readers lag behind. Readers keep their own
+    :class:`RingCursor` and validate after copying a frame that it was not overwritten in the meantime, so no
+    lock is held while accessing the audio data. A condition is only used to wake up waiting readers.
+
+    Parameters
+    ----------
+    capacity : int
+        The number of frames in the buffer.
+    frame_size : int
+        The number of samples per frame.
+    channels : int
+        The number of channels.
+    """
+    def __init__(self, capacity: int, frame_size: int, channels: int, dtype=np.int16):
+        self._capacity = capacity
+        self._frames = np.zeros((capacity, frame_size, channels), dtype=dtype)
+        self._timestamps = np.zeros(capacity, dtype=float)
+        self._written = 0
+        self._closed = False
+        self._available = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def written(self) -> int:
+        """
+        The total number of frames written to the buffer.
+        """
+        return self._written
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, frame: np.ndarray, timestamp: float):
+        slot = self._written % self._capacity
+        self._frames[slot] = frame.reshape(self._frames.shape[1:])
+        self._timestamps[slot] = timestamp
+        self._written += 1
+
+        with self._available:
+            self._available.notify_all()
+
+    def close(self):
+        """
+        Stop the buffer, readers receive the remaining frames and `None` afterwards.
+        """
+        self._closed = True
+        with self._available:
+            self._available.notify_all()
+
+    def cursor(self, lookback: int = 0) -> RingCursor:
+        """
+        Create a cursor at the current write position, or `lookback` frames before if available.
+        """
+        return RingCursor(max(0, self._written - min(lookback, self._capacity - 1)))
+
+    def lag(self, cursor: RingCursor) -> int:
+        """
+        The number of frames written but not yet read by the `cursor`.
+        """
+        return self._written - cursor.position
+
+    def read(self, cursor: RingCursor, timeout: float = None) -> Optional[AudioFrame]:
+        """
+        Read the next frame at the `cursor` position and advance the cursor.
+
+        Blocks until a frame is available, the buffer is closed or the `timeout` passed.
+
+        Returns
+        -------
+        AudioFrame
+            A copy of the frame with its capture timestamp, the sequence number is the absolute position of the
+            frame in the buffer. `None` if the buffer is closed or no frame became available within `timeout`.
+        """
+        if not self._await(cursor, timeout):
+            return None
+
+        while True:
+            self._skip_overwritten(cursor)
+
+            slot = cursor.position % self._capacity
+            frame = self._frames[slot].copy()
+            timestamp = self._timestamps[slot]
+
+            # The writer may have started to overwrite the slot while copying
+            if self._written - cursor.position < self._capacity:
+                break
+
+        sequence = cursor.position
+        cursor.position += 1
+
+        return AudioFrame(frame, float(timestamp), sequence)
+
+    def _await(self, cursor: RingCursor, timeout: float) -> bool:
+        if cursor.position < self._written:
+            return True
+
+        with self._available:
+            self._available.wait_for(lambda: cursor.position < self._written or self._closed, timeout)
+
+        return cursor.position < self._written
+
+    def _skip_overwritten(self, cursor: RingCursor):
+        lag = self._written - cursor.position
+        if lag >= self._capacity:
+            dropped = lag - self._capacity + 1
+            cursor.position += dropped
+            cursor.dropped.inc(dropped)
+            logger.debug("Reader lagged behind by %s frames, dropped %s frames", lag, dropped)
+
+
+class FrameBuffer:
+    """
+    Ring buffer of references to frames for a single writer and independent readers.
+
+    In contrast to the :class:`AudioRingBuffer` frames are not copied, readers receive the frame instances
+    passed to :meth:`write`. Frames must therefore not be modified after they were written.
+
+    Parameters
+    ----------
+    capacity : int
+        The number of frames in the buffer.
+    """
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._frames = [None] * capacity
+        self._written = 0
+        self._closed = False
+        self._wakeups = 0
+        self._available = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def written(self) -> int:
+        """
+        The total number of frames written to the buffer.
+        """
+        return self._written
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, frame: np.ndarray):
+        self._frames[self._written % self._capacity] = frame
+        self._written += 1
+
+        with self._available:
+            self._available.notify_all()
+
+    def close(self):
+        """
+        Stop the buffer, readers receive the remaining frames and `None` afterwards.
+        """
+        self._closed = True
+        with self._available:
+            self._available.notify_all()
+
+    def wake(self):
+        """
+        Wake up all waiting readers, :meth:`read` returns `None` to readers without available frames.
+        """
+        with self._available:
+            self._wakeups += 1
+            self._available.notify_all()
+
+    def cursor(self, lookback: int = 0) -> RingCursor:
+        """
+        Create a cursor at the current write position, or `lookback` frames before if available.
+        """
+        return RingCursor(max(0, self._written - min(lookback, self._capacity - 1)))
+
+    def lag(self, cursor: RingCursor) -> int:
+        """
+        The number of frames written but not yet read by the `cursor`.
+        """
+        return self._written - cursor.position
+
+    def read(self, cursor: RingCursor, timeout: float = None) -> Optional[np.ndarray]:
+        """
+        Read the next frame at the `cursor` position and advance the cursor.
+
+        Blocks until a frame is available, the buffer is closed, readers are woken up by :meth:`wake` or the
+        `timeout` passed.
+
+        Returns
+        -------
+        np.ndarray
+            The frame, `None` if the buffer is closed or no frame became available within `timeout`.
+        """
+        if cursor.position >= self._written:
+            with self._available:
+                wakeups = self._wakeups
+                self._available.wait_for(lambda: cursor.position < self._written or self._closed
+                                                 or self._wakeups != wakeups, timeout)
+            if cursor.position >= self._written:
+                return None
+
+        while True:
+            lag = self._written - cursor.position
+            if lag >= self._capacity:
+                dropped = lag - self._capacity + 1
+                cursor.position += dropped
+                cursor.dropped.inc(dropped)
+                logger.debug("Reader lagged behind by %s frames, dropped %s frames", lag, dropped)
+
+            frame = self._frames[cursor.position % self._capacity]
+
+            # The writer may have replaced the slot in the meantime
+            if self._written - cursor.position < self._capacity:
+                break
+
+        cursor.position += 1
+
+        return frame
@@ -0,0 +1,226 @@
+"""
+Segmentation of an audio stream into utterances by voice activity detection (VAD).
+
+A :class:`Segmenter` classifies frames of an audio stream as speech or non-speech with a :class:`VAD` and splits
+the stream into segments that start with a pre-roll of the frames before the first speech frame and end after a
+hangover of non-speech frames. Frames are classified in batches, such that the VAD can evaluate multiple frames at
+once.
+"""
+import abc
+import logging
+from collections import deque
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from cltl.combot.infra.config import ConfigurationManager
+
+from cltl.backend.api.microphone import AudioParameters
+
+logger = logging.getLogger(__name__)
+
+
+class VAD(abc.ABC):
+    @abc.abstractmethod
+    def is_speech(self, frames: np.ndarray, sampling_rate: int) -> np.ndarray:
+        """
+        Classify frames as speech or non-speech.
+
+        Parameters
+        ----------
+        frames : np.ndarray
+            Batch of int16 frames of shape (frames, frame_size, channels)
+        sampling_rate : int
+            The sampling rate of the audio
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array with one entry per frame, `True` for speech.
+        """
+        raise NotImplementedError()
+
+
+class EnergyVAD(VAD):
+    def __init__(self, threshold: float = -40.0):
+        """
+        Classify frames with a root mean square level above a threshold as speech.
+
+        Parameters
+        ----------
+        threshold : float
+            The threshold in dB relative to the full scale of int16 audio
+        """
+        self._threshold = threshold
+        # Compare mean squares to avoid square roots and logarithms per frame
+        self._mean_square_threshold = (np.iinfo(np.int16).max * 10 ** (threshold / 20)) ** 2
+
+    def is_speech(self, frames: np.ndarray, sampling_rate: int) -> np.ndarray:
+        samples = frames.reshape(len(frames), -1).astype(np.float32)
+        mean_square = np.einsum('ij,ij->i', samples, samples) / samples.shape[1]
+
+        return mean_square > self._mean_square_threshold
+
+
+class WebRtcVAD(VAD):
+    def __init__(self, mode: int = 3, energy: Optional[EnergyVAD] = None):
+        """
+        Classify frames with the WebRTC voice activity detector from the `webrtcvad` package.
+
+        Frames must have a duration of 10, 20 or 30 ms, only the first channel is classified.
+
+        Parameters
+        ----------
+        mode : int
+            The aggressiveness of the detector, from 0 (least) to 3 (most aggressive filtering of non-speech)
+        energy : EnergyVAD, optional
+            Classify only frames as speech that pass the energy detector, frames below the energy threshold
+            are not passed to the WebRTC detector
+        """
+        import webrtcvad
+
+        self._vad = webrtcvad.Vad(mode)
+        self._energy = energy
+
+    def is_speech(self, frames: np.ndarray, sampling_rate: int) -> np.ndarray:
+        candidates = self._energy.is_speech(frames, sampling_rate) if self._energy else np.ones(len(frames), bool)
+
+        mono = np.ascontiguousarray(frames[:, :, 0])
+        speech = np.zeros(len(frames), dtype=bool)
+        for idx in np.flatnonzero(candidates):
+            speech[idx] = self._vad.is_speech(mono[idx].tobytes(), sampling_rate)
+
+        return speech
+
+
+class Segmenter:
+    @classmethod
+    def from_config(cls, config_manager: ConfigurationManager) -> Optional["Segmenter"]:
+        """
+        Create a segmenter from the `cltl.backend.vad` configuration.
+
+        Returns
+        -------
+        Segmenter
+            The segmenter, `None` if VAD is not configured or disabled (`detector: none`).
+        """
+        if not config_manager.has_config("cltl.backend.vad"):
+            return None
+
+        config = config_manager.get_config("cltl.backend.vad")
+        detector = config.get("detector") if "detector" in config else "none"
+        threshold = config.get_float("threshold") if "threshold" in config else -40.0
+        mode = config.get_int("mode") if "mode" in config else 3
+
+        if detector == "none":
+            return None
+        elif detector == "energy":
+            vad = EnergyVAD(threshold)
+        elif detector == "webrtc":
+            vad = WebRtcVAD(mode)
+        elif detector == "both":
+            vad = WebRtcVAD(mode, EnergyVAD(threshold))
+        else:
+            raise ValueError(f"Unsupported VAD detector: {detector}")
+
+        options = {}
+        if "hangover" in config:
+            options["hangover_ms"] = config.get_int("hangover")
+        if "preroll" in config:
+            options["preroll_ms"] = config.get_int("preroll")
+        if "batch_frames" in config:
+            options["batch_frames"] = config.get_int("batch_frames")
+
+        return cls(vad, **options)
+
+    def __init__(self, vad: VAD, hangover_ms: int = 300, preroll_ms: int = 150, batch_frames: int = 1):
+        """
+        Split an audio stream into segments of speech.
+
+        Parameters
+        ----------
+        vad : VAD
+            The voice activity detector
+        hangover_ms : int
+            The duration of non-speech after which a segment ends, the non-speech frames are part of the segment
+        preroll_ms : int
+            The duration of audio before the first speech frame included at the start of a segment
+        batch_frames : int
+            The number of frames classified at once, larger batches reduce the classification overhead but
+            delay the detection of speech by up to `batch_frames - 1` frames
+        """
+        self._vad = vad
+        self._hangover_ms = hangover_ms
+        self._preroll_ms = preroll_ms
+        self._batch_frames = batch_frames
+
+    def segments(self, audio: Iterable[np.ndarray],
+                 parameters: AudioParameters) -> Iterator[Iterator[np.ndarray]]:
+        """
+        Split the audio into segments of speech.
+
+        Like :func:`itertools.groupby` the segments share the underlying audio iterator, a segment must be consumed
+        before the next one is requested. Frames that are not consumed are skipped. `None` values in the audio are
+        ignored.
+
+        Parameters
+        ----------
+        audio : Iterable[np.ndarray]
+            The audio frames
+        parameters : AudioParameters
+            The parameters of the audio
+
+        Returns
+        -------
+        Iterator[Iterator[np.ndarray]]
+            Iterator over the segments, each segment is an iterator over its frames.
+        """
+        frame_ms = 1000 * parameters.frame_size / parameters.sampling_rate
+        hangover_frames = max(1, int(np.ceil(self._hangover_ms / frame_ms)))
+        preroll = deque(maxlen=int(np.ceil(self._preroll_ms / frame_ms)) or None)
+
+        classified = self._classify(audio, parameters)
+        for frame, speech in classified:
+            if not speech:
+                if preroll.maxlen:
+                    preroll.append(frame)
+                continue
+
+            segment = self._segment(list(preroll) + [frame], classified, hangover_frames)
+            preroll.clear()
+            yield segment
+
+            # Skip frames of the segment that were not consumed
+            for _ in segment:
+                pass
+
+    @staticmethod
+    def _segment(start, classified, hangover_frames) -> Iterator[np.ndarray]:
+        yield from start
+
+        silence = 0
+        for frame, speech in classified:
+            yield frame
+
+            silence = 0 if speech else silence + 1
+            if silence >= hangover_frames:
+                return
+
+    def _classify(self, audio: Iterable[np.ndarray],
+                  parameters: AudioParameters) -> Iterator[Tuple[np.ndarray, bool]]:
+        batch = []
+        for frame in audio:
+            if frame is None:
+                continue
+
+            batch.append(frame)
+            if len(batch) >= self._batch_frames:
+                yield from self._classify_batch(batch, parameters)
+                batch = []
+
+        if batch:
+            yield from self._classify_batch(batch, parameters)
+
+    def _classify_batch(self, batch, parameters):
+        frames = np.stack(batch).reshape(len(batch), parameters.frame_size, -1)
+
+        return zip(batch, self._vad.is_speech(frames, parameters.sampling_rate))
@@ -0,0 +1,292 @@
+"""
+Images in shared memory for consumers in other processes.
+
+A :class:`SharedImagePool` copies images into reusable :mod:`multiprocessing.shared_memory` segments. The
+resulting :class:`SharedImage` can be used like any other :class:`Image` in the owning process, while its
+:class:`SharedImageHandle` is a small picklable description of the segment that is sent to worker processes
+instead of the image data:
+
+    with SharedImagePool() as pool, ProcessPoolExecutor() as executor:
+        shared = pool.share(image)
+        future = executor.submit(detect_faces, shared.handle)
+        future.add_done_callback(lambda _: shared.release())
+
+    def detect_faces(handle: SharedImageHandle):
+        with handle.attach() as image:
+            ...
+
+References to a :class:`SharedImage` are counted in the owning process only, the segment is returned to the pool
+when the count drops to zero. The owner must therefore keep a reference until all workers are done with the image.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory, resource_tracker
+from typing import Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from cltl.backend.api.camera import Image, Bounds
+from cltl.backend.api.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SharedImageHandle:
+    """
+    Picklable reference to an image in shared memory.
+
+    Parameters
+    ----------
+    name : str
+        The name of the shared memory segment
+    bounds : Bounds
+        The bounds of the image
+    arrays : Tuple[Tuple[Tuple[int, ...], str, int], ...]
+        Shape, dtype and offset in the segment of the image and, if present, the depth array
+    """
+    name: str
+    bounds: Bounds
+    arrays: Tuple[Tuple[Tuple[int, ...], str, int], ...]
+
+    @contextmanager
+    def attach(self) -> Iterator[Image]:
+        """
+        Attach to the shared memory segment and provide the image with arrays backed by the segment.
+
+        The arrays must not be used after the context is left.
+        """
+        segment = _attach(self.name)
+        try:
+            yield _image_view(segment, self)
+        finally:
+            try:
+                segment.close()
+            except BufferError:
+                logger.warning("Arrays of shared image %s are still referenced after detaching", self.name)
+
+
+class SharedImage(Image):
+    """
+    :class:`Image` with arrays backed by a shared memory segment of a :class:`SharedImagePool`.
+
+    The image starts with a reference count of one, use :meth:`retain` and :meth:`release` to share it between
+    multiple consumers. Used as context manager the image is released on exit. After the image is released its
+    arrays are no longer available.
+    """
+    def __init__(self, handle: SharedImageHandle, segment: shared_memory.SharedMemory, pool: "SharedImagePool"):
+        view = _image_view(segment, handle)
+        super().__init__(view.image, view.bounds, view.depth)
+        self.handle = handle
+        self._segment = segment
+        self._pool = pool
+        self._references = 1
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def retain(self) -> "SharedImage":
+        with self._lock:
+            if self._references == 0:
+                raise ValueError(f"Shared image {self.handle.name} was already released")
+            self._references += 1
+
+        return self
+
+    def release(self):
+        with self._lock:
+            if self._references == 0:
+                raise ValueError(f"Shared image {self.handle.name} was already released")
+            self._references -= 1
+            released = self._references == 0
+
+        if released:
+            # Drop the views on the segment, it is reused for other images
+            self.image = None
+            self.depth = None
+            self._pool._release(self._segment)
+
+    @property
+    def released(self) -> bool:
+        return self._references == 0
+
+
+class SharedImagePool:
+    def __init__(self, max_segments: int = 16):
+        """
+        Pool of shared memory segments to share images with other processes.
+
+        Segments are allocated on demand and reused for subsequent images once released, a free segment is
+        replaced if it is too small for the image.
+
+        Parameters
+        ----------
+        max_segments : int
+            The maximum number of segments in the pool, i.e. the maximum number of images shared at once
+        """
+        self._max_segments = max_segments
+        self._segments: List[shared_memory.SharedMemory] = []
+        self._free: List[shared_memory.SharedMemory] = []
+        self._available = threading.Condition()
+        self._closed = False
+
+        self._allocated = Counter()
+        self._reused = Counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def share(self, image: Image, timeout: Optional[float] = None) -> SharedImage:
+        """
+        Copy the image into a shared memory segment.
+
+        If all segments are in use, wait until one is released.
+
+        Parameters
+        ----------
+        image : Image
+            The image to share
+        timeout : float, optional
+            The maximum time in seconds to wait for a free segment, by default wait indefinitely
+
+        Returns
+        -------
+        SharedImage
+            The shared image with a reference count of one.
+        """
+        arrays = [np.ascontiguousarray(image.image)]
+        if image.depth is not None:
+            arrays.append(np.ascontiguousarray(image.depth))
+
+        layout = []
+        size = 0
+        for array in arrays:
+            # Align arrays to 64 bytes
+            size = -(-size // 64) * 64
+            layout.append((array.shape, array.dtype.str, size))
+            size += array.nbytes
+
+        segment = self._acquire(max(size, 1), timeout)
+        handle = SharedImageHandle(segment.name, image.bounds, tuple(layout))
+        shared = SharedImage(handle, segment, self)
+        for target, array in zip((shared.image, shared.depth), arrays):
+            target[...] = array
+
+        return shared
+
+    def _acquire(self, size: int, timeout: Optional[float]) -> shared_memory.SharedMemory:
+        with self._available:
+            if not self._available.wait_for(lambda: self._closed or self._free
+                                                    or len(self._segments) < self._max_segments, timeout):
+                raise ValueError(f"No shared memory segment released within {timeout}s")
+            if self._closed:
+                raise ValueError("Shared image pool is closed")
+
+            fitting = [segment for segment in self._free if segment.size >= size]
+            if fitting:
+                segment = min(fitting, key=lambda s: s.size)
+                self._free.remove(segment)
+                self._reused.inc()
+
+                return segment
+
+            if len(self._segments) >= self._max_segments:
+                # Replace the largest free segment, which is too small
+                self._discard(max(self._free, key=lambda s: s.size))
+
+            segment = shared_memory.SharedMemory(create=True, size=size)
+            with _owned_lock:
+                _owned.add(segment.name)
+            self._segments.append(segment)
+            self._allocated.inc()
+            logger.debug("Allocated shared memory segment %s of size %s", segment.name, size)
+
+            return segment
+
+    def _release(self, segment: shared_memory.SharedMemory):
+        with self._available:
+            if self._closed:
+                self._close(segment)
+            else:
+                self._free.append(segment)
+                self._available.notify()
+
+    def _discard(self, segment: shared_memory.SharedMemory):
+        self._free.remove(segment)
+        self._segments.remove(segment)
+        self._close(segment)
+        _unlink(segment)
+
+    @staticmethod
+    def _close(segment: shared_memory.SharedMemory):
+        try:
+            segment.close()
+        except BufferError:
+            logger.warning("Arrays of shared memory segment %s are still referenced", segment.name)
+
+    def close(self):
+        """
+        Unlink all segments of the pool.
+
+        Images in use remain valid in processes that are already attached to them until they are released.
+        """
+        with self._available:
+            self._closed = True
+            for segment in self._free:
+                self._close(segment)
+            for segment in self._segments:
+                _unlink(segment)
+            self._free.clear()
+            self._segments.clear()
+            self._available.notify_all()
+
+    @property
+    def metrics(self):
+        with self._available:
+            return {
+                "segments": len(self._segments),
+                "in_use": len(self._segments) - len(self._free),
+                "allocated": self._allocated.value,
+                "reused": self._reused.value,
+            }
+
+
+# Names of the segments created by pools in this process
+_owned: Set[str] = set()
+_owned_lock = threading.Lock()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    segment = shared_memory.SharedMemory(name)
+
+    # Attaching registers the segment with the resource tracker of the attaching process, which then unlinks it
+    # when the process exits (https://bugs.python.org/issue39959). The segment is owned by the pool, undo the
+    # registration unless the segment was created in this process.
+    with _owned_lock:
+        owned = segment.name in _owned
+    if not owned:
+        resource_tracker.unregister(segment._name, "shared_memory")
+
+    return segment
+
+
+def _unlink(segment: shared_memory.SharedMemory):
+    with _owned_lock:
+        _owned.discard(segment.name)
+    segment.unlink()
+
+
+def _image_view(segment: shared_memory.SharedMemory, handle: SharedImageHandle) -> Image:
+    arrays = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf, offset=offset)
+              for shape, dtype, offset in handle.arrays]
+
+    return Image(arrays[0], handle.bounds, arrays[1] if len(arrays) > 1 else None)
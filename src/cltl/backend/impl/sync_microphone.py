@@ -1,29 +1,66 @@
+import asyncio
 import contextlib
+import itertools
 import logging
-from typing import Generator, Iterator
+import threading
+import time
+from typing import Iterator, Dict, Any, AsyncIterator, Tuple, Optional
 
 import numpy as np
 from cltl.combot.infra.resource.api import ResourceManager
 from cltl.combot.infra.resource.threaded import ThreadedResourceManager
 from cltl.combot.infra.util import ThreadsafeBoolean
 
+from cltl.backend.api.metrics import Counter, Histogram, snapshot
 from cltl.backend.api.microphone import Microphone, AUDIO_RESOURCE_NAME, MIC_RESOURCE_NAME, AudioParameters
+from cltl.backend.impl.ring_buffer import FrameBuffer, RingCursor
 from cltl.backend.spi.audio import AudioSource
 
 logger = logging.getLogger(__name__)
 
 
+_INTERRUPTED = object()
+"""Marker for a read from the buffer that returned early because the microphone was interrupted."""
+
+
+class _Listener:
+    """
+    An active listener of a :class:`SynchronizedMicrophone`.
+
+    In persistent mode each listener reads from the shared buffer with its own cursor. The listener ends when
+    the microphone is muted after it started listening, i.e. when the mute generation changed.
+    """
+    def __init__(self, name: str, cursor: Optional[RingCursor]):
+        self.name = name
+        self.cursor = cursor
+        self.generation = None
+        self.frames = Counter()
+
+
 class SynchronizedMicrophone(Microphone):
-    def __init__(self, source: AudioSource, resource_manager: ResourceManager):
+    def __init__(self, source: AudioSource, resource_manager: ResourceManager, persistent: bool = False,
+                 buffer_frames: int = 32, max_preroll_ms: int = 0):
         """
         A SynchronizedMicrophone can be synchronized with other audio activity.
 
+        By default the audio source is opened on each call to :meth:`listen`. In persistent mode the source is
+        opened on :meth:`start` and read continuously in the background until :meth:`stop`. Frames captured
+        while the microphone is muted are discarded, such that listening starts with the next captured frame.
+        In persistent mode multiple listeners can listen concurrently, each reading the buffered frames
+        independently, and listeners can start with a pre-roll of recently captured frames.
+
         Parameters
         ----------
         source: AudioSource
             The source of audio data
         resource_manager : ResourceManager
             Resource manager to manage access to the microphone resource
+        persistent : bool
+            Keep the audio source open across listen sessions
+        buffer_frames : int
+            In persistent mode, the number of frames buffered for a listener before frames are dropped
+        max_preroll_ms : int
+            In persistent mode, the duration in milliseconds of recent audio retained for a pre-roll of listeners
         """
         self._log = logger.getChild(self.__class__.__name__)
 
@@ -31,13 +68,31 @@ class SynchronizedMicrophone(Microphone):
         self._processor_scheduler = None
 
         self._source = source
-        # TODO
+        # Grace period for the holders of a lock before they are interrupted
         self._timeout_interval = 0.5 * source.frame_size / source.rate if source.frame_size and source.rate else 1
 
         self._source_audio = None
         self._audio_lock = None
         self._mic_lock = None
         self._interrupt = ThreadsafeBoolean(False)
+        # Serializes mute and unmute transitions between the listening thread and callers of mute
+        self._handoff = threading.Lock()
+        # Incremented on each mute, listeners end if the microphone was muted since they started
+        self._generation = 0
+        self._mute_requested = None
+
+        self._persistent = persistent
+        self._max_preroll_ms = max_preroll_ms
+        self._buffer_frames = buffer_frames
+        self._buffer = None
+        self._reader = None
+        self._dropped = Counter()
+        self._mute_time = Histogram()
+        self._unmute_time = Histogram()
+
+        self._listeners: Dict[str, _Listener] = {}
+        self._listeners_lock = threading.Lock()
+        self._listener_ids = itertools.count()
 
     def start(self):
         """
@@ -48,10 +103,35 @@ class SynchronizedMicrophone(Microphone):
         self._audio_lock = self._resource_manager.get_read_lock(AUDIO_RESOURCE_NAME)
         self._mic_lock = self._resource_manager.get_write_lock(MIC_RESOURCE_NAME)
 
+        if self._persistent:
+            self._source.__enter__()
+            # The frame size of the source may only be known after it was entered
+            self._buffer = FrameBuffer(self._buffer_frames + self._preroll_frames(self._max_preroll_ms))
+            self._reader = threading.Thread(name="cltl.backend.mic", target=self._read_source, daemon=True)
+            self._reader.start()
+
+    def _read_source(self):
+        try:
+            for frame in self._source:
+                if frame is None or self._buffer.closed:
+                    break
+                self._buffer.write(frame)
+        except Exception as e:
+            if not self._buffer.closed:
+                logger.exception("Failed to read from audio source: %s", e)
+        finally:
+            self._buffer.close()
+
     def stop(self):
         """
         Tear down resources for synchronization.
         """
+        if self._persistent and self._reader:
+            self._buffer.close()
+            self._source.__exit__(None, None, None)
+            self._reader.join(timeout=1)
+            self._reader = None
+
         if self._audio_lock.locked:
             self._audio_lock.release()
         if self._mic_lock.locked:
@@ -66,18 +146,53 @@ class SynchronizedMicrophone(Microphone):
 
     def mute(self) -> None:
         self._interrupt.value = True
-        while not self.muted:
-            self._try_mute()
+        self._mute()
 
     @property
     def muted(self) -> bool:
         return self._mic_lock.locked
 
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Metrics of the microphone: the number of frames dropped for slow listeners and the durations in seconds
+        of muting and unmuting the microphone, including the time waiting for other holders of the resources.
+
+        Metrics of the active listeners are listed by name under `listeners`: the number of frames received and,
+        in persistent mode, dropped and the number of buffered frames not yet read.
+        """
+        metrics = snapshot({"dropped_frames": self._dropped, "mute_time": self._mute_time,
+                            "unmute_time": self._unmute_time})
+        with self._listeners_lock:
+            metrics["listeners"] = {name: self._listener_metrics(listener)
+                                    for name, listener in self._listeners.items()}
+
+        return metrics
+
+    def _listener_metrics(self, listener: _Listener) -> Dict[str, int]:
+        metrics = {"frames": listener.frames.value}
+        if listener.cursor:
+            metrics.update(dropped=listener.cursor.dropped.value, lag=self._buffer.lag(listener.cursor))
+
+        return metrics
+
     @contextlib.contextmanager
-    def listen(self) -> Iterator[np.array]:
+    def listen(self, name: str = None, preroll_ms: int = 0) -> Iterator[np.array]:
         """
         Provide audio input from the microphone.
 
+        In persistent mode multiple listeners can listen concurrently, otherwise a :class:`ValueError` is raised
+        if the microphone is already in use. Muting the microphone ends all active listeners.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the listener in the metrics of the microphone, must be unique among active listeners
+        preroll_ms : int
+            In persistent mode, start with the audio captured up to `preroll_ms` milliseconds before listening
+            started, at most `max_preroll_ms`. The pre-roll may include audio captured while the microphone
+            was muted.
+
         To avoid interference with audio output we use the following strategy:
 
         * Mute the microphone whenever speakers are active
@@ -96,27 +211,180 @@ class SynchronizedMicrophone(Microphone):
               (speaker is active, mic is waiting to listen again)
             * when the AUDIO Reader-lock is acquired, it releases the MIC Writer-lock
               (speaker ends, listening starts again)
+
+        Transitions block on the locks instead of polling them. If a lock is not obtained within a grace period
+        of half a frame, its holders are interrupted. Listeners keep receiving audio until the microphone is
+        muted. In persistent mode they are woken up as soon as it is muted, otherwise the listener ends when the
+        next frame arrives.
         """
-        while self.muted:
-            self._try_unmute()
+        listener = self._add_listener(name, preroll_ms)
+        try:
+            self._unmute()
+            self._start_listening(listener, preroll_ms)
+
+            if self._persistent:
+                yield self._get_audio(self._buffered_audio(listener.cursor), listener), self.parameters
+            else:
+                with self._source as audio:
+                    yield self._get_audio(audio, listener), self.parameters
+        finally:
+            self._remove_listener(listener)
+
+    @contextlib.asynccontextmanager
+    async def listen_async(self, name: str = None,
+                           preroll_ms: int = 0) -> AsyncIterator[Tuple[AsyncIterator[np.array], AudioParameters]]:
+        """
+        Provide audio input from the microphone on an asyncio event loop.
+
+        Same as :meth:`listen`, but yields an asynchronous iterator over the audio frames. Blocking lock
+        operations run in the default executor of the event loop. Audio sources that are asynchronous context
+        managers and iterables are used directly, synchronous sources are read in the executor.
+        """
+        loop = asyncio.get_running_loop()
+        listener = self._add_listener(name, preroll_ms)
+        try:
+            await loop.run_in_executor(None, self._unmute)
+            self._start_listening(listener, preroll_ms)
+
+            if self._persistent:
+                yield self._get_audio_async(self._buffered_audio_async(listener.cursor), listener), self.parameters
+            elif hasattr(self._source, "__aenter__"):
+                async with self._source as audio:
+                    yield self._get_audio_async(audio.__aiter__(), listener), self.parameters
+            else:
+                audio = await loop.run_in_executor(None, self._source.__enter__)
+                try:
+                    yield self._get_audio_async(self._executor_audio(audio), listener), self.parameters
+                finally:
+                    await loop.run_in_executor(None, self._source.__exit__, None, None, None)
+        finally:
+            self._remove_listener(listener)
+
+    def _add_listener(self, name: Optional[str], preroll_ms: int) -> _Listener:
+        if preroll_ms and not self._persistent:
+            raise ValueError("Pre-roll is only supported by a persistent microphone")
+        if preroll_ms > self._max_preroll_ms:
+            raise ValueError(f"Pre-roll of {preroll_ms}ms exceeds the maximum of {self._max_preroll_ms}ms")
+
+        with self._listeners_lock:
+            if self._listeners and not self._persistent:
+                raise ValueError("Concurrent listeners are only supported by a persistent microphone")
 
-        with self._source as audio:
-            yield self._get_audio(audio), self.parameters
+            name = name if name is not None else f"listener-{next(self._listener_ids)}"
+            if name in self._listeners:
+                raise ValueError(f"Listener {name} is already listening")
+
+            listener = _Listener(name, self._buffer.cursor() if self._persistent else None)
+            self._listeners[name] = listener
+
+        return listener
+
+    def _start_listening(self, listener: _Listener, preroll_ms: int):
+        with self._handoff:
+            self._interrupt.value = False
+            listener.generation = self._generation
+            if listener.cursor:
+                # Discard frames captured while waiting to unmute, except for the pre-roll
+                listener.cursor.position = self._buffer.cursor(self._preroll_frames(preroll_ms)).position
+
+    def _preroll_frames(self, preroll_ms: int) -> int:
+        if not preroll_ms:
+            return 0
+
+        frame_ms = 1000 * self._source.frame_size / self._source.rate
+
+        return int(np.ceil(preroll_ms / frame_ms))
+
+    def _remove_listener(self, listener: _Listener):
+        with self._listeners_lock:
+            del self._listeners[listener.name]
+
+        if listener.cursor:
+            dropped = listener.cursor.dropped.value
+            self._dropped.inc(dropped)
+            if dropped:
+                logger.warning("Dropped %s frames while listening (%s)", dropped, listener.name)
+
+    async def _buffered_audio_async(self, cursor):
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await loop.run_in_executor(None, self._buffer.read, cursor, self._timeout_interval)
+            if frame is not None:
+                yield frame
+            elif self._buffer.closed and not self._buffer.lag(cursor):
+                yield None
+                return
+            elif self._interrupted:
+                yield _INTERRUPTED
 
-    def _get_audio(self, audio) -> Iterator[np.array]:
+    async def _executor_audio(self, audio):
+        loop = asyncio.get_running_loop()
+        audio_frames = iter(audio)
+        sentinel = object()
+        while True:
+            frame = await loop.run_in_executor(None, next, audio_frames, sentinel)
+            if frame is sentinel:
+                return
+            yield frame
+
+    async def _get_audio_async(self, audio, listener: _Listener) -> AsyncIterator[np.array]:
+        loop = asyncio.get_running_loop()
+        frame = False
+        while frame is not None:
+            if self._interrupted:
+                self._try_mute()
+
+            if self._is_listening(listener):
+                try:
+                    frame = await audio.__anext__()
+                except StopAsyncIteration:
+                    logger.warning("AudioSource stopped iteration without sentinel value")
+                    frame = None
+                if frame is _INTERRUPTED:
+                    continue
+                if frame is not None:
+                    listener.frames.inc()
+                yield frame
+            else:
+                yield None
+                return
+
+    def _buffered_audio(self, cursor):
+        while True:
+            frame = self._buffer.read(cursor, timeout=self._timeout_interval)
+            if frame is not None:
+                yield frame
+            elif self._buffer.closed and not self._buffer.lag(cursor):
+                yield None
+                return
+            elif self._interrupted:
+                yield _INTERRUPTED
+
+    def _get_audio(self, audio, listener: _Listener) -> Iterator[np.array]:
         frame = False
         audio_frames = iter(audio)
         while frame is not None:
-            if self._audio_lock.interrupted or self._interrupt.value:
+            if self._interrupted:
                 self._try_mute()
 
-            if not self.muted:
+            if self._is_listening(listener):
                 frame = self._next_frame(audio_frames)
+                if frame is _INTERRUPTED:
+                    continue
+                if frame is not None:
+                    listener.frames.inc()
                 yield frame
             else:
                 yield None
                 return
 
+    def _is_listening(self, listener: _Listener) -> bool:
+        return not self.muted and listener.generation == self._generation
+
+    @property
+    def _interrupted(self) -> bool:
+        return self._audio_lock.interrupted or self._interrupt.value
+
     def _next_frame(self, audio):
         try:
             return next(audio)
@@ -124,31 +392,92 @@ class SynchronizedMicrophone(Microphone):
             logger.warning("AudioSource stopped iteration without sentinel value")
             return None
 
-    def _try_unmute(self):
-        logger.debug("Try to unmute microphone")
-        if self._audio_lock.acquire(blocking=True, timeout=self._timeout_interval):
-            self._audio_lock.interrupt_writers(False)
-            if self._mic_lock.locked:
-                self._mic_lock.release()
-            logger.info("Microphone unmuted")
-            return True
+    def _unmute(self):
+        start = time.monotonic()
+        with self._handoff:
+            if not self.muted:
+                return
+
+            logger.debug("Unmute microphone")
+            self._acquire(self._audio_lock, self._audio_lock.interrupt_writers)
+            self._mic_lock.release()
+
+        self._unmute_time.observe(time.monotonic() - start)
+        logger.info("Microphone unmuted")
+
+    def _mute(self):
+        """
+        Mute the microphone, waiting until the MIC resource is released by its readers.
+        """
+        self._request_mute()
+        with self._handoff:
+            if self.muted:
+                return
 
-        self._audio_lock.interrupt_writers()
-        return False
+            logger.debug("Mute microphone")
+            self._acquire(self._mic_lock, self._mic_lock.interrupt_readers)
+            self._complete_mute()
 
     def _try_mute(self):
-        logger.debug("Try to mute microphone")
-        if self._mic_lock.acquire(blocking=True, timeout=self._timeout_interval):
-            self._mic_lock.interrupt_readers(False)
-            if self._audio_lock.locked:
-                self._audio_lock.release()
-            logger.info("Microphone muted")
-            return True
+        """
+        Mute the microphone if the MIC resource is available.
+
+        Used by listeners, which must not block while readers of the MIC resource wait for the remaining audio,
+        or while another thread is muting the microphone.
+        """
+        self._request_mute()
+        if not self._handoff.acquire(blocking=False):
+            return
+
+        try:
+            if self.muted:
+                return
+
+            if self._mic_lock.acquire(blocking=False):
+                self._mic_lock.interrupt_readers(False)
+                self._complete_mute()
+            else:
+                self._mic_lock.interrupt_readers()
+        finally:
+            self._handoff.release()
+
+    def _request_mute(self):
+        if self._mute_requested is None:
+            self._mute_requested = time.monotonic()
+
+    def _complete_mute(self):
+        if self._audio_lock.locked:
+            self._audio_lock.release()
+        self._generation += 1
+        if self._persistent:
+            # Wake up listeners waiting for frames to end them
+            self._buffer.wake()
+
+        self._mute_time.observe(time.monotonic() - self._mute_requested)
+        self._mute_requested = None
+        logger.info("Microphone muted")
+
+    def _acquire(self, lock, interrupt):
+        """
+        Acquire the lock, interrupting its holders if it is not acquired within the grace period.
+
+        Waiting is left to the lock. Acquisition is only refused early while the lock is interrupted by one of its
+        holders, in that case it is retried after the grace period.
+        """
+        while True:
+            start = time.monotonic()
+            if lock.acquire(blocking=True, timeout=self._timeout_interval):
+                interrupt(False)
+                return
+
+            interrupt()
 
-        self._mic_lock.interrupt_readers()
-        return False
+            remaining = self._timeout_interval - (time.monotonic() - start)
+            if remaining > 0:
+                time.sleep(remaining)
 
 
 class SimpleMicrophone(SynchronizedMicrophone):
-    def __init__(self, source: AudioSource):
-        super().__init__(source, ThreadedResourceManager())
+    def __init__(self, source: AudioSource, persistent: bool = False, buffer_frames: int = 32,
+                 max_preroll_ms: int = 0):
+        super().__init__(source, ThreadedResourceManager(), persistent, buffer_frames, max_preroll_ms)
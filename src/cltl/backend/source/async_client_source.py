@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import unquote, urlsplit, urlunsplit
+
+import aiohttp
+
+from cltl.backend.api.camera import Image, CameraResolution
+from cltl.backend.api.image_codec import IMAGE_MIME_TYPE, raw_to_image
+from cltl.backend.api.microphone import AudioFrame
+from cltl.backend.api.util import raw_frames_to_np, FRAME_HEADER
+from cltl.backend.source.client_source import audio_parameters, image_resolution, deserialize_image
+from cltl.backend.source.session import UNIX_SCHEME, resolve_storage_url
+
+logger = logging.getLogger(__name__)
+
+
+def _split_unix_url(url: str) -> Tuple[Optional[str], str]:
+    """The socket path and the HTTP URL on the socket for URLs with the Unix socket scheme."""
+    parts = urlsplit(url)
+    if parts.scheme != UNIX_SCHEME:
+        return None, url
+
+    return unquote(parts.netloc), urlunsplit(("http", "localhost", parts.path, parts.query, parts.fragment))
+
+
+class _AsyncClient:
+    def __init__(self, url: str, storage_url: str = None, session: aiohttp.ClientSession = None):
+        self._socket_path, self._url = _split_unix_url(resolve_storage_url(url, storage_url))
+        self._session = session
+        self._owns_session = session is None
+        self._active = False
+
+    async def _open_session(self):
+        if self._active:
+            raise ValueError("Client is already in use")
+        self._active = True
+
+        if self._owns_session:
+            connector = aiohttp.UnixConnector(path=self._socket_path) if self._socket_path else None
+            self._session = aiohttp.ClientSession(connector=connector)
+
+    async def _close_session(self):
+        self._active = False
+        if self._owns_session and self._session:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncClientAudioSource(_AsyncClient):
+    def __init__(self, url: str, storage_url: str = None, offset: int = 0, length: int = -1,
+                 timestamps: bool = False, session: aiohttp.ClientSession = None):
+        """
+        Asynchronous audio source reading audio from a backend server or the audio storage.
+
+        Use as async context manager and iterate asynchronously over the frames, many sources can be read
+        concurrently on a single event loop.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the audio stream
+        storage_url : str, optional
+            The URL of the storage service, used to resolve `cltl-storage:` URLs
+        offset : int
+            The index of the first sample to request
+        length : int
+            The number of samples to request, -1 for all
+        timestamps : bool
+            Request capture timestamps and sequence numbers for each frame from the server. Otherwise, or if the
+            server does not provide them, frames are timestamped on reception.
+        session : aiohttp.ClientSession, optional
+            Session to share connections with other sources, by default a session is created per context. For
+            URLs on a Unix domain socket the session must use a :class:`aiohttp.UnixConnector` for the socket.
+        """
+        super().__init__(url, storage_url, session)
+        self._offset = offset
+        self._length = length
+        self._timestamps = timestamps
+        self._response = None
+        self._parameters = None
+
+    async def __aenter__(self):
+        await self._open_session()
+
+        params = dict()
+        if self._offset or self._length > 0:
+            params.update({"offset": self._offset, "length": self._length})
+        if self._timestamps:
+            params["timestamps"] = "true"
+
+        try:
+            self._response = await self._session.get(self._url, params=params)
+            if self._response.status != 200:
+                text = await self._response.text()
+                raise ValueError(f"Requests to {self._url} with {params} failed ({self._response.status}): {text}")
+
+            self._parameters = audio_parameters(self._response.headers['Content-Type'])
+        except:
+            await self.__aexit__(None, None, None)
+            raise
+
+        logger.debug("Connected to backend at %s (%s)", self._url, self._parameters)
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+        await self._close_session()
+
+    def __aiter__(self):
+        return self.audio
+
+    @property
+    def audio(self) -> AsyncIterator[AudioFrame]:
+        return self._frames()
+
+    async def _frames(self):
+        chunk_size = self._parameters.bytes_per_frame
+        if self._parameters.timestamps:
+            chunk_size += FRAME_HEADER.size
+
+        sequence = 0
+        while True:
+            try:
+                chunk = await self._response.content.readexactly(chunk_size)
+            except asyncio.IncompleteReadError:
+                return
+
+            frame = next(iter(raw_frames_to_np([chunk], self.frame_size, self.channels, self.depth,
+                                               timestamps=self._parameters.timestamps)))
+            if not self._parameters.timestamps:
+                frame = AudioFrame(frame, time.time(), sequence)
+            sequence += 1
+
+            yield frame
+
+    @property
+    def rate(self):
+        return self._parameters.rate if self._parameters else None
+
+    @property
+    def channels(self):
+        return self._parameters.channels if self._parameters else None
+
+    @property
+    def frame_size(self):
+        return self._parameters.frame_size if self._parameters else None
+
+    @property
+    def bytes_per_frame(self):
+        return self._parameters.bytes_per_frame if self._parameters else None
+
+    @property
+    def depth(self):
+        return self._parameters.depth if self._parameters else None
+
+
+class AsyncClientImageSource(_AsyncClient):
+    def __init__(self, url: str, storage_url: str = None, session: aiohttp.ClientSession = None):
+        """
+        Asynchronous image source reading images from a backend server or the image storage.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the images
+        storage_url : str, optional
+            The URL of the storage service, used to resolve `cltl-storage:` URLs
+        session : aiohttp.ClientSession, optional
+            Session to share connections with other sources, by default a session is created per context. For
+            URLs on a Unix domain socket the session must use a :class:`aiohttp.UnixConnector` for the socket.
+        """
+        super().__init__(url, storage_url, session)
+        self._image = None
+
+    async def __aenter__(self):
+        await self._open_session()
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._image = None
+        await self._close_session()
+
+    async def resolution(self) -> CameraResolution:
+        if not self._active:
+            raise ValueError("Called outside context")
+
+        if self._image:
+            return self._image.resolution
+
+        async with self._session.head(self._url) as response:
+            return image_resolution(response.headers['Content-Type'])
+
+    async def capture(self) -> Image:
+        headers = {"Accept": f"{IMAGE_MIME_TYPE}, application/json"}
+        async with self._session.get(self._url, headers=headers) as response:
+            if response.status != 200:
+                text = await response.text()
+                raise ValueError(f"Requests to {self._url} failed ({response.status}): {text}")
+
+            if response.headers.get('Content-Type', '').startswith(IMAGE_MIME_TYPE):
+                self._image = raw_to_image(bytearray(await response.read()))
+            else:
+                self._image = deserialize_image(await response.json(content_type=None))
+
+        return self._image
+
+    def __aiter__(self):
+        return self.images()
+
+    async def images(self, interval: float = 0.0) -> AsyncIterator[Image]:
+        """
+        Capture images continuously, with at least `interval` seconds between the start of two captures.
+        """
+        while True:
+            start = time.monotonic()
+            yield await self.capture()
+
+            delay = interval - (time.monotonic() - start)
+            await asyncio.sleep(max(0.0, delay))
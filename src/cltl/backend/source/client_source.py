@@ -1,20 +1,26 @@
 import json
 import logging
+import math
 import re
+import threading
+import time
 from types import SimpleNamespace
-from typing import Any
-from urllib.parse import urljoin
+from typing import Any, Dict, List, Tuple, Iterator
 
 import numpy as np
 import requests
+import urllib3
 from cltl.combot.infra.config import ConfigurationManager
 from emissor.representation.scenario import Modality
 from flask import Response
-from requests.adapters import HTTPAdapter, BaseAdapter
 
 from cltl.backend.api.camera import Image, CameraResolution, Bounds
-from cltl.backend.api.storage import STORAGE_SCHEME
-from cltl.backend.api.util import raw_frames_to_np, bytes_per_frame
+from cltl.backend.api.image_codec import IMAGE_MIME_TYPE, raw_to_image
+from cltl.backend.api.metrics import Counter, Histogram, snapshot
+from cltl.backend.api.microphone import AudioFrame
+from cltl.backend.api.util import bytes_per_frame, raw_batch_to_np, FRAME_HEADER
+from cltl.backend.source.local_transport import local_audio_storage, local_image_storage, parse_storage_url
+from cltl.backend.source.session import CltlAudioAdapter, SessionPool, session_pool
 from cltl.backend.spi.audio import AudioSource
 from cltl.backend.spi.image import ImageSource
 
@@ -22,28 +28,51 @@ logger = logging.getLogger(__name__)
 
 
 CONTENT_TYPE_SEPARATOR = ';'
+_AUDIO_PARAMETERS = {'rate', 'channels', 'frame_size'}
+_STREAM_ERRORS = (requests.RequestException, urllib3.exceptions.HTTPError)
 
 
-# TODO Rename to CltlStorageAdapter
-class CltlAudioAdapter(BaseAdapter):
-    """"Transport adapter" to support cltl-storage:// schema."""
-    def __init__(self, storage_url):
-        super().__init__()
-        self._storage_url = storage_url
-        self._http_adapter = HTTPAdapter()
+def audio_parameters(content_type: str) -> SimpleNamespace:
+    """
+    Parse the audio parameters from the content type of an audio stream.
 
-    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
-        storage_request = request.copy()
+    Raises
+    ------
+    ValueError
+        If the content type is not 16 bit audio with rate, channels and frame size parameters.
+    """
+    content_type = content_type.split(CONTENT_TYPE_SEPARATOR)
+    content_parameters = {p.split('=')[0].strip(): int(p.split('=')[1].strip()) for p in content_type[1:]}
+    if not content_type[0].strip() == 'audio/L16' or not _AUDIO_PARAMETERS.issubset(content_parameters):
+        # Only support 16bit audio for now
+        raise ValueError(f"Unsupported content type {content_type[0]}, "
+                         "expected audio/L16 with rate, channels and frame_size paramters")
 
-        path = storage_request.url.split(f"{STORAGE_SCHEME}:")[1]
-        storage_request.url = urljoin(self._storage_url, path)
+    parameters = SimpleNamespace(**content_parameters)
+    parameters.timestamps = bool(content_parameters.get('timestamps', 0))
+    parameters.depth = 2
+    parameters.bytes_per_frame = bytes_per_frame(parameters.frame_size, parameters.channels, parameters.depth)
 
-        logger.debug("Resolve %s to %s", request.url, storage_request.url)
+    return parameters
 
-        return self._http_adapter.send(storage_request, stream, timeout, verify, cert, proxies)
 
-    def close(self):
-        self._http_adapter.close()
+def image_resolution(content_type: str) -> CameraResolution:
+    """
+    Parse the resolution from the content type of an image.
+    """
+    resolution_match = re.search(r'resolution\s*=\s*(\w+)\s*[;]?', content_type)
+    if not resolution_match:
+        raise ValueError("Resolution unknown, capture image first")
+
+    return CameraResolution[resolution_match.group(1)]
+
+
+def deserialize_image(json_data: Any) -> Image:
+    image = np.array(json_data['image'])
+    bounds = Bounds(**json_data['bounds'])
+    depth = np.array(json_data['depth']) if 'depth' in json_data and json_data['depth'] else None
+
+    return Image(image, bounds, depth)
 
 
 class ClientAudioSource(AudioSource):
@@ -54,77 +83,356 @@ class ClientAudioSource(AudioSource):
         url = url if url else f"{backend_config.get('server_url')}/{Modality.AUDIO.name.lower()}"
         storage_url = backend_config.get('storage_url')
 
-        return cls(url, f"{storage_url}", offset, length)
-
-    def __init__(self, url: str, storage_url: str = None, offset: int = 0, length: int = -1):
+        options = {}
+        if "read_timeout" in backend_config:
+            options["read_timeout"] = backend_config.get_float("read_timeout")
+        if "max_reconnects" in backend_config:
+            options["max_reconnects"] = backend_config.get_int("max_reconnects")
+        if "audio_timestamps" in backend_config:
+            options["timestamps"] = backend_config.get_boolean("audio_timestamps")
+
+        return cls(url, f"{storage_url}", offset, length, session_pool=session_pool(config_manager), **options)
+
+    def __init__(self, url: str, storage_url: str = None, offset: int = 0, length: int = -1,
+                 timestamps: bool = False, read_timeout: float = 2.0, max_reconnects: int = 5,
+                 backoff: float = 0.05, max_backoff: float = 1.0, session_pool: SessionPool = None,
+                 read_size: int = 65536):
+        """
+        Audio source reading audio from a backend server or the audio storage.
+
+        `cltl-storage:` URLs are resolved against the in-process audio storage if one is registered in
+        :mod:`cltl.backend.source.local_transport`, in that case the stored frames are returned directly. Audio
+        not held by the local storage is retrieved from the storage service.
+
+        If the stream stalls or drops, the source reconnects with exponential backoff. Streams from the audio
+        storage are resumed at the sample following the last received frame, live streams from the backend
+        server are continued and the samples missed during the reconnect are reported as gap.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the audio stream
+        storage_url : str, optional
+            The URL of the storage service, used to resolve `cltl-storage:` URLs
+        offset : int
+            The index of the first sample to request
+        length : int
+            The number of samples to request, -1 for all
+        timestamps : bool
+            Request capture timestamps and sequence numbers for each frame from the server. Otherwise, or if the
+            server does not provide them, frames are timestamped on reception.
+        read_timeout : float, optional
+            Seconds without data after which the stream is considered stalled, None to wait indefinitely
+        max_reconnects : int
+            Maximum number of consecutive failed connection attempts before iteration ends, 0 to disable
+            reconnects
+        backoff : float
+            Delay in seconds before the first reconnect, doubled on each consecutive failure
+        max_backoff : float
+            Maximum delay in seconds between reconnects
+        session_pool : SessionPool, optional
+            Pool of HTTP connections to use, defaults to the process-wide pool
+        read_size : int
+            Maximum number of bytes read from the network at once, frames are views on the data read
+        """
         self._url = url
         self._storage_url = storage_url
         self._length = length
         self._offset = offset
+        self._timestamps = timestamps
+        self._read_timeout = read_timeout
+        self._max_reconnects = max_reconnects
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._read_size = read_size
+        self._session_pool = session_pool
+        self._session = None
         self._request = None
+        self._local_audio = None
         self._parameters = None
-        self._iter = None
+        self._resumable = False
+
+        self._received = 0
+        self._last_frame_end = None
+        self._last_sequence = None
+        self._sequence_offset = 0
+        self._local_sequence = 0
+        self._resumed = False
+
+        self._reconnects = Counter()
+        self._gap_samples = Counter()
+        self._gaps = []
 
     def connect(self):
         self.__enter__()
 
     def __enter__(self):
-        if self._request is not None:
+        if self._session is not None or self._local_audio is not None:
             raise ValueError("Client is already in use")
 
-        session = requests.session()
-        if self._storage_url:
-            session.mount(f"{STORAGE_SCHEME}:", CltlAudioAdapter(self._storage_url))
+        storage = local_audio_storage(self._url)
+        if storage is not None and self._connect_local(storage):
+            return self
+
+        self._session = (self._session_pool or session_pool()).session(self._storage_url)
+
+        self._received = 0
+        self._last_frame_end = None
+        self._last_sequence = None
+        self._sequence_offset = 0
+        self._local_sequence = 0
+        self._resumed = False
+        self._gaps = []
 
-        has_parameters = self._offset or self._length > 0
-        params = None
+        try:
+            self._connect()
+        except:
+            self._session.close()
+            self._session = None
+            raise
+
+        return self
+
+    def _connect(self):
+        params = dict()
+        offset = self._offset + (self._received if self._resumable else 0)
+        length = self._length - self._received if self._length > 0 else self._length
+        if offset or length > 0:
+            params.update({"offset": offset, "length": length})
+        if self._timestamps:
+            params["timestamps"] = "true"
         url = self._url
-        if has_parameters:
-            params = {"offset": self._offset, "length": self._length}
+        if params:
             url += "?" + '&'.join(['%s=%s' % (key, value) for (key, value) in params.items()])
-        self._request = session.get(url, stream=True).__enter__()
+        self._request = self._session.get(url, stream=True, timeout=(None, self._read_timeout)).__enter__()
         if self._request.status_code != 200:
             code = self._request.status_code
             text = self._request.text
-            self._request.close()
-            self._request = None
+            self._close_request()
             raise ValueError(f"Requests to {self._url} with {params} failed ({code}): {text}")
 
+        try:
+            parameters = audio_parameters(self._request.headers['content-type'])
+        except ValueError:
+            self._close_request()
+            raise
 
-        content_type = self._request.headers['content-type'].split(CONTENT_TYPE_SEPARATOR)
-        if not content_type[0].strip() == 'audio/L16' or len(content_type) != 4:
-            # Only support 16bit audio for now
-            self._request.close()
-            self._request = None
-            raise ValueError(f"Unsupported content type {content_type[0]}, "
-                             "expected audio/L16 with rate, channels and frame_size paramters")
+        if self._parameters and any(getattr(self._parameters, key) != getattr(parameters, key)
+                                    for key in _AUDIO_PARAMETERS):
+            self._close_request()
+            raise ValueError(f"Audio parameters of {self._url} changed on reconnect: {parameters}")
 
-        self._parameters = SimpleNamespace(**{p.split('=')[0].strip(): int(p.split('=')[1].strip())
-                                              for p in content_type[1:]})
-        self._parameters.depth = 2
-        self._parameters.bytes_per_frame = bytes_per_frame(self._parameters.frame_size,
-                                                           self._parameters.channels,
-                                                           self._parameters.depth)
+        self._parameters = parameters
+        # Only the storage reports the offset of the stream and can resume at a given sample
+        self._resumable = hasattr(parameters, 'offset')
 
-        logger.debug("Connected to backend at %s (%s, %s)", self._url, content_type[0], self._parameters)
+        logger.debug("Connected to backend at %s (%s)", self._url, self._parameters)
 
-        return self
+    def _connect_local(self, storage) -> bool:
+        _, audio_id, _ = parse_storage_url(self._url)
+        try:
+            audio, parameters = storage.get(audio_id, offset=self._offset, length=self._length)
+        except (KeyError, OSError) as e:
+            logger.debug("Failed to retrieve %s from local storage, retrieve it from %s: %s",
+                         self._url, self._storage_url, e)
+            return False
+
+        self._local_audio = audio
+        self._parameters = SimpleNamespace(rate=parameters.sampling_rate, channels=parameters.channels,
+                                           frame_size=parameters.frame_size, depth=parameters.sample_width,
+                                           timestamps=True)
+        self._parameters.bytes_per_frame = bytes_per_frame(parameters.frame_size, parameters.channels,
+                                                           parameters.sample_width)
+
+        logger.debug("Connected to local storage for %s (%s)", self._url, self._parameters)
+
+        return True
+
+    def _close_request(self):
+        if self._request is not None:
+            try:
+                self._request.close()
+            finally:
+                self._request = None
 
     def close(self):
         self.__exit__(None, None, None)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._iter = None
-        self._request.__exit__(exc_type, exc_val, exc_tb)
-        self._request = None
+        if self._local_audio is not None:
+            if hasattr(self._local_audio, "close"):
+                self._local_audio.close()
+            self._local_audio = None
+        self._close_request()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    @property
+    def audio(self) -> Iterator[AudioFrame]:
+        if self._local_audio is not None:
+            return iter(self._local_audio)
+
+        return self._with_reconnect(self._frames)
+
+    def batches(self, max_frames: int = None) -> Iterator[AudioFrame]:
+        """
+        Iterate over the audio in batches of consecutive frames as they arrive from the network.
+
+        Each batch is a single array of shape (samples, channels) with the capture timestamp and sequence
+        number of its first frame. Batches contain a whole number of frames and are split at gaps in the
+        sequence numbers.
+
+        Parameters
+        ----------
+        max_frames : int, optional
+            The maximum number of frames per batch
+        """
+        if self._local_audio is not None:
+            # Frames from the local storage are delivered as they are stored
+            return iter(self._local_audio)
+
+        return self._with_reconnect(lambda: self._batches(max_frames))
+
+    def _with_reconnect(self, stream):
+        failures = 0
+        while True:
+            if self._request is None:
+                try:
+                    self._connect()
+                    self._reconnects.inc()
+                    self._resumed = True
+                    logger.info("Reconnected to %s after %s attempt(s)", self._url, failures)
+                except (requests.RequestException, ValueError) as e:
+                    logger.warning("Failed to reconnect to %s: %s", self._url, e)
+                    failures += 1
+                    if not self._wait_for_reconnect(failures):
+                        return
+                    continue
+
+            try:
+                for frame in stream():
+                    failures = 0
+                    yield self._track(frame)
+
+                if self._resumable or self._length > 0 or not self._max_reconnects:
+                    return
+                logger.warning("Audio stream from %s ended", self._url)
+            except _STREAM_ERRORS as e:
+                logger.warning("Audio stream from %s interrupted: %s", self._url, e)
+                if not self._max_reconnects:
+                    raise
+
+            self._close_request()
+            failures += 1
+            if not self._wait_for_reconnect(failures):
+                return
+
+    def _raw_batches(self) -> Iterator[memoryview]:
+        """
+        Read the stream in large network reads and yield buffers containing one or more whole frames.
+        """
+        chunk_size = self._parameters.bytes_per_frame
+        if self._parameters.timestamps:
+            chunk_size += FRAME_HEADER.size
+
+        raw = self._request.raw
+        if hasattr(raw, "read1"):
+            # Return the data available, up to read_size, instead of waiting for a full read
+            read, read_size = raw.read1, max(self._read_size, chunk_size)
+        else:
+            read, read_size = raw.read, chunk_size
+
+        pending = b''
+        while True:
+            data = read(read_size)
+            if not data:
+                # Drop an incomplete last frame of an interrupted stream
+                return
+            if pending:
+                data = pending + data
+
+            complete = len(data) - len(data) % chunk_size
+            pending = data[complete:]
+            if complete:
+                yield memoryview(data)[:complete]
+
+    def _decoded_batches(self) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        for data in self._raw_batches():
+            frames, timestamps, sequences = raw_batch_to_np(data, self.frame_size, self.channels, self.depth,
+                                                            timestamps=self._parameters.timestamps)
+            if not self._parameters.timestamps:
+                # Timestamp on reception, assuming the last frame was just captured
+                count = len(frames)
+                frame_duration = self.frame_size / self.rate
+                timestamps = time.time() - frame_duration * np.arange(count - 1, -1, -1)
+                sequences = self._local_sequence + np.arange(count)
+                self._local_sequence += count
+
+            yield frames, timestamps, sequences
+
+    def _frames(self) -> Iterator[AudioFrame]:
+        for frames, timestamps, sequences in self._decoded_batches():
+            for frame, timestamp, sequence in zip(frames, timestamps.tolist(), sequences.tolist()):
+                yield AudioFrame(frame, None if math.isnan(timestamp) else timestamp, sequence)
+
+    def _batches(self, max_frames: int = None) -> Iterator[AudioFrame]:
+        for frames, timestamps, sequences in self._decoded_batches():
+            splits = np.flatnonzero(np.diff(sequences.astype(np.int64)) != 1) + 1
+            if max_frames:
+                splits = np.union1d(splits, np.arange(max_frames, len(frames), max_frames))
+
+            for start, end in zip(np.concatenate(([0], splits)), np.concatenate((splits, [len(frames)]))):
+                timestamp = float(timestamps[start])
+                batch = frames[start:end].reshape((-1, self.channels))
+                yield AudioFrame(batch, None if math.isnan(timestamp) else timestamp, int(sequences[start]))
+
+    def _wait_for_reconnect(self, failures: int) -> bool:
+        if failures > self._max_reconnects:
+            logger.error("Giving up to reconnect to %s after %s attempts", self._url, failures - 1)
+            return False
+
+        time.sleep(min(self._max_backoff, self._backoff * 2 ** (failures - 1)))
+
+        return True
+
+    def _track(self, frame: AudioFrame) -> AudioFrame:
+        if self._resumed:
+            self._resumed = False
+            gap = 0
+            if not self._resumable and self._last_frame_end is not None and frame.timestamp is not None:
+                gap = max(0, int(round((frame.timestamp - self._last_frame_end) * self.rate)))
+            if gap:
+                self._gaps.append((self._received, gap))
+                self._gap_samples.inc(gap)
+                logger.warning("Missed %s samples of %s at sample %s while reconnecting",
+                               gap, self._url, self._received)
+            if frame.sequence is not None and self._last_sequence is not None:
+                # Continue the sequence across connections, skipping the missed frames. Resumed streams from
+                # the storage continue at the next frame, but may number the frames from the resume offset.
+                missed = int(round(gap / self.frame_size))
+                self._sequence_offset = self._last_sequence + 1 + missed - frame.sequence
+
+        if frame.sequence is not None:
+            frame.sequence += self._sequence_offset
+            self._last_sequence = frame.sequence + len(frame) // self.frame_size - 1
+        if frame.timestamp is not None:
+            self._last_frame_end = frame.timestamp + len(frame) / self.rate
+        self._received += len(frame)
+
+        return frame
 
     @property
-    def content(self):
-        return self._request.iter_content(self._parameters.bytes_per_frame)
+    def gaps(self) -> List[Tuple[int, int]]:
+        """
+        Gaps in the received audio as tuples of the position in the received samples and the number of missed
+        samples.
+        """
+        return list(self._gaps)
 
     @property
-    def audio(self):
-        return raw_frames_to_np(self.content, self.frame_size, self.channels, self.depth)
+    def metrics(self) -> Dict[str, Any]:
+        return snapshot({"reconnects": self._reconnects, "gap_samples": self._gap_samples})
 
     @property
     def rate(self):
@@ -155,24 +463,90 @@ class ClientImageSource(ImageSource):
         url = url if url else f"{backend_config.get('server_url')}/{Modality.VIDEO.name.lower()}"
         storage_url = backend_config.get('storage_url')
 
-        return cls(url, f"{storage_url}")
-
-    def __init__(self, url: str, storage_url: str = None):
+        options = {}
+        if "image_prefetch" in backend_config:
+            options["prefetch"] = backend_config.get_boolean("image_prefetch")
+        if "image_binary" in backend_config:
+            options["binary"] = backend_config.get_boolean("image_binary")
+        if "image_max_age" in backend_config:
+            options["max_age"] = backend_config.get_float("image_max_age")
+
+        return cls(url, f"{storage_url}", session_pool(config_manager), **options)
+
+    def __init__(self, url: str, storage_url: str = None, session_pool: SessionPool = None,
+                 prefetch: bool = False, max_age: float = None, timeout: float = 10.0, binary: bool = True):
+        """
+        Image source reading images from a backend server or the image storage.
+
+        `cltl-storage:` URLs are resolved against the in-process image storage if one is registered in
+        :mod:`cltl.backend.source.local_transport`. Images not held by the local storage are retrieved from the
+        storage service.
+
+        In prefetch mode a background worker retrieves images ahead of :meth:`capture`, such that it returns
+        the most recently retrieved image without waiting for a network round trip. The worker retrieves the next
+        image once the previous one was returned, or, if `max_age` is set, once it is outdated.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the images
+        storage_url : str, optional
+            The URL of the storage service, used to resolve `cltl-storage:` URLs
+        session_pool : SessionPool, optional
+            Pool of HTTP connections to use, defaults to the process-wide pool
+        prefetch : bool
+            Retrieve images in the background
+        max_age : float, optional
+            In prefetch mode, the maximum age in seconds of an image returned from :meth:`capture`, measured
+            from the time its request was sent. If the latest image is older, :meth:`capture` waits for the
+            next one. By default the latest image is returned regardless of its age.
+        timeout : float
+            In prefetch mode, the maximum time in seconds :meth:`capture` waits for an image
+        binary : bool
+            Request images in binary representation instead of JSON, servers that do not support it respond
+            with JSON
+        """
         self._url = url
         self._storage_url = storage_url
+        self._session_pool = session_pool
         self._session = None
+        self._local_storage = None
         self._image = None
 
+        self._binary = binary
+        self._prefetch = prefetch
+        self._max_age = max_age
+        self._timeout = timeout
+        self._worker = None
+        self._running = False
+        self._latest = None
+        self._pending = False
+        self._error = None
+        self._available = threading.Condition()
+
+        self._frame_age = Histogram()
+        self._fetched = Counter()
+        self._stale = Counter()
+        self._errors = Counter()
+
     def connect(self):
         self.__enter__()
 
     def __enter__(self):
-        if self._image is not None:
+        if self._session is not None:
             raise ValueError("Client is already in use")
 
-        self._session = requests.session().__enter__()
-        if self._storage_url:
-            self._session.mount(f"{STORAGE_SCHEME}:", CltlAudioAdapter(self._storage_url))
+        self._session = (self._session_pool or session_pool()).session(self._storage_url)
+        self._local_storage = local_image_storage(self._url)
+
+        if self._prefetch and self._local_storage is None:
+            self._latest = None
+            self._pending = False
+            self._error = None
+            self._running = True
+            self._worker = threading.Thread(name="cltl.backend.image_prefetch", target=self._run_prefetch,
+                                            daemon=True)
+            self._worker.start()
 
         return self
 
@@ -180,32 +554,57 @@ class ClientImageSource(ImageSource):
         self.__exit__(None, None, None)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._session.__exit__(self, exc_type, exc_val, exc_tb)
+        if self._worker:
+            with self._available:
+                self._running = False
+                self._available.notify_all()
+            self._worker.join(timeout=self._timeout)
+            self._worker = None
+
+        self._session.close()
         self._session = None
+        self._local_storage = None
         self._image = None
+        self._latest = None
 
     @property
     def resolution(self) -> CameraResolution:
         if not self._session:
             raise ValueError("Called outside context")
 
-        if not self._image:
+        if not self._image and self._local_storage is None:
             return self._query_resolution()
+        if not self._image:
+            return self.capture().resolution
 
         return self._image.resolution
 
     def _query_resolution(self):
         with self._session.head(self._url) as request:
-            mime_type = request.headers['Content-Type']
+            return image_resolution(request.headers['Content-Type'])
 
-        resolution_match = re.search(r'resolution\s*=\s*(\w+)\s*[;]?', mime_type)
-        if not resolution_match:
-            raise ValueError("Resolution unknown, capture image first")
+    def capture(self) -> Image:
+        if self._local_storage is not None:
+            _, image_id, parameters = parse_storage_url(self._url)
+            resolution = CameraResolution[parameters["resolution"].upper()] if "resolution" in parameters else None
+            try:
+                self._image = self._local_storage.get(image_id, resolution=resolution)
 
-        return CameraResolution[resolution_match.group(1)]
+                return self._image
+            except (KeyError, OSError) as e:
+                logger.debug("Failed to retrieve %s from local storage, retrieve it from %s: %s",
+                             self._url, self._storage_url, e)
 
-    def capture(self) -> Image:
-        with self._session.get(self._url, stream=True) as request:
+        if self._prefetch and self._worker is not None:
+            return self._capture_prefetched()
+
+        self._image = self._fetch(self._session)
+
+        return self._image
+
+    def _fetch(self, session) -> Image:
+        headers = {"Accept": f"{IMAGE_MIME_TYPE}, application/json"} if self._binary else None
+        with session.get(self._url, stream=True, headers=headers) as request:
             if request.status_code != 200:
                 code = request.status_code
                 text = request.text
@@ -213,14 +612,85 @@ class ClientImageSource(ImageSource):
 
             logger.debug("Connected to backend at %s", self._url)
 
-            self._image = self._deserialize(request.json())
+            if request.headers.get('Content-Type', '').startswith(IMAGE_MIME_TYPE):
+                return raw_to_image(self._read_content(request))
+
+            return deserialize_image(request.json())
+
+    @staticmethod
+    def _read_content(request) -> bytearray:
+        if 'Content-Length' not in request.headers:
+            return bytearray(request.content)
+
+        # Read directly into a writable buffer, the image arrays are views on it
+        content = bytearray(int(request.headers['Content-Length']))
+        view = memoryview(content)
+        position = 0
+        while position < len(content):
+            read = request.raw.readinto(view[position:])
+            if not read:
+                raise ValueError(f"Incomplete image from {request.url}")
+            position += read
+
+        return content
+
+    def _run_prefetch(self):
+        # Sessions are not shared between threads
+        session = (self._session_pool or session_pool()).session(self._storage_url)
+        try:
+            while self._running:
+                requested = time.monotonic()
+                try:
+                    image = self._fetch(session)
+                    error = None
+                    self._fetched.inc()
+                except Exception as e:
+                    image = None
+                    error = e
+                    self._errors.inc()
+                    logger.warning("Failed to prefetch image from %s: %s", self._url, e)
+
+                with self._available:
+                    if image is not None:
+                        self._latest = (image, requested)
+                        self._pending = True
+                    self._error = error
+                    self._available.notify_all()
+                    if error is not None:
+                        # Back off before retrying
+                        self._available.wait(0.1)
+                    else:
+                        # Stay at most one image ahead of capture(), refresh the image when it is outdated
+                        timeout = None if self._max_age is None else requested + self._max_age - time.monotonic()
+                        self._available.wait_for(lambda: not self._running or not self._pending, timeout)
+        finally:
+            session.close()
+
+    def _capture_prefetched(self) -> Image:
+        def fresh():
+            return self._latest is not None and (self._max_age is None
+                                                 or time.monotonic() - self._latest[1] <= self._max_age)
+
+        with self._available:
+            if not fresh() and self._latest is not None:
+                self._stale.inc()
+            if not self._available.wait_for(fresh, self._timeout):
+                raise ValueError(f"No image from {self._url} within {self._timeout} seconds"
+                                 + (f" ({self._error})" if self._error else ""))
+
+            self._image, requested = self._latest
+            self._pending = False
+            self._available.notify_all()
+
+        self._frame_age.observe(time.monotonic() - requested)
 
         return self._image
 
-    # TODO centralize
-    def _deserialize(self, json_data: Any) -> Image:
-        image = np.array(json_data['image'])
-        bounds = Bounds(**json_data['bounds'])
-        depth = np.array(json_data['depth']) if 'depth' in json_data and json_data['depth'] else None
-
-        return Image(image, bounds, depth)
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Metrics of the prefetch mode: the age of returned images in seconds, the number of prefetched images,
+        of captures that had to wait for a fresh image and of failed requests.
+        """
+        return snapshot({"frame_age": self._frame_age, "fetched": self._fetched, "stale": self._stale,
+                         "errors": self._errors})
@@ -0,0 +1,90 @@
+"""
+In-process transport for `cltl-storage:` URLs.
+
+If the storage lives in the same process as its consumers, it can be registered with :func:`register_storage`.
+Client sources then resolve `cltl-storage:` URLs directly against the registered storage and receive the stored
+numpy arrays without HTTP transfer and serialization. Without registered storage, or if the registered storage
+does not hold the requested id, they fall back to HTTP.
+"""
+import logging
+import threading
+from typing import Optional, Tuple, Dict
+from urllib.parse import urlsplit, parse_qs
+
+from emissor.representation.scenario import Modality
+
+from cltl.backend.api.storage import AudioStorage, ImageStorage, STORAGE_SCHEME
+
+logger = logging.getLogger(__name__)
+
+
+_lock = threading.Lock()
+_audio_storage: Optional[AudioStorage] = None
+_image_storage: Optional[ImageStorage] = None
+
+
+def register_storage(audio_storage: AudioStorage = None, image_storage: ImageStorage = None):
+    """
+    Register in-process storage to resolve `cltl-storage:` URLs against.
+    """
+    global _audio_storage, _image_storage
+    with _lock:
+        if audio_storage is not None:
+            _audio_storage = audio_storage
+        if image_storage is not None:
+            _image_storage = image_storage
+
+    logger.info("Registered local storage (audio: %s, image: %s)", audio_storage, image_storage)
+
+
+def unregister_storage():
+    global _audio_storage, _image_storage
+    with _lock:
+        _audio_storage = None
+        _image_storage = None
+
+
+def local_audio_storage(url: str) -> Optional[AudioStorage]:
+    """
+    The registered audio storage if `url` is a `cltl-storage:` URL for audio, otherwise `None`.
+    """
+    return _audio_storage if _is_storage_url(url, Modality.AUDIO) else None
+
+
+def local_image_storage(url: str) -> Optional[ImageStorage]:
+    """
+    The registered image storage if `url` is a `cltl-storage:` URL for images, otherwise `None`.
+    """
+    return _image_storage if _is_storage_url(url, Modality.VIDEO) else None
+
+
+def parse_storage_url(url: str) -> Tuple[Modality, str, Dict[str, str]]:
+    """
+    Parse a `cltl-storage:` URL of the form `cltl-storage:<modality>/<id>[?<parameters>]`.
+
+    Returns
+    -------
+    Tuple[Modality, str, Dict[str, str]]
+        The modality, the identifier and the query parameters of the URL.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != STORAGE_SCHEME:
+        raise ValueError(f"Not a {STORAGE_SCHEME} URL: {url}")
+
+    path = parts.path.strip("/").split("/")
+    if len(path) != 2 or path[0].upper() not in Modality.__members__:
+        raise ValueError(f"Invalid {STORAGE_SCHEME} URL: {url}")
+
+    parameters = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+    return Modality[path[0].upper()], path[1], parameters
+
+
+def _is_storage_url(url: str, modality: Modality) -> bool:
+    if not url.startswith(f"{STORAGE_SCHEME}:"):
+        return False
+
+    try:
+        return parse_storage_url(url)[0] == modality
+    except ValueError:
+        return False
@@ -0,0 +1,183 @@
+import random
+import time
+from typing import Optional, Iterable, Iterator
+
+import numpy as np
+
+from cltl.backend.api.camera import Image, CameraResolution
+from cltl.backend.api.microphone import AudioFrame
+from cltl.backend.spi.audio import AudioSource
+from cltl.backend.spi.image import ImageSource
+
+
+class Pacer:
+    """
+    Pace the delivery of a simulated stream.
+
+    Parameters
+    ----------
+    speed : float, optional
+        Playback speed relative to real time, e.g. 1.0 for real time or 4.0 for four times accelerated.
+        `None` or 0 deliver data without throttling.
+    jitter : float
+        Standard deviation in seconds of a random delay added to each delivery. The delay does not accumulate
+        over the stream.
+    dropout : float
+        Probability that a unit of data (audio frame, image) is dropped.
+    seed : int, optional
+        Seed for the random number generator of jitter and dropouts.
+    """
+    def __init__(self, speed: Optional[float] = 1.0, jitter: float = 0.0, dropout: float = 0.0, seed: int = None):
+        self._speed = speed
+        self._jitter = jitter
+        self._dropout = dropout
+        self._random = random.Random(seed)
+        self._start = None
+        self._start_timestamp = None
+
+    @property
+    def throttled(self) -> bool:
+        return bool(self._speed)
+
+    def start(self):
+        self._start = time.monotonic()
+        self._start_timestamp = time.time()
+
+    def timestamp(self, position: float) -> float:
+        """
+        The simulated capture time of data at `position` seconds from the start of the stream.
+        """
+        if not self.throttled:
+            return time.time()
+
+        return self._start_timestamp + position / self._speed
+
+    def wait(self, position: float):
+        """
+        Wait until data at `position` seconds from the start of the stream is due.
+        """
+        if not self.throttled:
+            return
+
+        due = self._start + position / self._speed
+        if self._jitter:
+            due += abs(self._random.gauss(0, self._jitter))
+
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def drop(self) -> bool:
+        return self._dropout > 0 and self._random.random() < self._dropout
+
+
+class PacedAudioSource(AudioSource):
+    """
+    Base class for simulated audio sources that deliver frames paced by a :class:`Pacer`.
+
+    Subclasses provide the audio frames in :meth:`_frames`. Frames are annotated with their simulated capture
+    time and sequence number, dropped frames show up as gaps in the sequence.
+    """
+    def __init__(self, rate: int, channels: int, frame_size: int, pacer: Pacer = None):
+        self._rate = rate
+        self._channels = channels
+        self._frame_size = frame_size
+        self._pacer = pacer if pacer else Pacer()
+        self._active = False
+
+    def __enter__(self):
+        self._active = True
+        self._pacer.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._active = False
+
+    def stop(self):
+        self._active = False
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def _frames(self) -> Iterable[np.ndarray]:
+        raise NotImplementedError()
+
+    @property
+    def audio(self) -> Iterable[AudioFrame]:
+        frame_duration = self._frame_size / self._rate
+        for sequence, frame in enumerate(self._frames()):
+            position = sequence * frame_duration
+            # A frame is available when all of its samples are captured
+            self._pacer.wait(position + frame_duration)
+            if not self._active:
+                return
+            if self._pacer.drop():
+                continue
+
+            yield AudioFrame(frame, self._pacer.timestamp(position), sequence)
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    @property
+    def frame_size(self) -> int:
+        return self._frame_size
+
+    @property
+    def depth(self) -> int:
+        return 2
+
+
+class PacedImageSource(ImageSource):
+    """
+    Base class for simulated image sources that deliver images at a frame rate paced by a :class:`Pacer`.
+
+    Subclasses provide the images in :meth:`_images`. The position in the image stream is kept when the source
+    is entered repeatedly.
+    """
+    def __init__(self, resolution: CameraResolution, rate: float, pacer: Pacer = None):
+        self._resolution = resolution
+        self._rate = rate
+        self._pacer = pacer if pacer else Pacer()
+        self._image_iterator = None
+        self._index = 0
+
+    def __enter__(self):
+        if self._image_iterator is None:
+            self._image_iterator = iter(self._images())
+            self._pacer.start()
+
+        return self
+
+    @property
+    def resolution(self) -> CameraResolution:
+        return self._resolution
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def _images(self) -> Iterator[Image]:
+        raise NotImplementedError()
+
+    def capture(self) -> Image:
+        if self._image_iterator is None:
+            raise ValueError("Called outside context")
+
+        while True:
+            try:
+                image = next(self._image_iterator)
+            except StopIteration:
+                raise RuntimeError("{} has no more images".format(self.__class__.__name__))
+
+            self._pacer.wait(self._index / self._rate)
+            self._index += 1
+            if not self._pacer.drop():
+                return image
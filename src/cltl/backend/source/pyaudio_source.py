@@ -1,11 +1,14 @@
 import logging
+import time
 import uuid
 from typing import Iterable
 
 import numpy as np
 import pyaudio
 
-from cltl.backend.api.util import raw_frames_to_np
+from cltl.backend.api.metrics import Counter, Gauge, snapshot
+from cltl.backend.api.microphone import AudioFrame
+from cltl.backend.impl.ring_buffer import AudioRingBuffer
 from cltl.backend.spi.audio import AudioSource
 
 logger = logging.getLogger(__name__)
@@ -24,11 +27,30 @@ class PyAudioSource(AudioSource):
         self._pyaudio = pyaudio.PyAudio()
         self._active = False
         self._start_time = None
+        self._start_timestamp = None
         self._time = None
+        self._position = 0
+        self._sequence = 0
+        self._buffer_overruns = Counter()
+        self._dropped_samples = Counter()
 
     @property
-    def audio(self) -> Iterable[np.array]:
-        return raw_frames_to_np(self, self.frame_size, self.channels, self.depth)
+    def metrics(self):
+        return snapshot({"buffer_overruns": self._buffer_overruns, "dropped_samples": self._dropped_samples})
+
+    @property
+    def audio(self) -> Iterable[AudioFrame]:
+        """
+        Audio frames annotated with their capture time and sequence number.
+
+        The capture time is derived from the position of the frame in the stream, measured by the stream clock.
+        Frames dropped on input overflows advance the position and show up as gaps in the sequence.
+        """
+        for data in self:
+            frame = np.frombuffer(data, np.int16).reshape((self._frame_size, self._channels))
+            timestamp = self._start_timestamp + self._position / self._rate
+
+            yield AudioFrame(frame, timestamp, self._sequence)
 
     @property
     def rate(self) -> int:
@@ -62,6 +84,7 @@ class PyAudioSource(AudioSource):
     def _mic_time(self, stream_time):
         advanced = stream_time - self._time
         if advanced > self._stream.get_input_latency():
+            self._buffer_overruns.inc()
             logger.exception("Latency exceeded buffer (%.4fsec) - dropped frames: %.4fsec",
                              self._stream.get_input_latency(), advanced)
         self._time = stream_time
@@ -75,7 +98,10 @@ class PyAudioSource(AudioSource):
                                           frames_per_buffer=self.BUFFER * self._frame_size)
         self._active = True
         self._start_time = self._stream.get_time()
+        self._start_timestamp = time.time()
         self._time = self._start_time
+        self._position = -self._frame_size
+        self._sequence = -1
 
         logger.debug("Opened microphone (%s) with rate: %s, channels: %s, frame_size: %s",
                      self.id, self._rate, self._channels, self._frame_size)
@@ -99,5 +125,152 @@ class PyAudioSource(AudioSource):
 
         data = self._stream.read(self._frame_size, exception_on_overflow=False)
         self._mic_time = self._stream.get_time()
+        self._advance()
+
+        return data
+
+    def _advance(self):
+        # Samples captured according to the stream clock that were neither read nor are still available in the
+        # buffer were dropped on an input overflow. Samples not yet delivered by the device are accounted for by
+        # the input latency.
+        position = self._position + self._frame_size
+        captured = (self._time - self._start_time - self._stream.get_input_latency()) * self._rate
+        dropped = int(captured) - position - self._frame_size - self._stream.get_read_available()
+
+        skipped = max(0, dropped) // self._frame_size
+        if skipped:
+            self._dropped_samples.inc(skipped * self._frame_size)
+            logger.warning("Dropped %s frames on input overflow", skipped)
+
+        self._position = position + skipped * self._frame_size
+        self._sequence += 1 + skipped
+
+
+class CallbackPyAudioSource(PyAudioSource):
+    """
+    PyAudio source that captures audio in callback mode.
+
+    Audio from the device is copied into a preallocated :class:`~cltl.backend.impl.ring_buffer.AudioRingBuffer`
+    from the PortAudio callback, so device timing is independent of the pace of the consumer. Overflows are
+    accounted for in the metrics of the source:
+
+    * `input_overflows`: callbacks for which PortAudio reported an input overflow
+    * `device_dropped_samples`: samples lost by the device, detected from discontinuities in the ADC time
+    * `buffer_dropped_samples`: samples overwritten in the ring buffer before they were consumed
+    * `buffered_frames`: frames in the ring buffer not yet consumed
+
+    Parameters
+    ----------
+    rate : int
+        The sampling rate
+    channels : int
+        The number of channels
+    frame_size : int
+        The number of samples per frame
+    buffer_frames : int
+        The capacity of the ring buffer in frames
+    """
+    def __init__(self, rate, channels, frame_size, buffer_frames: int = 64):
+        super().__init__(rate, channels, frame_size)
+        self._buffer_frames = buffer_frames
+        self._ring = None
+        self._cursor = None
+        self._clock_offset = None
+        self._next_adc_time = None
+
+        self._input_overflows = Counter()
+        self._device_dropped_samples = Counter()
+        self._buffered_frames = Gauge()
+
+    @property
+    def metrics(self):
+        buffer_dropped = self._cursor.dropped.value * self._frame_size if self._cursor else 0
+        if self._ring and self._cursor:
+            self._buffered_frames.set(self._ring.lag(self._cursor))
+
+        metrics = snapshot({"input_overflows": self._input_overflows,
+                            "device_dropped_samples": self._device_dropped_samples,
+                            "buffered_frames": self._buffered_frames})
+        metrics["buffer_dropped_samples"] = buffer_dropped
+
+        return metrics
+
+    @property
+    def audio(self) -> Iterable[AudioFrame]:
+        """
+        Audio frames annotated with their ADC capture time.
+
+        The sequence number is the position of the frame in the capture stream, frames dropped from the ring
+        buffer show up as gaps in the sequence.
+        """
+        while self._active:
+            frame = self._ring.read(self._cursor, timeout=self._frame_size / self._rate * self.BUFFER)
+            if frame is not None:
+                yield frame
+
+    def __enter__(self):
+        self._ring = AudioRingBuffer(self._buffer_frames, self._frame_size, self._channels)
+        self._cursor = self._ring.cursor()
+        self._next_adc_time = None
+        self._active = True
+
+        # Start the stream only after the clock is initialized, callbacks are invoked as soon as it is started
+        self._stream = self._pyaudio.open(self._rate, self._channels, pyaudio.paInt16, input=True,
+                                          frames_per_buffer=self._frame_size, stream_callback=self._on_audio,
+                                          start=False)
+        self._start_time = self._stream.get_time()
+        self._clock_offset = time.time() - self._start_time
+        self._start_timestamp = time.time()
+        self._time = self._start_time
+        self._stream.start_stream()
+
+        logger.debug("Opened microphone (%s) in callback mode with rate: %s, channels: %s, frame_size: %s",
+                     self.id, self._rate, self._channels, self._frame_size)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # The stream runs independently of the consumer and must be closed even if the source was stopped
+        self._active = False
+        self._stream.close()
+        self._ring.close()
+        logger.debug("Closed microphone (%s), metrics: %s", self.id, self.metrics)
+
+    def __next__(self):
+        if not self._active:
+            raise StopIteration()
+
+        frame = None
+        while frame is None:
+            frame = self._ring.read(self._cursor, timeout=self._frame_size / self._rate * self.BUFFER)
+            if not self._active:
+                raise StopIteration()
+
+        return frame.tobytes()
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            self._input_overflows.inc()
+
+        # Overflows are accounted for above, only advance the stream time
+        self._time = time_info.get('current_time') or self._stream.get_time()
+
+        adc_time = time_info.get('input_buffer_adc_time') or time_info.get('current_time')
+        if adc_time:
+            if self._next_adc_time is not None:
+                missing = round((adc_time - self._next_adc_time) * self._rate)
+                # Ignore jitter of the reported ADC time
+                if missing > frame_count // 2:
+                    self._device_dropped_samples.inc(missing)
+            self._next_adc_time = adc_time + frame_count / self._rate
+            timestamp = self._clock_offset + adc_time
+        else:
+            timestamp = time.time() - frame_count / self._rate
+
+        if frame_count == self._frame_size:
+            self._ring.write(np.frombuffer(in_data, np.int16), timestamp)
+        else:
+            logger.warning("Skipped audio with unexpected number of samples %s, expected %s",
+                           frame_count, self._frame_size)
 
-        return data
\ No newline at end of file
+        return None, pyaudio.paContinue if self._active else pyaudio.paComplete
@@ -0,0 +1,145 @@
+import itertools
+import logging
+from pathlib import Path
+from typing import Iterable, Iterator, List, Union
+
+import cv2
+import numpy as np
+import soundfile as sf
+
+from cltl.backend.api.camera import Image, CameraResolution
+from cltl.backend.source.pacing import PacedAudioSource, PacedImageSource, Pacer
+from cltl.backend.source.synthetic_source import SYNTHETIC_BOUNDS
+
+logger = logging.getLogger(__name__)
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class WavAudioSource(PacedAudioSource):
+    def __init__(self, files: Union[str, List[str]], frame_size: int, loop: bool = False, pacer: Pacer = None):
+        """
+        Audio source replaying WAV files.
+
+        All files must have the same sampling rate and number of channels. The last frame of the replayed
+        audio is padded with silence.
+
+        Parameters
+        ----------
+        files : str or List[str]
+            The WAV file(s) to replay, in order
+        frame_size : int
+            The number of samples per frame
+        loop : bool
+            Restart from the first file after the last file was replayed
+        pacer : Pacer, optional
+            Pacer to control speed, jitter and dropouts, real time by default
+        """
+        self._files = [files] if isinstance(files, str) else list(files)
+        if not self._files:
+            raise ValueError("No audio files provided")
+
+        infos = [sf.info(file) for file in self._files]
+        if len({(info.samplerate, info.channels) for info in infos}) > 1:
+            raise ValueError(f"Audio files have different sampling rates or channels: {self._files}")
+
+        super().__init__(infos[0].samplerate, infos[0].channels, frame_size, pacer)
+        self._loop = loop
+
+    def _frames(self) -> Iterable[np.ndarray]:
+        files = itertools.cycle(self._files) if self._loop else self._files
+        for file in files:
+            audio, _ = sf.read(file, dtype=np.int16, always_2d=True)
+            for start in range(0, len(audio), self._frame_size):
+                frame = audio[start:start + self._frame_size]
+                if len(frame) < self._frame_size:
+                    frame = np.pad(frame, ((0, self._frame_size - len(frame)), (0, 0)))
+
+                yield frame
+
+
+class FileImageSource(PacedImageSource):
+    def __init__(self, path: str, resolution: CameraResolution = CameraResolution.NATIVE, rate: float = None,
+                 loop: bool = True, pacer: Pacer = None):
+        """
+        Image source replaying images from a folder or frames from a video file.
+
+        Images in a folder are replayed in order of their file names. Images are converted to RGB and resized
+        to the requested resolution.
+
+        Parameters
+        ----------
+        path : str
+            A folder containing images or a video file
+        resolution : CameraResolution
+            The resolution of the images, NATIVE to keep the original size
+        rate : float, optional
+            The frame rate in images per second, defaults to the frame rate of a video file or 30 for folders
+        loop : bool
+            Restart from the first image after the last image was replayed
+        pacer : Pacer, optional
+            Pacer to control speed, jitter and dropouts, real time by default
+        """
+        self._path = Path(path)
+        if self._path.is_dir():
+            self._image_files = sorted(str(file) for file in self._path.iterdir()
+                                       if file.suffix.lower() in IMAGE_EXTENSIONS)
+            if not self._image_files:
+                raise ValueError(f"No images found in {path}")
+        elif self._path.is_file():
+            self._image_files = None
+        else:
+            raise ValueError(f"No such file or directory: {path}")
+
+        if rate is None:
+            rate = self._video_rate() if self._image_files is None else 30
+
+        super().__init__(resolution, rate, pacer)
+        self._loop = loop
+
+    def _video_rate(self) -> float:
+        video = cv2.VideoCapture(str(self._path))
+        try:
+            rate = video.get(cv2.CAP_PROP_FPS)
+        finally:
+            video.release()
+
+        return rate if rate and rate > 0 else 30
+
+    def _images(self) -> Iterator[Image]:
+        while True:
+            frames = self._read_folder() if self._image_files is not None else self._read_video()
+            for frame in frames:
+                yield Image(self._convert(frame), SYNTHETIC_BOUNDS)
+
+            if not self._loop:
+                return
+
+    def _read_folder(self) -> Iterable[np.ndarray]:
+        for file in self._image_files:
+            image = cv2.imread(file)
+            if image is None:
+                logger.warning("Skipped unreadable image %s", file)
+                continue
+
+            yield image
+
+    def _read_video(self) -> Iterable[np.ndarray]:
+        video = cv2.VideoCapture(str(self._path))
+        if not video.isOpened():
+            raise RuntimeError(f"{self.__class__.__name__} could not open {self._path}")
+
+        try:
+            success, frame = video.read()
+            while success:
+                yield frame
+                success, frame = video.read()
+        finally:
+            video.release()
+
+    def _convert(self, image: np.ndarray) -> np.ndarray:
+        if not self.resolution == CameraResolution.NATIVE:
+            image = cv2.resize(image, (self.resolution.width, self.resolution.height))
+
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
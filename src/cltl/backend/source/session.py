@@ -0,0 +1,295 @@
+import logging
+import socket
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urljoin, unquote, urlsplit, quote
+
+import requests
+from cltl.combot.infra.config import ConfigurationManager
+from requests.adapters import HTTPAdapter, BaseAdapter, DEFAULT_POOLSIZE
+from urllib3 import HTTPConnectionPool
+from urllib3.connection import HTTPConnection
+
+from cltl.backend.api.storage import STORAGE_SCHEME
+
+logger = logging.getLogger(__name__)
+
+
+def keep_alive_socket_options(idle: int = 30, interval: int = 10, count: int = 3) -> List[Tuple[int, int, int]]:
+    """
+    Socket options to enable TCP keep-alive probes on idle connections, where supported by the platform.
+    """
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    for name, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+
+    return options
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that can be mounted in multiple sessions.
+
+    Closing a session does not close the adapter, connections are released only on :meth:`shutdown`.
+    """
+    def __init__(self, keep_alive: bool = True, **kwargs):
+        self._socket_options = HTTPConnection.default_socket_options + keep_alive_socket_options() \
+            if keep_alive else None
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._socket_options:
+            kwargs["socket_options"] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        super().close()
+
+
+UNIX_SCHEME = "http+unix"
+"""Scheme of URLs to HTTP servers on a Unix domain socket.
+
+The socket path is the percent-encoded host of the URL, e.g. `http+unix://%2Ftmp%2Fbackend.sock/audio`.
+"""
+
+
+def unix_socket_url(socket_path: str, path: str = "") -> str:
+    return f"{UNIX_SCHEME}://{quote(socket_path, safe='')}{path}"
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path: str, **kwargs):
+        super().__init__("localhost", **kwargs)
+        self._socket_path = socket_path
+
+    def _new_conn(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        sock.connect(self._socket_path)
+
+        return sock
+
+
+class _UnixHTTPConnectionPool(HTTPConnectionPool):
+    def __init__(self, socket_path: str, **kwargs):
+        super().__init__("localhost", **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        self.num_connections += 1
+
+        return _UnixHTTPConnection(self.socket_path, timeout=self.timeout.connect_timeout)
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    """
+    Transport adapter for HTTP over Unix domain sockets, for URLs with the :data:`UNIX_SCHEME`.
+
+    Connections are pooled per socket. Like :class:`SharedHTTPAdapter` the adapter can be mounted in multiple
+    sessions and is closed only on :meth:`shutdown`.
+    """
+    def __init__(self, pool_maxsize: int = DEFAULT_POOLSIZE):
+        super().__init__(pool_maxsize=pool_maxsize)
+        self._unix_pools = {}
+        self._unix_pool_maxsize = pool_maxsize
+        self._unix_lock = threading.Lock()
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._unix_pool(request.url)
+
+    def get_connection(self, url, proxies=None):
+        return self._unix_pool(url)
+
+    def _unix_pool(self, url: str) -> _UnixHTTPConnectionPool:
+        socket_path = unquote(urlsplit(url).netloc)
+        with self._unix_lock:
+            if socket_path not in self._unix_pools:
+                self._unix_pools[socket_path] = _UnixHTTPConnectionPool(socket_path,
+                                                                        maxsize=self._unix_pool_maxsize)
+
+            return self._unix_pools[socket_path]
+
+    def request_url(self, request, proxies):
+        return request.path_url
+
+    @property
+    def pools(self) -> Dict[str, HTTPConnectionPool]:
+        with self._unix_lock:
+            return dict(self._unix_pools)
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        with self._unix_lock:
+            for pool in self._unix_pools.values():
+                pool.close()
+            self._unix_pools.clear()
+        super().close()
+
+
+def _join_url(base: str, path: str) -> str:
+    # urljoin only supports known schemes, the path is resolved relative to the path of the base URL
+    scheme, separator, rest = base.partition("://")
+
+    return scheme + separator + urljoin("http://" + rest.rstrip("/") + "/", path.lstrip("/"))[len("http://"):]
+
+
+def resolve_storage_url(url: str, storage_url: Optional[str]) -> str:
+    """
+    Resolve a `cltl-storage:` URL against the URL of the storage service, other URLs are returned unchanged.
+
+    The path of the `cltl-storage:` URL is resolved relative to the storage URL, which can contain a base path,
+    e.g. `cltl-storage:audio/1` resolves to `http://host/storage/audio/1` for `http://host/storage`.
+    """
+    if not url.startswith(f"{STORAGE_SCHEME}:"):
+        return url
+    if not storage_url:
+        raise ValueError(f"No storage URL to resolve {url}")
+
+    return _join_url(storage_url, url.split(f"{STORAGE_SCHEME}:", 1)[1])
+
+
+# TODO Rename to CltlStorageAdapter
+class CltlAudioAdapter(BaseAdapter):
+    """"Transport adapter" to support cltl-storage:// schema."""
+    def __init__(self, storage_url, http_adapter: HTTPAdapter = None):
+        super().__init__()
+        self._storage_url = storage_url
+        if http_adapter:
+            self._http_adapter = http_adapter
+        else:
+            self._http_adapter = UnixSocketAdapter() if storage_url.startswith(f"{UNIX_SCHEME}:") else HTTPAdapter()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        storage_request = request.copy()
+
+        storage_request.url = resolve_storage_url(storage_request.url, self._storage_url)
+
+        logger.debug("Resolve %s to %s", request.url, storage_request.url)
+
+        return self._http_adapter.send(storage_request, stream, timeout, verify, cert, proxies)
+
+    def close(self):
+        self._http_adapter.close()
+
+
+class SessionPool:
+    @classmethod
+    def from_config(cls, config_manager: ConfigurationManager):
+        backend_config = config_manager.get_config("cltl.backend")
+
+        options = {}
+        if "pool_connections" in backend_config:
+            options["pool_connections"] = backend_config.get_int("pool_connections")
+        if "pool_maxsize" in backend_config:
+            options["pool_maxsize"] = backend_config.get_int("pool_maxsize")
+        if "keep_alive" in backend_config:
+            options["keep_alive"] = backend_config.get_boolean("keep_alive")
+
+        return cls(**options)
+
+    def __init__(self, pool_connections: int = DEFAULT_POOLSIZE, pool_maxsize: int = DEFAULT_POOLSIZE,
+                 keep_alive: bool = True):
+        """
+        Pool of HTTP connections shared by the client sources of a process.
+
+        Sessions obtained from the pool use a common connection pool per host, such that connections are
+        reused across sessions instead of being established for every request.
+
+        Parameters
+        ----------
+        pool_connections : int
+            The number of hosts for which connection pools are kept
+        pool_maxsize : int
+            The maximum number of idle connections kept per host
+        keep_alive : bool
+            Enable TCP keep-alive probes on the pooled connections
+        """
+        self._http_adapter = SharedHTTPAdapter(keep_alive, pool_connections=pool_connections,
+                                               pool_maxsize=pool_maxsize)
+        self._unix_adapter = UnixSocketAdapter(pool_maxsize)
+        self._storage_adapters = {}
+        self._lock = threading.Lock()
+
+    def session(self, storage_url: str = None) -> requests.Session:
+        """
+        Create a session that uses the pooled connections.
+
+        Parameters
+        ----------
+        storage_url : str, optional
+            The URL of the storage service, used to resolve `cltl-storage:` URLs
+        """
+        session = requests.Session()
+        session.mount("http://", self._http_adapter)
+        session.mount("https://", self._http_adapter)
+        session.mount(f"{UNIX_SCHEME}://", self._unix_adapter)
+        if storage_url:
+            session.mount(f"{STORAGE_SCHEME}:", self._storage_adapter(storage_url))
+
+        return session
+
+    def _storage_adapter(self, storage_url: str) -> CltlAudioAdapter:
+        with self._lock:
+            if storage_url not in self._storage_adapters:
+                adapter = self._unix_adapter if storage_url.startswith(f"{UNIX_SCHEME}:") else self._http_adapter
+                self._storage_adapters[storage_url] = CltlAudioAdapter(storage_url, adapter)
+
+            return self._storage_adapters[storage_url]
+
+    @property
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Connection metrics per host: the number of connections opened, requests sent and idle connections in
+        the pool.
+        """
+        pools = self._http_adapter.poolmanager.pools
+        metrics = {}
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                # Evicted in the meantime
+                continue
+            metrics[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = self._pool_metrics(pool)
+        for socket_path, pool in self._unix_adapter.pools.items():
+            metrics[unix_socket_url(socket_path)] = self._pool_metrics(pool)
+
+        return metrics
+
+    @staticmethod
+    def _pool_metrics(pool: HTTPConnectionPool) -> Dict[str, int]:
+        return {
+            "connections": pool.num_connections,
+            "requests": pool.num_requests,
+            "idle": sum(1 for connection in list(pool.pool.queue) if connection) if pool.pool else 0,
+        }
+
+    def close(self):
+        self._http_adapter.shutdown()
+        self._unix_adapter.shutdown()
+
+
+_session_pool = None
+_session_pool_lock = threading.Lock()
+
+
+def session_pool(config_manager: ConfigurationManager = None) -> SessionPool:
+    """
+    The process-wide :class:`SessionPool`.
+
+    The pool is created on first use, from the `cltl.backend` configuration if a configuration manager is
+    provided.
+    """
+    global _session_pool
+    with _session_pool_lock:
+        if _session_pool is None:
+            _session_pool = SessionPool.from_config(config_manager) if config_manager else SessionPool()
+
+        return _session_pool
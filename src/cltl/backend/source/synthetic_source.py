@@ -0,0 +1,136 @@
+import itertools
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from cltl.backend.api.camera import Image, CameraResolution, Bounds
+from cltl.backend.source.pacing import PacedAudioSource, PacedImageSource, Pacer
+
+SYNTHETIC_BOUNDS = Bounds(-0.55, -0.41 + np.pi / 2, 0.55, 0.41 + np.pi / 2)
+
+
+class SyntheticAudioSource(PacedAudioSource):
+    SIGNALS = ("tone", "noise", "silence")
+
+    def __init__(self, rate: int, channels: int, frame_size: int, signal: str = "tone",
+                 frequency: float = 440.0, amplitude: float = 0.5, duration: Optional[float] = None,
+                 pacer: Pacer = None, seed: int = None):
+        """
+        Audio source generating synthetic 16bit audio.
+
+        Parameters
+        ----------
+        rate : int
+            The sampling rate
+        channels : int
+            The number of channels, all channels contain the same signal
+        frame_size : int
+            The number of samples per frame
+        signal : str
+            One of `tone` (sine wave), `noise` (white noise) or `silence`
+        frequency : float
+            The frequency of the tone in Hz
+        amplitude : float
+            The amplitude relative to the maximum sample value
+        duration : float, optional
+            The duration of the audio in seconds, infinite if not set
+        pacer : Pacer, optional
+            Pacer to control speed, jitter and dropouts, real time by default
+        seed : int, optional
+            Seed for the noise signal
+        """
+        super().__init__(rate, channels, frame_size, pacer)
+        if signal not in self.SIGNALS:
+            raise ValueError(f"Unsupported signal {signal}, expected one of {self.SIGNALS}")
+
+        self._signal = signal
+        self._frequency = frequency
+        self._amplitude = amplitude * np.iinfo(np.int16).max
+        self._duration = duration
+        self._random = np.random.default_rng(seed)
+
+    def _frames(self) -> Iterable[np.ndarray]:
+        frames = itertools.count() if self._duration is None \
+            else range(int(np.ceil(self._duration * self._rate / self._frame_size)))
+
+        for index in frames:
+            yield self._frame(index)
+
+    def _frame(self, index: int) -> np.ndarray:
+        if self._signal == "tone":
+            samples = np.arange(index * self._frame_size, (index + 1) * self._frame_size)
+            mono = self._amplitude * np.sin(2 * np.pi * self._frequency * samples / self._rate)
+        elif self._signal == "noise":
+            mono = self._random.uniform(-self._amplitude, self._amplitude, self._frame_size)
+        else:
+            mono = np.zeros(self._frame_size)
+
+        return np.repeat(mono.astype(np.int16).reshape((self._frame_size, 1)), self._channels, axis=1)
+
+
+class SyntheticImageSource(PacedImageSource):
+    PATTERNS = ("moving", "noise", "static")
+
+    def __init__(self, resolution: CameraResolution, rate: float = 30, pattern: str = "moving",
+                 depth: bool = False, pacer: Pacer = None, seed: int = None):
+        """
+        Image source generating synthetic RGB images.
+
+        Parameters
+        ----------
+        resolution : CameraResolution
+            The resolution of the images, NATIVE is generated as VGA
+        rate : float
+            The frame rate in images per second
+        pattern : str
+            One of `moving` (a square moving over a gradient), `noise` (random pixels) or `static` (the gradient)
+        depth : bool
+            Generate a depth map along with the image
+        pacer : Pacer, optional
+            Pacer to control speed, jitter and dropouts, real time by default
+        seed : int, optional
+            Seed for the noise pattern
+        """
+        super().__init__(resolution, rate, pacer)
+        if pattern not in self.PATTERNS:
+            raise ValueError(f"Unsupported pattern {pattern}, expected one of {self.PATTERNS}")
+
+        self._pattern = pattern
+        self._depth = depth
+        self._random = np.random.default_rng(seed)
+
+        size = resolution if resolution != CameraResolution.NATIVE else CameraResolution.VGA
+        self._height, self._width = size.height, size.width
+        self._background = self._gradient()
+
+    def _gradient(self) -> np.ndarray:
+        rows = np.linspace(0, 255, self._height, dtype=np.uint8).reshape((self._height, 1))
+        columns = np.linspace(0, 255, self._width, dtype=np.uint8).reshape((1, self._width))
+
+        background = np.empty((self._height, self._width, 3), dtype=np.uint8)
+        background[..., 0] = rows
+        background[..., 1] = columns
+        background[..., 2] = 128
+
+        return background
+
+    def _images(self) -> Iterator[Image]:
+        for index in itertools.count():
+            if self._pattern == "noise":
+                image = self._random.integers(0, 256, (self._height, self._width, 3), dtype=np.uint8)
+            else:
+                image = self._background.copy()
+                if self._pattern == "moving":
+                    self._draw_square(image, index)
+
+            depth = None
+            if self._depth:
+                depth = np.full((self._height, self._width), 1.0 + (index % 10) / 10, dtype=np.float32)
+
+            yield Image(image, SYNTHETIC_BOUNDS, depth)
+
+    def _draw_square(self, image: np.ndarray, index: int):
+        size = max(1, min(self._height, self._width) // 4)
+        x = (index * 4) % max(1, self._width - size)
+        y = (index * 2) % max(1, self._height - size)
+        image[y:y + size, x:x + size] = 255
@@ -1,15 +1,26 @@
 import logging
 import uuid
-from threading import Thread
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from threading import Thread, Event as ThreadingEvent
+from typing import Any, Dict, Optional, Union
 
+import cv2
+import numpy as np
 import time
 from cltl.combot.infra.config import ConfigurationManager
 from cltl.combot.infra.event import EventBus, Event
 from cltl.combot.infra.util import ThreadsafeBoolean
 
+from cltl.backend.api.camera import Image
+from cltl.backend.api.metrics import Counter, Histogram, snapshot
 from cltl.backend.api.microphone import Microphone
-from cltl.backend.api.storage import AudioStorage
-from cltl_service.backend.schema import AudioSignalStarted, AudioSignalStopped
+from cltl.backend.api.storage import AudioStorage, ImageStorage
+from cltl.backend.impl.segmentation import Segmenter
+from cltl.backend.spi.image import ImageSource
+from cltl_service.backend.capture import CaptureBuffer
+from cltl_service.backend.progress import ProgressPublisher
+from cltl_service.backend.publisher import AsyncEventPublisher
+from cltl_service.backend.schema import AudioSignalStarted, AudioSignalStopped, ImageSignalEvent
 
 
 logger = logging.getLogger(__name__)
@@ -20,16 +31,71 @@ class AudioBackendService:
     def from_config(cls, mic: Microphone, storage: AudioStorage, event_bus: EventBus,
                     config_manager: ConfigurationManager):
         config = config_manager.get_config("cltl.backend.mic")
+        preroll = config.get_int("preroll") if "preroll" in config else 0
+        progress_interval = config.get_int("progress_interval") if "progress_interval" in config else 0
+        capture_buffer = config.get_int("capture_buffer") if "capture_buffer" in config else 0
+        capture_overflow = config.get("capture_overflow") if "capture_overflow" in config else "block"
 
-        return cls(config.get('topic'), mic, storage, event_bus)
+        return cls(config.get('topic'), mic, storage, event_bus, preroll, Segmenter.from_config(config_manager),
+                   progress_interval, AsyncEventPublisher.from_config(event_bus, config_manager),
+                   capture_buffer, capture_overflow)
 
-    def __init__(self, mic_topic: str, mic: Microphone, storage: AudioStorage, event_bus: EventBus):
+    def __init__(self, mic_topic: str, mic: Microphone, storage: AudioStorage, event_bus: EventBus,
+                 preroll_ms: int = 0, segmenter: Segmenter = None, progress_interval_ms: int = 0,
+                 publisher: AsyncEventPublisher = None, capture_buffer: int = 0, capture_overflow: str = "block",
+                 executor: Executor = None):
+        """
+        Record the audio of the microphone to the storage and publish signal events for the recordings.
+
+        By default one recording is stored per listen session of the microphone. With a segmenter the audio of
+        a session is split into utterances that are stored as separate signals.
+
+        Parameters
+        ----------
+        mic_topic : str
+            The topic to publish the audio signal events to
+        mic : Microphone
+            The microphone to listen to
+        storage : AudioStorage
+            The storage for the audio signals
+        event_bus : EventBus
+            The event bus to publish the events
+        preroll_ms : int
+            The pre-roll requested from the microphone when listening
+        segmenter : Segmenter, optional
+            Segmenter to split the audio into utterances
+        progress_interval_ms : int
+            The interval at which :class:`AudioSignalProgress` events are published for a recording in progress,
+            `0` to disable progress events
+        publisher : AsyncEventPublisher, optional
+            Publisher to publish the events to the event bus in the background, by default events are published
+            from the recording thread
+        capture_buffer : int
+            The maximum number of frames buffered between the microphone and the storage. With a buffer, audio is
+            stored and events are published by a separate thread, such that a slow storage does not delay reading
+            from the microphone. `0` to store the audio while reading from the microphone.
+        capture_overflow : str
+            The policy if the capture buffer is full, `block` to wait for the storage or `drop` to discard frames
+        executor : Executor, optional
+            Executor to run capture and persistence on, by default dedicated threads are started. The executor
+            must have a worker available for each of the :attr:`workers` of the service.
+        """
         self._mic_topic = mic_topic
         self._mic = mic
+        self._preroll_ms = preroll_ms
+        self._segmenter = segmenter
         self._running = ThreadsafeBoolean()
         self._thread = None
+        self._capture_buffer = capture_buffer
+        self._capture_overflow = capture_overflow
+        self._buffer = None
+        self._persistence_thread = None
+        self._executor = executor
         self._storage = storage
-        self._event_bus = event_bus
+        self._publisher = publisher
+        self._event_bus = publisher if publisher else event_bus
+        self._progress = ProgressPublisher(self._event_bus, mic_topic, progress_interval_ms / 1000) \
+            if progress_interval_ms else None
 
     @property
     def app(self):
@@ -39,24 +105,32 @@ class AudioBackendService:
         if self._thread:
             raise ValueError("Already started")
 
+        if self._publisher:
+            self._publisher.start()
         self._mic.start()
+        if self._progress:
+            self._progress.start()
         self._running.value = True
 
+        if self._capture_buffer:
+            self._buffer = CaptureBuffer(self._capture_buffer, self._capture_overflow)
+            self._persistence_thread = self._spawn("cltl.backend.persistence", self._persist)
+
         def run():
             while self._running.value:
                 try:
-                    audio_id = str(uuid.uuid4())
-                    with self._mic.listen() as (audio, params):
-                        self._store(audio_id, self._audio_with_events(audio_id, audio, params),
-                                    params.sampling_rate)
-                        logger.info("Stored audio %s", audio_id)
+                    listen = self._mic.listen(preroll_ms=self._preroll_ms) if self._preroll_ms else self._mic.listen()
+                    with listen as (audio, params):
+                        if self._buffer:
+                            self._capture(audio, params)
+                        else:
+                            self._record(audio, params)
                     self._mic.mute()
                 except Exception as e:
                     logger.warning("Failed to listen to mic: %s", e)
                     time.sleep(1)
 
-        self._thread = Thread(name="cltl.backend", target=run)
-        self._thread.start()
+        self._thread = self._spawn("cltl.backend", run)
 
     def stop(self):
         if not self._thread:
@@ -64,8 +138,85 @@ class AudioBackendService:
 
         self._running.value = False
         self._mic.stop()
-        self._thread.join()
+        self._join(self._thread)
         self._thread = None
+        if self._buffer:
+            self._buffer.close()
+            self._join(self._persistence_thread)
+            self._persistence_thread = None
+        if self._progress:
+            self._progress.stop()
+        if self._publisher:
+            self._publisher.stop()
+
+    @property
+    def workers(self) -> int:
+        """
+        The number of threads the service occupies while running.
+        """
+        return 2 if self._capture_buffer else 1
+
+    def _spawn(self, name: str, target) -> Union[Thread, Future]:
+        if self._executor:
+            return self._executor.submit(target)
+
+        thread = Thread(name=name, target=target)
+        thread.start()
+
+        return thread
+
+    @staticmethod
+    def _join(task: Union[Thread, Future]):
+        if isinstance(task, Future):
+            task.result()
+        else:
+            task.join()
+
+    def _capture(self, audio, params):
+        self._buffer.begin(params)
+        try:
+            for frame in audio:
+                if frame is not None and not self._buffer.put(frame):
+                    logger.debug("Dropped frame, capture buffer is full")
+        finally:
+            self._buffer.end()
+
+    def _persist(self):
+        while True:
+            params = self._buffer.session()
+            if params is None:
+                return
+
+            frames = self._buffer.frames()
+            try:
+                self._record(frames, params)
+            except Exception as e:
+                logger.warning("Failed to store audio: %s", e)
+            finally:
+                # Skip the frames of the session that could not be stored
+                for _ in frames:
+                    pass
+
+    def _record(self, audio, params):
+        segments = self._segmenter.segments(audio, params) if self._segmenter else [audio]
+        for segment in segments:
+            audio_id = str(uuid.uuid4())
+            self._store(audio_id, self._audio_with_events(audio_id, segment, params), params.sampling_rate)
+            logger.info("Stored audio %s", audio_id)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        metrics = {}
+        if self._buffer:
+            metrics["capture"] = self._buffer.metrics
+        if self._publisher:
+            metrics["events"] = self._publisher.metrics
+        if self._progress:
+            metrics["progress"] = self._progress.metrics
+        if hasattr(self._mic, "metrics"):
+            metrics["mic"] = self._mic.metrics
+
+        return metrics
 
     def _store(self, audio_id, audio, sampling_rate):
         self._storage.store(audio_id, audio, sampling_rate)
@@ -73,19 +224,289 @@ class AudioBackendService:
     def _audio_with_events(self, audio_id, audio, parameters):
         started = False
         samples = 0
-        for frame in audio:
-            if frame is None:
-                continue
-            if not started:
-                files = [f"cltl-storage:audio/{audio_id}"]
-                started = AudioSignalStarted.create(audio_id, time.time(), files, parameters)
-                event = Event.for_payload(started)
-                self._event_bus.publish(self._mic_topic, event)
-
-            samples += len(frame)
-            yield frame
+        end_timestamp = None
+        try:
+            for frame in audio:
+                if frame is None:
+                    continue
+                timestamp = getattr(frame, 'timestamp', None)
+                if not started:
+                    files = [f"cltl-storage:audio/{audio_id}"]
+                    start_timestamp = timestamp if timestamp is not None else time.time()
+                    started = AudioSignalStarted.create(audio_id, start_timestamp, files, parameters)
+                    event = Event.for_payload(started)
+                    self._event_bus.publish(self._mic_topic, event)
+
+                samples += len(frame)
+                if timestamp is not None:
+                    end_timestamp = timestamp + len(frame) / parameters.sampling_rate
+                if self._progress:
+                    self._progress.update(audio_id, end_timestamp if end_timestamp else time.time(), samples)
+                yield frame
+        finally:
+            if self._progress:
+                self._progress.finish(audio_id)
 
         if started:
-            stopped = AudioSignalStopped.create(audio_id, time.time(), samples)
+            stopped = AudioSignalStopped.create(audio_id, end_timestamp if end_timestamp else time.time(), samples)
             event = Event.for_payload(stopped)
             self._event_bus.publish(self._mic_topic, event)
+
+
+class MultiAudioBackendService:
+    @classmethod
+    def from_config(cls, mics: Dict[str, Microphone], storage: AudioStorage, event_bus: EventBus,
+                    config_manager: ConfigurationManager):
+        """
+        Create the service from the `cltl.backend.mic` configuration.
+
+        The topic of a source is read from the `topic` of the `cltl.backend.mic.<name>` section if present, by
+        default the topic of the `cltl.backend.mic` section with the name of the source appended is used. All
+        other options are shared by the sources.
+        """
+        config = config_manager.get_config("cltl.backend.mic")
+
+        topics = {}
+        for name in mics:
+            section = f"cltl.backend.mic.{name}"
+            source_config = config_manager.get_config(section) if config_manager.has_config(section) else None
+            topics[name] = source_config.get("topic") if source_config and "topic" in source_config \
+                else f"{config.get('topic')}.{name}"
+
+        options = {}
+        if "preroll" in config:
+            options["preroll_ms"] = config.get_int("preroll")
+        if "progress_interval" in config:
+            options["progress_interval_ms"] = config.get_int("progress_interval")
+        if "capture_buffer" in config:
+            options["capture_buffer"] = config.get_int("capture_buffer")
+        if "capture_overflow" in config:
+            options["capture_overflow"] = config.get("capture_overflow")
+        if "workers" in config:
+            options["max_workers"] = config.get_int("workers")
+
+        return cls(mics, topics, storage, event_bus, segmenter=Segmenter.from_config(config_manager),
+                   publisher=AsyncEventPublisher.from_config(event_bus, config_manager), **options)
+
+    def __init__(self, mics: Dict[str, Microphone], topics: Dict[str, str], storage: AudioStorage,
+                 event_bus: EventBus, max_workers: Optional[int] = None, publisher: AsyncEventPublisher = None,
+                 **options):
+        """
+        Record the audio of multiple named microphones in one process.
+
+        Each microphone is recorded by an :class:`AudioBackendService` that publishes to its own topic. The
+        services share the storage, a bounded thread pool for capture and persistence and, if configured, the
+        asynchronous event publisher.
+
+        Parameters
+        ----------
+        mics : Dict[str, Microphone]
+            The microphones by name
+        topics : Dict[str, str]
+            The topics to publish the audio signal events of the microphones to, by name
+        storage : AudioStorage
+            The storage for the audio signals, must support concurrent stores
+        event_bus : EventBus
+            The event bus to publish the events
+        max_workers : int, optional
+            The size of the thread pool, must be at least the total number of :attr:`AudioBackendService.workers`
+            of the services. By default the pool has two workers per source.
+        publisher : AsyncEventPublisher, optional
+            Publisher shared by all sources to publish the events in the background
+        options
+            Options of the :class:`AudioBackendService` shared by all sources
+        """
+        if set(mics) != set(topics):
+            raise ValueError(f"Topics {sorted(topics)} don't match the sources {sorted(mics)}")
+
+        self._publisher = publisher
+        # Threads of the pool are started on demand
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(mics) * 2,
+                                            thread_name_prefix="cltl.backend")
+        self._services = {name: AudioBackendService(topics[name], mic, storage, publisher if publisher else event_bus,
+                                                    executor=self._executor, **options)
+                          for name, mic in mics.items()}
+
+        required = sum(service.workers for service in self._services.values())
+        if max_workers is not None and max_workers < required:
+            raise ValueError(f"The thread pool needs at least {required} workers for {len(mics)} sources, "
+                             f"was {max_workers}")
+        self._running = False
+
+    @property
+    def app(self):
+        return None
+
+    @property
+    def services(self) -> Dict[str, AudioBackendService]:
+        return dict(self._services)
+
+    def start(self):
+        if self._running:
+            raise ValueError("Already started")
+
+        self._running = True
+        if self._publisher:
+            self._publisher.start()
+        for service in self._services.values():
+            service.start()
+
+    def stop(self):
+        """
+        Stop all sources and shut down the thread pool, the service cannot be restarted.
+        """
+        if not self._running:
+            return
+
+        for name, service in self._services.items():
+            try:
+                service.stop()
+            except Exception as e:
+                logger.warning("Failed to stop audio source %s: %s", name, e)
+        if self._publisher:
+            self._publisher.stop()
+        self._executor.shutdown()
+        self._running = False
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        The metrics of the services by source name, and the metrics of the shared publisher under `events`.
+        """
+        metrics = {name: service.metrics for name, service in self._services.items()}
+        if self._publisher:
+            metrics["events"] = self._publisher.metrics
+
+        return metrics
+
+
+class VideoBackendService:
+    @classmethod
+    def from_config(cls, image_source: ImageSource, storage: ImageStorage, event_bus: EventBus,
+                    config_manager: ConfigurationManager):
+        config = config_manager.get_config("cltl.backend.video")
+
+        options = {}
+        if "fps" in config:
+            options["fps"] = config.get_float("fps")
+        if "change_threshold" in config:
+            options["change_threshold"] = config.get_float("change_threshold")
+        if "thumbnail" in config:
+            options["thumbnail_size"] = config.get_int("thumbnail")
+
+        return cls(config.get("topic"), image_source, storage, event_bus, **options)
+
+    def __init__(self, topic: str, image_source: ImageSource, storage: ImageStorage, event_bus: EventBus,
+                 fps: float = 1.0, change_threshold: float = 2.0, thumbnail_size: int = 32):
+        """
+        Capture images periodically, store them and publish an :class:`ImageSignalEvent` for each stored image.
+
+        Images that did not change compared to the last stored image are skipped. To detect changes, the images
+        are compared by the mean absolute difference of downsampled grayscale thumbnails.
+
+        Parameters
+        ----------
+        topic : str
+            The topic to publish the image signal events to
+        image_source : ImageSource
+            The source of the images
+        storage : ImageStorage
+            The storage for the images
+        event_bus : EventBus
+            The event bus to publish the events
+        fps : float
+            The number of images captured per second
+        change_threshold : float
+            The minimal mean absolute difference of the thumbnails in intensity levels (0-255) to store an image,
+            `0` to store all images
+        thumbnail_size : int
+            The width of the thumbnails used to detect changes
+        """
+        self._topic = topic
+        self._image_source = image_source
+        self._storage = storage
+        self._event_bus = event_bus
+        self._interval = 1 / fps
+        self._change_threshold = change_threshold
+        self._thumbnail_size = thumbnail_size
+
+        self._stopped = ThreadingEvent()
+        self._thread = None
+
+        self._captured = Counter()
+        self._skipped = Counter()
+        self._stored = Counter()
+        self._capture_time = Histogram()
+
+    @property
+    def app(self):
+        return None
+
+    def start(self):
+        if self._thread:
+            raise ValueError("Already started")
+
+        self._stopped.clear()
+        self._thread = Thread(name="cltl.backend.video", target=self._run)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        last = None
+        with self._image_source as source:
+            while not self._stopped.is_set():
+                start = time.monotonic()
+                try:
+                    timestamp = time.time()
+                    image = source.capture()
+                    self._capture_time.observe(time.monotonic() - start)
+                    self._captured.inc()
+
+                    thumbnail = self._thumbnail(image)
+                    if self._changed(last, thumbnail):
+                        self._store(timestamp, image)
+                        last = thumbnail
+                    else:
+                        self._skipped.inc()
+                except Exception as e:
+                    logger.warning("Failed to capture image: %s", e)
+
+                self._stopped.wait(max(0.0, self._interval - (time.monotonic() - start)))
+
+    def _thumbnail(self, image: Image) -> np.ndarray:
+        height, width = image.image.shape[:2]
+        size = (self._thumbnail_size, max(1, round(self._thumbnail_size * height / width)))
+        thumbnail = cv2.resize(image.image, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+        return thumbnail.mean(axis=2) if thumbnail.ndim == 3 else thumbnail
+
+    def _changed(self, last: Optional[np.ndarray], thumbnail: np.ndarray) -> bool:
+        if last is None or last.shape != thumbnail.shape or self._change_threshold <= 0:
+            return True
+
+        return float(np.mean(np.abs(thumbnail - last))) >= self._change_threshold
+
+    def _store(self, timestamp: float, image: Image):
+        image_id = str(uuid.uuid4())
+        self._storage.store(image_id, image)
+        self._stored.inc()
+
+        files = [f"cltl-storage:video/{image_id}"]
+        event = Event.for_payload(ImageSignalEvent.create(image_id, timestamp, files, image.bounds))
+        self._event_bus.publish(self._topic, event)
+        logger.debug("Stored image %s", image_id)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Images captured, skipped as unchanged and stored, and the time to capture an image.
+        """
+        return snapshot({"captured": self._captured, "skipped": self._skipped, "stored": self._stored,
+                         "capture_time": self._capture_time})
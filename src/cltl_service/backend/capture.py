@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+
+from cltl.backend.api.metrics import Counter, Gauge, Histogram, snapshot
+from cltl.backend.api.microphone import AudioParameters
+from cltl_service.backend.publisher import BLOCK, DROP
+
+logger = logging.getLogger(__name__)
+
+
+_BEGIN = object()
+_END = object()
+_CLOSE = object()
+
+
+class CaptureBuffer:
+    def __init__(self, max_frames: int, policy: str = BLOCK):
+        """
+        Bounded buffer between the capture of audio from the microphone and its persistence.
+
+        The capturing thread adds the frames of a listen session between :meth:`begin` and :meth:`end`, the
+        persisting thread reads the sessions with :meth:`session`. Only frames count towards the capacity of the
+        buffer, session boundaries are always accepted.
+
+        Parameters
+        ----------
+        max_frames : int
+            The maximum number of frames in the buffer
+        policy : str
+            The policy if the buffer is full, `block` to wait until the persisting thread caught up, `drop` to
+            discard the frame
+        """
+        if policy not in (BLOCK, DROP):
+            raise ValueError(f"Unsupported policy: {policy}, expected one of {BLOCK}, {DROP}")
+        if max_frames < 1:
+            raise ValueError(f"Buffer size must be positive, was {max_frames}")
+
+        self._max_frames = max_frames
+        self._policy = policy
+        self._items = deque()
+        self._frames = 0
+        self._closed = False
+        self._available = threading.Condition()
+
+        self._captured = Counter()
+        self._persisted = Counter()
+        self._dropped = Counter()
+        self._backlog = Gauge()
+        self._delay = Histogram()
+
+    def begin(self, parameters: AudioParameters):
+        self._append((_BEGIN, parameters))
+
+    def end(self):
+        self._append((_END, None))
+
+    def close(self):
+        """
+        Mark the end of the captured audio, the persisting thread finishes the buffered sessions.
+        """
+        with self._available:
+            self._closed = True
+            self._items.append((_CLOSE, None))
+            self._available.notify_all()
+
+    def put(self, frame: np.ndarray) -> bool:
+        """
+        Add a frame to the current session.
+
+        Returns
+        -------
+        bool
+            `False` if the frame was dropped.
+        """
+        with self._available:
+            if self._frames >= self._max_frames:
+                if self._policy == DROP:
+                    self._dropped.inc()
+                    return False
+
+                self._available.wait_for(lambda: self._frames < self._max_frames or self._closed)
+
+            self._items.append((frame, time.monotonic()))
+            self._frames += 1
+            self._backlog.set(self._frames)
+            self._available.notify_all()
+
+        self._captured.inc()
+
+        return True
+
+    def _append(self, item):
+        with self._available:
+            self._items.append(item)
+            self._available.notify_all()
+
+    def _take(self):
+        with self._available:
+            self._available.wait_for(lambda: self._items)
+            item, queued = self._items.popleft()
+            if not any(item is marker for marker in (_BEGIN, _END, _CLOSE)):
+                self._frames -= 1
+                self._backlog.set(self._frames)
+                self._available.notify_all()
+
+        return item, queued
+
+    def session(self) -> Optional[AudioParameters]:
+        """
+        Wait for the next session.
+
+        Returns
+        -------
+        AudioParameters
+            The parameters of the session, `None` if the buffer is closed.
+        """
+        while True:
+            item, parameters = self._take()
+            if item is _CLOSE:
+                return None
+            if item is _BEGIN:
+                return parameters
+
+    def frames(self) -> Iterator[np.ndarray]:
+        """
+        The frames of the current session.
+        """
+        while True:
+            item, queued = self._take()
+            if item is _END:
+                return
+            if item is _CLOSE:
+                # Keep the close marker for session()
+                with self._available:
+                    self._items.appendleft((_CLOSE, None))
+                return
+
+            self._persisted.inc()
+            self._delay.observe(time.monotonic() - queued)
+
+            yield item
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Frames captured, persisted and dropped, the current and maximum number of buffered frames and the delay
+        of frames in the buffer.
+        """
+        return snapshot({"captured": self._captured, "persisted": self._persisted, "dropped": self._dropped,
+                         "backlog": self._backlog, "delay": self._delay})
@@ -0,0 +1,322 @@
+"""
+Compact binary serialization of events with backend signal payloads.
+
+Events are encoded in a tagged binary format similar to MessagePack. Instances of the registered dataclasses
+(the signal events of :mod:`cltl_service.backend.schema`, their nested values and the :class:`Event` envelope) are
+encoded as a type code followed by their field values in declaration order, i.e. without field names. Other
+objects are encoded with their attribute names and decoded as :class:`SimpleNamespace`, like by the JSON
+serialization of the event bus.
+
+Unlike the JSON serialization, which decodes all objects as :class:`SimpleNamespace`, the registered dataclasses
+and enums (e.g. :class:`Modality`) are decoded as instances of their class. Consumers that access the payload by
+attribute work with both, but should not rely on the type of the decoded objects.
+
+Each message starts with a header of a magic byte, the format version and flags. Payloads larger than a
+threshold are compressed with zlib, smaller payloads are sent uncompressed.
+"""
+import dataclasses
+import enum
+import json
+import logging
+import struct
+import zlib
+from types import SimpleNamespace
+from typing import Any, Dict, Type
+
+import numpy as np
+from cltl.combot.infra.config import ConfigurationManager
+from cltl.combot.infra.event import Event, EventBus, EventMetadata
+from emissor.representation.scenario import Modality
+
+from cltl.backend.api.camera import Bounds
+from cltl.backend.api.microphone import AudioParameters
+from cltl_service.backend.schema import TextSignalEvent, AudioSignalStarted, AudioSignalStopped, \
+    AudioSignalProgress, ImageSignalEvent
+
+logger = logging.getLogger(__name__)
+
+
+EVENT_MIME_TYPE = "application/x-cltl-event"
+
+BINARY = "binary"
+JSON = "json"
+BINARY_SERIALIZER = "cltl-binary"
+JSON_SERIALIZER = "cltl-json"
+
+MAGIC = 0xCE
+VERSION = 1
+
+_HEADER = struct.Struct("<BBB")
+_FLAG_COMPRESSED = 0x01
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _MAP, _ENUM, _DATACLASS, _OBJECT, _BYTES, _NDARRAY = range(13)
+
+_FLOAT64 = struct.Struct("<d")
+
+# Type codes are part of the format, append new types and never reorder
+_TYPES = (Event, EventMetadata, TextSignalEvent, AudioSignalStarted, AudioSignalStopped, AudioSignalProgress,
+          ImageSignalEvent, AudioParameters, Bounds)
+_TYPE_CODES: Dict[Type, int] = {cls: code for code, cls in enumerate(_TYPES)}
+_FIELDS = {cls: tuple(field.name for field in dataclasses.fields(cls)) for cls in _TYPES}
+
+_ENUMS = (Modality,)
+_ENUM_CODES: Dict[Type, int] = {cls: code for code, cls in enumerate(_ENUMS)}
+
+
+def encode(obj: Any, compress_threshold: int = 1024) -> bytes:
+    """
+    Encode an object, typically an :class:`Event`, in the binary format.
+
+    Parameters
+    ----------
+    obj : Any
+        The object to encode
+    compress_threshold : int
+        The minimum size in bytes of the encoded object to compress it, negative to disable compression
+
+    Returns
+    -------
+    bytes
+        The encoded object.
+    """
+    buffer = bytearray()
+    _encode(obj, buffer)
+
+    if 0 <= compress_threshold <= len(buffer):
+        compressed = zlib.compress(buffer)
+        if len(compressed) < len(buffer):
+            return _HEADER.pack(MAGIC, VERSION, _FLAG_COMPRESSED) + compressed
+
+    return _HEADER.pack(MAGIC, VERSION, 0) + bytes(buffer)
+
+
+def decode(data: bytes) -> Any:
+    """
+    Decode an object encoded with :func:`encode`.
+
+    Raises
+    ------
+    ValueError
+        If the data is not in the binary format or was encoded with an unsupported version.
+    """
+    data = memoryview(data)
+    if len(data) < _HEADER.size:
+        raise ValueError("Data too short for an encoded event")
+
+    magic, version, flags = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Data is not an encoded event (magic byte {magic:#x})")
+    if version != VERSION:
+        raise ValueError(f"Unsupported event format version {version}, expected {VERSION}")
+
+    body = data[_HEADER.size:]
+    if flags & _FLAG_COMPRESSED:
+        body = memoryview(zlib.decompress(body))
+
+    obj, offset = _decode(body, 0)
+    if offset != len(body):
+        raise ValueError(f"Unexpected trailing data after {offset} of {len(body)} bytes")
+
+    return obj
+
+
+def register_kombu_serializer(name: str = BINARY_SERIALIZER, compress_threshold: int = 1024):
+    """
+    Register the binary format as serializer for :mod:`kombu`.
+
+    Compression is part of the format, the event bus should be configured without compression.
+    """
+    from kombu.serialization import register
+
+    register(name, lambda obj: encode(obj, compress_threshold), decode,
+             content_type=EVENT_MIME_TYPE, content_encoding='binary')
+
+
+def kombu_event_bus(config_manager: ConfigurationManager) -> EventBus:
+    """
+    Create a kombu event bus with the serializer selected in the `cltl.event.kombu` configuration.
+
+    The `serializer` key selects `json` (default) for the JSON serialization of
+    :class:`~cltl.combot.infra.event.kombu.KombuEventBusContainer` or `binary` for the binary format. The optional
+    `compress_threshold` key sets the minimum size of binary encoded events to compress them.
+
+    Consumers of the event bus only accept messages in their own serialization, the binary format can only be
+    enabled if all services on the event bus use it.
+    """
+    from kombu.serialization import register
+    from cltl.combot.infra.event.kombu import KombuEventBus
+
+    config = config_manager.get_config("cltl.event.kombu")
+    serializer = config.get("serializer") if "serializer" in config else JSON
+
+    if serializer == BINARY:
+        if config.get("compression"):
+            logger.warning("Compression (%s) of the event bus is redundant for the binary format",
+                           config.get("compression"))
+
+        options = {}
+        if "compress_threshold" in config:
+            options["compress_threshold"] = config.get_int("compress_threshold")
+        register_kombu_serializer(BINARY_SERIALIZER, **options)
+
+        return KombuEventBus(BINARY_SERIALIZER, config_manager)
+
+    if serializer == JSON:
+        register(JSON_SERIALIZER,
+                 lambda x: json.dumps(x, default=vars),
+                 lambda x: json.loads(x, object_hook=lambda d: SimpleNamespace(**d)),
+                 content_type='application/json',
+                 content_encoding='utf-8')
+
+        return KombuEventBus(JSON_SERIALIZER, config_manager)
+
+    raise ValueError(f"Unsupported serializer: {serializer}, expected one of {BINARY}, {JSON}")
+
+
+def _write_uint(value: int, buffer: bytearray):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_uint(data: memoryview, offset: int):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def _write_bytes(value: bytes, buffer: bytearray):
+    _write_uint(len(value), buffer)
+    buffer += value
+
+
+def _read_bytes(data: memoryview, offset: int):
+    length, offset = _read_uint(data, offset)
+
+    return data[offset:offset + length], offset + length
+
+
+def _encode(obj: Any, buffer: bytearray):
+    if obj is None:
+        buffer.append(_NONE)
+    elif obj is True or obj is False or isinstance(obj, np.bool_):
+        buffer.append(_TRUE if obj else _FALSE)
+    elif isinstance(obj, (int, np.integer)) and not isinstance(obj, enum.Enum):
+        # Zigzag encoding of signed integers
+        value = int(obj)
+        buffer.append(_INT)
+        _write_uint(value << 1 if value >= 0 else (-value << 1) - 1, buffer)
+    elif isinstance(obj, (float, np.floating)):
+        buffer.append(_FLOAT)
+        buffer += _FLOAT64.pack(obj)
+    elif isinstance(obj, str):
+        buffer.append(_STR)
+        _write_bytes(obj.encode("utf-8"), buffer)
+    elif isinstance(obj, (bytes, bytearray)):
+        buffer.append(_BYTES)
+        _write_bytes(obj, buffer)
+    elif isinstance(obj, (list, tuple)):
+        buffer.append(_LIST)
+        _write_uint(len(obj), buffer)
+        for item in obj:
+            _encode(item, buffer)
+    elif isinstance(obj, dict):
+        buffer.append(_MAP)
+        _write_uint(len(obj), buffer)
+        for key, value in obj.items():
+            _encode(key, buffer)
+            _encode(value, buffer)
+    elif type(obj) in _ENUM_CODES:
+        buffer.append(_ENUM)
+        _write_uint(_ENUM_CODES[type(obj)], buffer)
+        _encode(obj.value, buffer)
+    elif type(obj) in _TYPE_CODES:
+        buffer.append(_DATACLASS)
+        _write_uint(_TYPE_CODES[type(obj)], buffer)
+        for name in _FIELDS[type(obj)]:
+            _encode(getattr(obj, name), buffer)
+    elif isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        buffer.append(_NDARRAY)
+        _write_bytes(array.dtype.str.encode("ascii"), buffer)
+        _encode(array.shape, buffer)
+        _write_bytes(array.tobytes(), buffer)
+    elif hasattr(obj, "__dict__"):
+        buffer.append(_OBJECT)
+        attributes = vars(obj)
+        _write_uint(len(attributes), buffer)
+        for key, value in attributes.items():
+            _write_bytes(key.encode("utf-8"), buffer)
+            _encode(value, buffer)
+    else:
+        raise ValueError(f"Unsupported type {type(obj)}")
+
+
+def _decode(data: memoryview, offset: int):
+    tag = data[offset]
+    offset += 1
+
+    if tag == _NONE:
+        return None, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _INT:
+        value, offset = _read_uint(data, offset)
+        return (value >> 1) ^ -(value & 1), offset
+    if tag == _FLOAT:
+        return _FLOAT64.unpack_from(data, offset)[0], offset + _FLOAT64.size
+    if tag == _STR:
+        value, offset = _read_bytes(data, offset)
+        return str(value, "utf-8"), offset
+    if tag == _BYTES:
+        value, offset = _read_bytes(data, offset)
+        return bytes(value), offset
+    if tag == _LIST:
+        length, offset = _read_uint(data, offset)
+        items = []
+        for _ in range(length):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == _MAP:
+        length, offset = _read_uint(data, offset)
+        items = {}
+        for _ in range(length):
+            key, offset = _decode(data, offset)
+            items[key], offset = _decode(data, offset)
+        return items, offset
+    if tag == _ENUM:
+        code, offset = _read_uint(data, offset)
+        value, offset = _decode(data, offset)
+        return _ENUMS[code](value), offset
+    if tag == _DATACLASS:
+        code, offset = _read_uint(data, offset)
+        cls = _TYPES[code]
+        values = []
+        for _ in _FIELDS[cls]:
+            value, offset = _decode(data, offset)
+            values.append(value)
+        return cls(*values), offset
+    if tag == _NDARRAY:
+        dtype, offset = _read_bytes(data, offset)
+        shape, offset = _decode(data, offset)
+        value, offset = _read_bytes(data, offset)
+        return np.frombuffer(value, dtype=np.dtype(str(dtype, "ascii"))).reshape(shape).copy(), offset
+    if tag == _OBJECT:
+        length, offset = _read_uint(data, offset)
+        attributes = {}
+        for _ in range(length):
+            key, offset = _read_bytes(data, offset)
+            attributes[str(key, "utf-8")], offset = _decode(data, offset)
+        return SimpleNamespace(**attributes), offset
+
+    raise ValueError(f"Unknown tag {tag} at offset {offset - 1}")
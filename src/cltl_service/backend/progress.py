@@ -0,0 +1,110 @@
+import logging
+import threading
+from typing import Dict, Tuple
+
+from cltl.combot.infra.event import EventBus, Event
+
+from cltl.backend.api.metrics import Counter, snapshot
+from cltl_service.backend.schema import AudioSignalProgress
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressPublisher:
+    def __init__(self, event_bus: EventBus, topic: str, interval: float):
+        """
+        Publish :class:`AudioSignalProgress` events for in-flight recordings.
+
+        Recordings report their progress on every frame, the reports are coalesced and only the latest progress
+        of each recording is published once per interval. The number of events published per interval is
+        therefore bounded by the number of concurrent recordings, independent of their frame rate.
+
+        Parameters
+        ----------
+        event_bus : EventBus
+            The event bus to publish the events
+        topic : str
+            The topic to publish the events to
+        interval : float
+            The interval in seconds between progress events of a recording
+        """
+        self._event_bus = event_bus
+        self._topic = topic
+        self._interval = interval
+
+        self._pending: Dict[str, Tuple[float, int]] = {}
+        self._active = set()
+        self._lock = threading.Lock()
+        # Serializes publication with finish(), such that no progress is published after a recording finished
+        self._publishing = threading.Lock()
+
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._updates = Counter()
+        self._published = Counter()
+
+    def start(self):
+        if self._thread:
+            raise ValueError("Already started")
+
+        self._stopped.clear()
+        self._thread = threading.Thread(name="cltl.backend.progress", target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def update(self, signal_id: str, timestamp: float, length: int):
+        """
+        Report the progress of a recording.
+
+        Parameters
+        ----------
+        signal_id : str
+            The id of the recorded signal
+        timestamp : float
+            The timestamp of the end of the audio recorded so far
+        length : int
+            The number of samples recorded so far
+        """
+        with self._lock:
+            self._active.add(signal_id)
+            self._pending[signal_id] = (timestamp, length)
+        self._updates.inc()
+
+    def finish(self, signal_id: str):
+        """
+        Discard pending progress of a recording.
+
+        Progress of the recording that is published concurrently is published before this method returns.
+        """
+        with self._publishing, self._lock:
+            self._active.discard(signal_id)
+            self._pending.pop(signal_id, None)
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            for signal_id, (timestamp, length) in pending.items():
+                with self._publishing:
+                    with self._lock:
+                        if signal_id not in self._active:
+                            continue
+                    try:
+                        progress = AudioSignalProgress.create(signal_id, timestamp, length)
+                        self._event_bus.publish(self._topic, Event.for_payload(progress))
+                        self._published.inc()
+                    except Exception as e:
+                        logger.warning("Failed to publish progress of %s: %s", signal_id, e)
+
+    @property
+    def metrics(self):
+        return snapshot({"updates": self._updates, "published": self._published})
@@ -0,0 +1,179 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from cltl.combot.infra.config import ConfigurationManager
+from cltl.combot.infra.event import EventBus, Event
+
+from cltl.backend.api.metrics import Counter, Gauge, Histogram, snapshot
+
+logger = logging.getLogger(__name__)
+
+
+BLOCK = "block"
+DROP = "drop"
+
+_STOP = object()
+
+
+class AsyncEventPublisher:
+    @classmethod
+    def from_config(cls, event_bus: EventBus, config_manager: ConfigurationManager) -> Optional["AsyncEventPublisher"]:
+        """
+        Create a publisher from the `cltl.backend.events` configuration.
+
+        Returns
+        -------
+        AsyncEventPublisher
+            The publisher, `None` if asynchronous publishing is not configured.
+        """
+        if not config_manager.has_config("cltl.backend.events"):
+            return None
+
+        config = config_manager.get_config("cltl.backend.events")
+        if "async" in config and not config.get_boolean("async"):
+            return None
+
+        options = {}
+        if "queue_size" in config:
+            options["queue_size"] = config.get_int("queue_size")
+        if "batch_size" in config:
+            options["batch_size"] = config.get_int("batch_size")
+        if "workers" in config:
+            options["workers"] = config.get_int("workers")
+        if "policy" in config:
+            options["policy"] = config.get("policy")
+
+        return cls(event_bus, **options)
+
+    def __init__(self, event_bus: EventBus, queue_size: int = 256, batch_size: int = 16, workers: int = 1,
+                 policy: str = BLOCK):
+        """
+        Publish events to the event bus from background threads.
+
+        Events are queued and published by worker threads, such that a slow event bus does not stall the
+        publishing thread. Events of the same signal are published by the same worker in the order in which they
+        were queued, events of different signals may be published in a different order. Events without a
+        `signal_id` in their payload are ordered per topic.
+
+        Workers take up to `batch_size` events from their queue at once, which reduces the synchronization
+        overhead if events are queued faster than they are published.
+
+        Parameters
+        ----------
+        event_bus : EventBus
+            The event bus to publish the events
+        queue_size : int
+            The maximum number of queued events per worker
+        batch_size : int
+            The maximum number of events a worker takes from its queue at once
+        workers : int
+            The number of worker threads
+        policy : str
+            The policy if the queue of a worker is full, `block` to wait until the worker has capacity or `drop`
+            to discard the event
+        """
+        if policy not in (BLOCK, DROP):
+            raise ValueError(f"Unsupported policy: {policy}, expected one of {BLOCK}, {DROP}")
+        if workers < 1 or batch_size < 1:
+            raise ValueError(f"Workers ({workers}) and batch size ({batch_size}) must be positive")
+
+        self._event_bus = event_bus
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._workers = workers
+        self._policy = policy
+
+        self._queues: List[queue.Queue] = []
+        self._threads: List[threading.Thread] = []
+
+        self._queued = Counter()
+        self._published = Counter()
+        self._dropped = Counter()
+        self._failed = Counter()
+        self._queue_depth = Gauge()
+        self._batch = Histogram()
+        self._latency = Histogram()
+
+    def start(self):
+        if self._threads:
+            raise ValueError("Already started")
+
+        self._queues = [queue.Queue(self._queue_size) for _ in range(self._workers)]
+        self._threads = [threading.Thread(name=f"cltl.backend.publisher-{idx}", target=self._run, args=(events,),
+                                          daemon=True)
+                         for idx, events in enumerate(self._queues)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Publish the queued events and stop the workers.
+        """
+        if not self._threads:
+            return
+
+        for events in self._queues:
+            events.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+        self._threads = []
+        self._queues = []
+
+    def publish(self, topic: str, event: Event):
+        """
+        Queue an event for publication.
+
+        Depending on the policy, blocks if the queue is full or discards the event.
+        """
+        if not self._queues:
+            raise ValueError("Publisher is not running")
+
+        key = getattr(event.payload, "signal_id", None) or topic
+        events = self._queues[hash(key) % len(self._queues)]
+        try:
+            events.put((topic, event, time.monotonic()), block=self._policy == BLOCK)
+        except queue.Full:
+            self._dropped.inc()
+            logger.warning("Dropped event %s on %s, the publisher queue is full", event.id, topic)
+            return
+
+        self._queued.inc()
+        self._queue_depth.set(sum(events.qsize() for events in self._queues))
+
+    def _run(self, events: queue.Queue):
+        while True:
+            batch = [events.get()]
+            while len(batch) < self._batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(events.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._batch.observe(len(batch))
+            for item in batch:
+                if item is _STOP:
+                    return
+                self._publish(*item)
+
+    def _publish(self, topic: str, event: Event, queued: float):
+        try:
+            self._event_bus.publish(topic, event)
+            self._published.inc()
+        except Exception as e:
+            self._failed.inc()
+            logger.warning("Failed to publish event %s on %s: %s", event.id, topic, e)
+        finally:
+            self._latency.observe(time.monotonic() - queued)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        metrics = snapshot({"queued": self._queued, "published": self._published, "dropped": self._dropped,
+                            "failed": self._failed, "queue_depth": self._queue_depth, "batch": self._batch,
+                            "latency": self._latency})
+        metrics["queue_depth"]["value"] = sum(events.qsize() for events in list(self._queues))
+
+        return metrics
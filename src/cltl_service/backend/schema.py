@@ -3,6 +3,7 @@ from typing import List
 
 from emissor.representation.scenario import Modality
 
+from cltl.backend.api.camera import Bounds
 from cltl.backend.api.storage import AudioParameters
 
 
@@ -50,3 +51,21 @@ class AudioSignalStopped(SignalStopped):
     @classmethod
     def create(cls, signal_id: str, timestamp: float, length: int):
         return cls(cls.__name__, signal_id, timestamp, Modality.AUDIO, None, length)
+
+
+@dataclass
+class AudioSignalProgress(SignalEvent):
+    length: int
+
+    @classmethod
+    def create(cls, signal_id: str, timestamp: float, length: int):
+        return cls(cls.__name__, signal_id, timestamp, Modality.AUDIO, None, length)
+
+
+@dataclass
+class ImageSignalEvent(SignalEvent):
+    bounds: Bounds
+
+    @classmethod
+    def create(cls, signal_id: str, timestamp: float, files: List[str], bounds: Bounds):
+        return cls(cls.__name__, signal_id, timestamp, Modality.IMAGE, files, bounds)
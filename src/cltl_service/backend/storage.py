@@ -7,6 +7,7 @@ from flask.json import JSONEncoder
 
 from cltl.backend.api.camera import CameraResolution
 from cltl.backend.api.storage import AudioStorage, ImageStorage
+from cltl.backend.api.image_codec import IMAGE_MIME_TYPE, image_to_raw
 from cltl.backend.api.util import np_to_raw_frames
 
 
@@ -19,6 +20,10 @@ class NumpyJSONEncoder(JSONEncoder):
         return super().default(obj)
 
 
+def _as_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
 class StorageService:
     def __init__(self, storage_audio: AudioStorage, storage_image: ImageStorage):
         self._storage_audio = storage_audio
@@ -48,9 +53,10 @@ class StorageService:
             """
             Get the audio data for the requested id.
 
-            The request can have `offset` and `length` as parameters.
+            The request can have `offset`, `length` and `timestamps` as parameters.
             * `offset` must be the start sample of the audio
             * `length` must be the number of samples returned
+            * `timestamps` if true, each frame is prefixed with its capture timestamp and sequence number
 
             Parameters
             ----------
@@ -59,10 +65,12 @@ class StorageService:
             Returns
             -------
             Response
-                Response with the audio data, eventually chunked. Contains sample rate and chunk size in the headers.
+                Response with the audio data, eventually chunked. Contains sample rate, chunk size and offset in
+                the headers, the offset allows clients to resume an interrupted stream.
             """
             offset = request.args.get("offset", default=0, type=int)
             length = request.args.get("length", default=-1, type=int)
+            timestamps = request.args.get("timestamps", default=False, type=_as_bool)
 
             audio, parameters = self._storage_audio.get(audio_id, offset=offset, length=length)
 
@@ -72,9 +80,12 @@ class StorageService:
             mime_type = f"audio/L16;" \
                         f"rate={parameters.sampling_rate};" \
                         f"channels={parameters.channels};" \
-                        f"frame_size={parameters.frame_size}"
+                        f"frame_size={parameters.frame_size};" \
+                        f"offset={offset}"
+            if timestamps:
+                mime_type += ";timestamps=1"
 
-            stream = stream_with_context(np_to_raw_frames(audio))
+            stream = stream_with_context(np_to_raw_frames(audio, timestamps=timestamps))
 
             return self._app.response_class(stream, mimetype=mime_type)
 
@@ -92,7 +103,27 @@ class StorageService:
 
         @self._app.route(f"/{Modality.VIDEO.name.lower()}/<image_id>")
         def get_image(image_id: str):
-            image = self._storage_image.get(image_id)
+            """
+            Get the image for the requested id.
+
+            The request can have a `resolution` parameter with the name of a :class:`CameraResolution`, the
+            smallest image stored at a resolution at least as large is returned, by default the full image.
+            """
+            resolution = request.args.get("resolution", default=None)
+            if resolution is not None:
+                try:
+                    resolution = CameraResolution[resolution.upper()]
+                except KeyError:
+                    return Response(f"Unsupported resolution: {resolution}", status=400)
+
+            image = self._storage_image.get(image_id, resolution=resolution)
+
+            # Binary images only if explicitly accepted by the client
+            if IMAGE_MIME_TYPE in request.headers.get("Accept", ""):
+                parts = image_to_raw(image)
+                return Response((bytes(part) for part in parts),
+                                content_type=f"{IMAGE_MIME_TYPE}; resolution={image.resolution.name}",
+                                headers={"Content-Length": str(sum(len(part) for part in parts))})
 
             response = jsonify(image)
             response.headers['Content-Type'] = f"application/json; resolution={image.resolution.name}"
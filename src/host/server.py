@@ -8,8 +8,10 @@ from flask import g as app_context
 from flask.json import JSONEncoder
 
 from cltl.backend.api.camera import CameraResolution
-from cltl.backend.source.cv2_source import SystemImageSource
-from cltl.backend.source.pyaudio_source import PyAudioSource
+from cltl.backend.api.image_codec import IMAGE_MIME_TYPE, image_to_raw
+from cltl.backend.api.util import np_to_raw_frames
+from cltl.backend.spi.audio import AudioSource
+from cltl.backend.spi.image import ImageSource
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +25,35 @@ class NumpyJSONEncoder(JSONEncoder):
         return super().default(obj)
 
 
+def _as_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
 class BackendServer:
     def __init__(self, sampling_rate: int, channels: int, frame_size: int,
-                 camera_resolution: CameraResolution, camera_index: int):
-        self._mic = PyAudioSource(sampling_rate, channels, frame_size)
-        self._camera = SystemImageSource(camera_resolution, camera_index)
-
-        self._sampling_rate = sampling_rate
-        self._channels = channels
-        self._frame_size = frame_size
+                 camera_resolution: CameraResolution, camera_index: int,
+                 audio_source: AudioSource = None, image_source: ImageSource = None):
+        """
+        Server for audio and video from the host machine.
+
+        By default audio and video are captured from the system microphone and camera. Alternative sources,
+        e.g. replayed or synthetic ones, can be provided with `audio_source` and `image_source`, in which case
+        the audio parameters and camera settings are taken from the respective source.
+        """
+        # Import device sources only when used, to be able to run the server without audio and video devices
+        if not audio_source:
+            from cltl.backend.source.pyaudio_source import PyAudioSource
+            audio_source = PyAudioSource(sampling_rate, channels, frame_size)
+        if not image_source:
+            from cltl.backend.source.cv2_source import SystemImageSource
+            image_source = SystemImageSource(camera_resolution, camera_index)
+
+        self._mic = audio_source
+        self._camera = image_source
+
+        self._sampling_rate = self._mic.rate
+        self._channels = self._mic.channels
+        self._frame_size = self._mic.frame_size
 
         self._app = None
 
@@ -53,6 +75,13 @@ class BackendServer:
             with self._camera as camera:
                 image = camera.capture()
 
+            # Binary images only if explicitly accepted by the client
+            if IMAGE_MIME_TYPE in flask.request.headers.get("Accept", ""):
+                parts = image_to_raw(image)
+                return Response((bytes(part) for part in parts),
+                                content_type=f"{IMAGE_MIME_TYPE}; resolution={self._camera.resolution.name}",
+                                headers={"Content-Length": str(sum(len(part) for part in parts))})
+
             response = jsonify(image)
             response.headers["Content-Type"] = mimetype_with_resolution
 
@@ -60,18 +89,26 @@ class BackendServer:
 
         @self._app.route(f"/{Modality.AUDIO.name.lower()}")
         def stream_mic():
+            timestamps = flask.request.args.get("timestamps", default=False, type=_as_bool)
+
             def audio_stream(mic):
                 with self._mic as mic_stream:
-                    yield from mic_stream
+                    yield from np_to_raw_frames(mic_stream.audio, timestamps=timestamps)
 
             # Store mic in (thread-local) app-context to be able to close it.
             app_context.mic = self._mic
 
             mime_type = f"audio/L16; rate={self._sampling_rate}; channels={self._channels}; frame_size={self._frame_size}"
+            if timestamps:
+                mime_type += "; timestamps=1"
             stream = stream_with_context(audio_stream(self._mic))
 
             return Response(stream, mimetype=mime_type)
 
+        @self._app.route("/metrics")
+        def metrics():
+            return jsonify({Modality.AUDIO.name.lower(): getattr(self._mic, "metrics", {})})
+
         @self._app.after_request
         def set_cache_control(response):
             response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
@@ -87,5 +124,11 @@ class BackendServer:
 
         return self._app
 
-    def run(self, host: str, port: int):
-        self.app.run(host=host, port=port)
+    def run(self, host: str, port: int, unix_socket: str = None):
+        """
+        Run the server on `host` and `port`, or on a Unix domain socket if `unix_socket` is set.
+        """
+        if unix_socket:
+            self.app.run(host=f"unix://{unix_socket}")
+        else:
+            self.app.run(host=host, port=port)
@@ -2,6 +2,9 @@ import argparse
 import logging
 
 from cltl.backend.api.camera import CameraResolution
+from cltl.backend.source.pacing import Pacer
+from cltl.backend.source.replay_source import WavAudioSource, FileImageSource
+from cltl.backend.source.synthetic_source import SyntheticAudioSource, SyntheticImageSource
 from host.server import BackendServer
 
 logger = logging.getLogger(__name__)
@@ -21,19 +24,65 @@ def main():
                         default=2, help="Number of audio channels.")
     parser.add_argument('--frame_duration', type=int, choices=[10, 20, 30],
                         default=30, help="Duration of audio frames in milliseconds.")
+    parser.add_argument('--capture', type=str, choices=["blocking", "callback"],
+                        default="blocking", help="Audio capture mode.")
+    parser.add_argument('--buffer_frames', type=int,
+                        default=64, help="Capacity in frames of the audio buffer in callback capture mode.")
     parser.add_argument('--resolution', type=str, choices=[res.name for res in CameraResolution],
                         default=CameraResolution.NATIVE.name, help="Camera resolution to use.")
     parser.add_argument('--cam_index', type=int,
                         default=0, help="Camera index of the camera to use.")
+    parser.add_argument('--audio_file', type=str, nargs='+',
+                        help="Replay the given WAV file(s) instead of the microphone.")
+    parser.add_argument('--synthetic_audio', type=str, choices=SyntheticAudioSource.SIGNALS,
+                        help="Generate a synthetic audio signal instead of the microphone.")
+    parser.add_argument('--image_path', type=str,
+                        help="Replay images from a folder or a video file instead of the camera.")
+    parser.add_argument('--synthetic_video', type=str, choices=SyntheticImageSource.PATTERNS,
+                        help="Generate a synthetic image pattern instead of the camera.")
+    parser.add_argument('--fps', type=float,
+                        default=None, help="Frame rate of replayed or synthetic video.")
+    parser.add_argument('--speed', type=float,
+                        default=1.0, help="Speed of replayed or synthetic sources relative to real time, 0 for unthrottled.")
+    parser.add_argument('--jitter', type=float,
+                        default=0.0, help="Standard deviation in seconds of the delay of replayed or synthetic data.")
+    parser.add_argument('--dropout', type=float,
+                        default=0.0, help="Probability to drop audio frames or images of replayed or synthetic sources.")
     parser.add_argument('--port', type=int,
                         default=8000, help="Web server port")
+    parser.add_argument('--unix_socket', type=str,
+                        default=None, help="Serve on this Unix domain socket instead of the port, "
+                                           "for clients on the same machine.")
     args, _ = parser.parse_known_args()
 
     logger.info("Starting webserver with args: %s", args)
 
-    server = BackendServer(args.rate, args.channels, args.frame_duration * args.rate // 1000,
-                           CameraResolution[args.resolution.upper()], args.cam_index)
-    server.run(host="0.0.0.0", port=args.port)
+    frame_size = args.frame_duration * args.rate // 1000
+    resolution = CameraResolution[args.resolution.upper()]
+
+    def pacer():
+        return Pacer(args.speed, args.jitter, args.dropout)
+
+    audio_source = None
+    if args.audio_file:
+        audio_source = WavAudioSource(args.audio_file, frame_size, loop=True, pacer=pacer())
+    elif args.synthetic_audio:
+        audio_source = SyntheticAudioSource(args.rate, args.channels, frame_size, args.synthetic_audio,
+                                            pacer=pacer())
+    elif args.capture == "callback":
+        from cltl.backend.source.pyaudio_source import CallbackPyAudioSource
+        audio_source = CallbackPyAudioSource(args.rate, args.channels, frame_size, args.buffer_frames)
+
+    image_source = None
+    if args.image_path:
+        image_source = FileImageSource(args.image_path, resolution, args.fps, pacer=pacer())
+    elif args.synthetic_video:
+        image_source = SyntheticImageSource(resolution, args.fps if args.fps else 30, args.synthetic_video,
+                                            pacer=pacer())
+
+    server = BackendServer(args.rate, args.channels, frame_size, resolution, args.cam_index,
+                           audio_source, image_source)
+    server.run(host="0.0.0.0", port=args.port, unix_socket=args.unix_socket)
 
 
 if __name__ == '__main__':
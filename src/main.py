@@ -3,18 +3,22 @@ import logging
 
 from cltl.combot.infra.config.k8config import K8LocalConfigurationContainer
 from cltl.combot.infra.di_container import singleton
+from cltl.combot.infra.event import EventBus
 from cltl.combot.infra.event.kombu import KombuEventBusContainer
 from flask import Flask
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 from werkzeug.serving import run_simple
 
 from cltl.backend.api.microphone import Microphone
-from cltl.backend.api.storage import AudioStorage
-from cltl.backend.impl.cached_storage import CachedAudioStorage
+from cltl.backend.api.storage import AudioStorage, ImageStorage
+from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
 from cltl.backend.impl.sync_microphone import SimpleMicrophone
-from cltl.backend.source.client_source import ClientAudioSource
+from cltl.backend.source.client_source import ClientAudioSource, ClientImageSource
+from cltl.backend.source.local_transport import register_storage
 from cltl.backend.spi.audio import AudioSource
-from cltl_service.backend.backend import AudioBackendService
+from cltl.backend.spi.image import ImageSource
+from cltl_service.backend.backend import AudioBackendService, VideoBackendService
+from cltl_service.backend.event_codec import kombu_event_bus
 from cltl_service.backend.storage import StorageService
 
 logger = logging.getLogger(__name__)
@@ -27,38 +31,76 @@ K8LocalConfigurationContainer.load_configuration()
 
 
 class ApplicationContainer(KombuEventBusContainer, K8LocalConfigurationContainer):
+    @property
+    @singleton
+    def event_bus(self) -> EventBus:
+        return kombu_event_bus(self.config_manager)
+
     @property
     @singleton
     def audio_storage(self) -> AudioStorage:
         return CachedAudioStorage.from_config(self.config_manager)
 
+    @property
+    @singleton
+    def image_storage(self) -> ImageStorage:
+        return CachedImageStorage.from_config(self.config_manager)
+
     @property
     @singleton
     def audio_source(self) -> AudioSource:
         return ClientAudioSource.from_config(self.config_manager)
 
+    @property
+    @singleton
+    def image_source(self) -> ImageSource:
+        return ClientImageSource.from_config(self.config_manager)
+
     @property
     @singleton
     def microphone(self) -> Microphone:
-        return SimpleMicrophone(self.audio_source)
+        config = self.config_manager.get_config("cltl.backend.mic")
+        persistent = config.get_boolean("persistent") if "persistent" in config else False
+        preroll = config.get_int("preroll") if "preroll" in config else 0
+
+        return SimpleMicrophone(self.audio_source, persistent, max_preroll_ms=preroll)
 
     @property
     @singleton
     def backend_service(self) -> AudioBackendService:
-        return AudioBackendService(self.microphone, self.audio_storage, self.event_bus)
+        return AudioBackendService.from_config(self.microphone, self.audio_storage, self.event_bus,
+                                               self.config_manager)
+
+    @property
+    @singleton
+    def video_service(self) -> VideoBackendService:
+        return VideoBackendService.from_config(self.image_source, self.image_storage, self.event_bus,
+                                               self.config_manager)
+
+    @property
+    def video_enabled(self) -> bool:
+        config = self.config_manager.get_config("cltl.backend.video")
+
+        return config.get_boolean("enabled") if "enabled" in config else True
 
     @property
     @singleton
     def storage_service(self) -> StorageService:
-        return StorageService(self.audio_storage)
+        return StorageService(self.audio_storage, self.image_storage)
 
     def start(self):
+        # Serve cltl-storage: URLs of consumers in this process directly from the storage
+        register_storage(audio_storage=self.audio_storage, image_storage=self.image_storage)
         self.storage_service.start()
         self.backend_service.start()
+        if self.video_enabled:
+            self.video_service.start()
 
     def stop(self):
-        self.storage_service.start()
-        self.backend_service.start()
+        if self.video_enabled:
+            self.video_service.stop()
+        self.backend_service.stop()
+        self.storage_service.stop()
 
 
 if __name__ == '__main__':
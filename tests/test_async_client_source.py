@@ -0,0 +1,119 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from cltl.backend.api.camera import CameraResolution, Image
+from cltl.backend.api.microphone import AudioFrame, AudioParameters
+from cltl.backend.api.storage import STORAGE_SCHEME
+from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
+from cltl.backend.impl.sync_microphone import SimpleMicrophone
+from cltl.backend.source.cv2_source import SYSTEM_BOUNDS
+from cltl.backend.source.session import unix_socket_url
+from cltl_service.backend.storage import StorageService
+from tests.test_storage_client import ServerThread
+from tests.test_unix_transport import UnixServerThread
+
+try:
+    import aiohttp
+    from cltl.backend.source.async_client_source import AsyncClientAudioSource, AsyncClientImageSource
+except ImportError:
+    aiohttp = None
+
+
+@unittest.skipUnless(aiohttp, "aiohttp is not installed")
+class AsyncClientSourceTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.audio_storage = CachedAudioStorage(self.tmp_dir)
+        self.image_storage = CachedImageStorage(self.tmp_dir)
+        self.server = ServerThread(StorageService(self.audio_storage, self.image_storage).app, threaded=True)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.join()
+        shutil.rmtree(self.tmp_dir)
+
+    def store_audio(self, audio_id, frames=10):
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 2), dtype=np.int16), 100.0 + i * 0.03, i)
+                 for i in range(frames)]
+        self.audio_storage.store(audio_id, audio, sampling_rate=16000)
+
+        return audio
+
+    async def test_audio(self):
+        audio = self.store_audio("1")
+
+        async with AsyncClientAudioSource("http://0.0.0.0:9999/audio/1", timestamps=True) as source:
+            self.assertEqual(16000, source.rate)
+            frames = [frame async for frame in source]
+
+        np.testing.assert_array_equal(audio, frames)
+        self.assertEqual(list(range(10)), [frame.sequence for frame in frames])
+        np.testing.assert_allclose([frame.timestamp for frame in audio], [frame.timestamp for frame in frames])
+
+    async def test_concurrent_audio_streams(self):
+        recordings = {str(i): self.store_audio(str(i)) for i in range(8)}
+
+        async def read(audio_id, session):
+            async with AsyncClientAudioSource(f"{STORAGE_SCHEME}:/audio/{audio_id}", "http://0.0.0.0:9999",
+                                              offset=480, session=session) as source:
+                return [frame async for frame in source]
+
+        async with aiohttp.ClientSession() as session:
+            results = await asyncio.gather(*(read(audio_id, session) for audio_id in recordings))
+
+        for audio, frames in zip(recordings.values(), results):
+            np.testing.assert_array_equal(audio[1:], frames)
+
+    async def test_image(self):
+        resolution = CameraResolution.QQQVGA
+        image_array = np.random.randint(0, 256, (resolution.height, resolution.width, 3), dtype=np.uint8)
+        self.image_storage.store("1", Image(image_array, SYSTEM_BOUNDS))
+
+        async with AsyncClientImageSource("http://0.0.0.0:9999/video/1") as source:
+            self.assertEqual(resolution, await source.resolution())
+            images = []
+            async for image in source:
+                images.append(image)
+                if len(images) == 2:
+                    break
+
+        for image in images:
+            np.testing.assert_array_equal(image_array, image.image)
+            self.assertEqual(SYSTEM_BOUNDS, image.bounds)
+
+    async def test_listen_async_with_async_source(self):
+        audio = self.store_audio("1")
+
+        mic = SimpleMicrophone(AsyncClientAudioSource("http://0.0.0.0:9999/audio/1"))
+        mic.start()
+        try:
+            async with mic.listen_async() as (mic_audio, params):
+                frames = [frame async for frame in mic_audio]
+                parameters = params
+        finally:
+            mic.stop()
+
+        self.assertIsNone(frames[-1])
+        np.testing.assert_array_equal(audio, frames[:-1])
+        self.assertEqual(AudioParameters(16000, 2, 480, 2), parameters)
+
+    async def test_audio_over_unix_socket(self):
+        audio = self.store_audio("1")
+        socket_path = os.path.join(self.tmp_dir, "backend.sock")
+        server = UnixServerThread(StorageService(self.audio_storage, self.image_storage).app, socket_path)
+        server.start()
+
+        try:
+            async with AsyncClientAudioSource(f"{STORAGE_SCHEME}:/audio/1", unix_socket_url(socket_path)) as source:
+                frames = [frame async for frame in source]
+        finally:
+            server.shutdown()
+            server.join()
+
+        np.testing.assert_array_equal(audio, frames)
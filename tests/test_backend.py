@@ -10,11 +10,16 @@ import numpy as np
 from cltl.combot.infra.event.api import Event as CombotEvent
 from cltl.combot.infra.event.memory import SynchronousEventBus
 
-from cltl.backend.impl.cached_storage import CachedAudioStorage
+from cltl.backend.api.camera import Image, Bounds, CameraResolution
+from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
+from cltl.backend.impl.segmentation import Segmenter, EnergyVAD
 from cltl.backend.impl.sync_microphone import SimpleMicrophone
 from cltl.backend.spi.audio import AudioSource
-from cltl_service.backend.backend import AudioBackendService
-from cltl_service.backend.schema import AudioSignalStarted, AudioSignalStopped
+from cltl.backend.spi.image import ImageSource
+from cltl_service.backend.backend import AudioBackendService, MultiAudioBackendService, VideoBackendService
+from cltl_service.backend.publisher import AsyncEventPublisher
+from cltl_service.backend.schema import AudioSignalStarted, AudioSignalStopped, AudioSignalProgress, \
+    ImageSignalEvent
 
 DEBUG = 0
 
@@ -125,3 +130,269 @@ class BackendTest(unittest.TestCase):
         time.sleep(0.01)
         self.assertEqual(1, stop_event.value)
         self.assertEqual(1, start_event.value)
+
+    def test_backend_segments(self):
+        def frames(count, amplitude):
+            return [np.random.randint(-amplitude, amplitude, (480, 1), dtype=np.int16) for i in range(count)]
+
+        audio = frames(5, 10) + frames(5, 3000) + frames(10, 10) + frames(5, 3000) + frames(10, 10)
+
+        audio_finished = Event()
+        start_events = []
+        stop_events = []
+
+        def audio_generator():
+            yield from audio
+            audio_finished.set()
+            yield None
+
+        def handle_event(event: CombotEvent):
+            if event.payload.type == AudioSignalStarted.__name__:
+                start_events.append(event.payload)
+            if event.payload.type == AudioSignalStopped.__name__:
+                stop_events.append(event.payload)
+
+        event_bus = SynchronousEventBus()
+        event_bus.subscribe("mic_topic", handle_event)
+        segmenter = Segmenter(EnergyVAD(), hangover_ms=90, preroll_ms=60)
+        self.backend_service = AudioBackendService('mic_topic', SimpleMicrophone(TestAudioSource(audio_generator())),
+                                                   CachedAudioStorage(self.tmp_dir), event_bus, segmenter=segmenter)
+        self.backend_service.start()
+
+        wait(audio_finished)
+        time.sleep(0.01)
+
+        self.assertEqual(2, len(start_events))
+        self.assertEqual(2, len(stop_events))
+        self.assertNotEqual(start_events[0].signal_id, start_events[1].signal_id)
+        self.assertEqual([10 * 480, 10 * 480], [stopped.length for stopped in stop_events])
+
+    def test_backend_progress(self):
+        audio = [np.random.randint(-1000, 1000, (480, 1), dtype=np.int16) for i in range(10)]
+
+        latch = Event()
+        audio_finished = Event()
+        events = []
+
+        def audio_generator():
+            yield from audio[:5]
+            wait(latch)
+            yield from audio[5:]
+            audio_finished.set()
+            yield None
+
+        event_bus = SynchronousEventBus()
+        event_bus.subscribe("mic_topic", lambda event: events.append(event.payload))
+        self.backend_service = AudioBackendService('mic_topic', SimpleMicrophone(TestAudioSource(audio_generator())),
+                                                   CachedAudioStorage(self.tmp_dir), event_bus,
+                                                   progress_interval_ms=20)
+        self.backend_service.start()
+
+        time.sleep(0.1)
+        latch.set()
+        wait(audio_finished)
+        time.sleep(0.1)
+
+        types = [event.type for event in events]
+        self.assertEqual(AudioSignalStarted.__name__, types[0])
+        self.assertEqual(AudioSignalStopped.__name__, types[-1])
+        progress = [event for event in events if isinstance(event, AudioSignalProgress)]
+        # Progress is published once while waiting for the latch
+        self.assertEqual([5 * 480], [event.length for event in progress])
+
+    def test_backend_async_events(self):
+        audio = [np.random.randint(-1000, 1000, (480, 1), dtype=np.int16) for i in range(10)]
+
+        audio_finished = Event()
+        events = []
+
+        def audio_generator():
+            yield from audio
+            audio_finished.set()
+            yield None
+
+        event_bus = SynchronousEventBus()
+        event_bus.subscribe("mic_topic", lambda event: events.append(event.payload))
+        publisher = AsyncEventPublisher(event_bus)
+        self.backend_service = AudioBackendService('mic_topic', SimpleMicrophone(TestAudioSource(audio_generator())),
+                                                   CachedAudioStorage(self.tmp_dir), event_bus, publisher=publisher)
+        self.backend_service.start()
+
+        wait(audio_finished)
+        time.sleep(0.01)
+        self.backend_service.stop()
+        self.backend_service = None
+
+        self.assertEqual([AudioSignalStarted.__name__, AudioSignalStopped.__name__], [event.type for event in events])
+        self.assertEqual(2, publisher.metrics["published"])
+
+    def test_backend_capture_buffer(self):
+        audio = [np.random.randint(-1000, 1000, (480, 1), dtype=np.int16) for i in range(10)]
+
+        audio_finished = Event()
+        storage_latch = Event()
+        events = []
+
+        def audio_generator():
+            yield from audio
+            audio_finished.set()
+            yield None
+
+        class SlowStorage(CachedAudioStorage):
+            def store(self, audio_id, audio, sampling_rate):
+                wait(storage_latch)
+                super().store(audio_id, audio, sampling_rate)
+
+        event_bus = SynchronousEventBus()
+        event_bus.subscribe("mic_topic", lambda event: events.append(event.payload))
+        self.backend_service = AudioBackendService('mic_topic', SimpleMicrophone(TestAudioSource(audio_generator())),
+                                                   SlowStorage(self.tmp_dir), event_bus, capture_buffer=20)
+        self.backend_service.start()
+
+        # The microphone is read while the storage is stalled
+        wait(audio_finished)
+        self.assertEqual(10, self.backend_service.metrics["capture"]["backlog"]["value"])
+        self.assertEqual([], events)
+
+        storage_latch.set()
+        self.backend_service.stop()
+        self.backend_service = None
+
+        self.assertEqual([AudioSignalStarted.__name__, AudioSignalStopped.__name__], [event.type for event in events])
+        self.assertEqual(10 * 480, events[-1].length)
+
+
+class MultiBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.backend_service = None
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        if self.backend_service:
+            self.backend_service.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_multiple_sources(self):
+        finished = {name: Event() for name in ("left", "right")}
+
+        def audio_generator(name, count):
+            yield from (np.random.randint(-1000, 1000, (480, 1), dtype=np.int16) for _ in range(count))
+            finished[name].set()
+            yield None
+
+        events = {"left": [], "right": []}
+        event_bus = SynchronousEventBus()
+        for name in events:
+            event_bus.subscribe(f"mic.{name}", lambda event, name=name: events[name].append(event.payload))
+
+        mics = {"left": SimpleMicrophone(TestAudioSource(audio_generator("left", 10))),
+                "right": SimpleMicrophone(TestAudioSource(audio_generator("right", 20)))}
+        topics = {"left": "mic.left", "right": "mic.right"}
+        self.backend_service = MultiAudioBackendService(mics, topics, CachedAudioStorage(self.tmp_dir), event_bus,
+                                                        max_workers=4, capture_buffer=100)
+        self.backend_service.start()
+
+        for latch in finished.values():
+            wait(latch)
+        self.backend_service.stop()
+        metrics = self.backend_service.metrics
+        self.backend_service = None
+
+        self.assertEqual([AudioSignalStarted.__name__, AudioSignalStopped.__name__],
+                         [event.type for event in events["left"]])
+        self.assertEqual([AudioSignalStarted.__name__, AudioSignalStopped.__name__],
+                         [event.type for event in events["right"]])
+        self.assertEqual(10 * 480, events["left"][-1].length)
+        self.assertEqual(20 * 480, events["right"][-1].length)
+        self.assertEqual(10, metrics["left"]["capture"]["persisted"])
+        self.assertEqual(20, metrics["right"]["capture"]["persisted"])
+
+    def test_thread_pool_too_small(self):
+        mics = {name: SimpleMicrophone(TestAudioSource(iter([]))) for name in ("left", "right")}
+        topics = {"left": "mic.left", "right": "mic.right"}
+
+        with self.assertRaises(ValueError):
+            MultiAudioBackendService(mics, topics, CachedAudioStorage(self.tmp_dir), SynchronousEventBus(),
+                                     max_workers=3, capture_buffer=100)
+
+    def test_topics_must_match_sources(self):
+        mics = {name: SimpleMicrophone(TestAudioSource(iter([]))) for name in ("left", "right")}
+
+        with self.assertRaises(ValueError):
+            MultiAudioBackendService(mics, {"left": "mic.left"}, CachedAudioStorage(self.tmp_dir),
+                                     SynchronousEventBus())
+
+
+class TestImageSource(ImageSource):
+    def __init__(self, images):
+        self._images = images
+        self.captured = 0
+
+    @property
+    def resolution(self) -> CameraResolution:
+        return CameraResolution.QQVGA
+
+    def capture(self) -> Image:
+        image = self._images[min(self.captured, len(self._images) - 1)]
+        self.captured += 1
+
+        return image
+
+
+class VideoBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.backend_service = None
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        if self.backend_service:
+            self.backend_service.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_unchanged_images_are_skipped(self):
+        bounds = Bounds(0, 0, 160, 120)
+        first = np.random.randint(0, 255, (120, 160, 3), dtype=np.uint8)
+        noise = np.clip(first.astype(int) + np.random.randint(-1, 2, first.shape), 0, 255).astype(np.uint8)
+        second = np.random.randint(0, 255, (120, 160, 3), dtype=np.uint8)
+        images = [Image(array, bounds) for array in (first, first, noise, second, second)]
+
+        events = []
+        event_bus = SynchronousEventBus()
+        event_bus.subscribe("image_topic", lambda event: events.append(event.payload))
+
+        source = TestImageSource(images)
+        storage = CachedImageStorage(self.tmp_dir)
+        self.backend_service = VideoBackendService("image_topic", source, storage, event_bus, fps=100)
+        self.backend_service.start()
+
+        deadline = time.monotonic() + 1
+        while source.captured < len(images) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.backend_service.stop()
+        metrics = self.backend_service.metrics
+        self.backend_service = None
+
+        self.assertEqual(2, len(events))
+        self.assertTrue(all(isinstance(event, ImageSignalEvent) for event in events))
+        self.assertEqual(f"cltl-storage:video/{events[0].signal_id}", events[0].files[0])
+        np.testing.assert_array_equal(first, storage.get(events[0].signal_id).image)
+        np.testing.assert_array_equal(second, storage.get(events[1].signal_id).image)
+        self.assertEqual(2, metrics["stored"])
+        self.assertEqual(metrics["captured"] - 2, metrics["skipped"])
+
+    def test_all_images_are_stored_without_threshold(self):
+        image = Image(np.zeros((120, 160, 3), dtype=np.uint8), Bounds(0, 0, 160, 120))
+
+        source = TestImageSource([image])
+        self.backend_service = VideoBackendService("image_topic", source, CachedImageStorage(self.tmp_dir),
+                                                   SynchronousEventBus(), fps=100, change_threshold=0)
+        self.backend_service.start()
+
+        deadline = time.monotonic() + 1
+        while source.captured < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.backend_service.stop()
+
+        self.assertEqual(0, self.backend_service.metrics["skipped"])
+        self.assertEqual(source.captured, self.backend_service.metrics["stored"])
+        self.backend_service = None
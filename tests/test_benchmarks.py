@@ -0,0 +1,33 @@
+import importlib.util
+import unittest
+from pathlib import Path
+
+_spec = importlib.util.spec_from_file_location("benchmark_util",
+                                               Path(__file__).resolve().parent.parent / "benchmarks" / "util.py")
+benchmark_util = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(benchmark_util)
+
+
+def _results(**metrics):
+    return {"results": [{"parameters": {"consumers": 1}, "metrics": metrics}]}
+
+
+class CompareTest(unittest.TestCase):
+    def test_throughput_increase_is_no_regression(self):
+        comparison = benchmark_util.compare(_results(throughput_fps=100.0, frames_read=1000),
+                                            _results(throughput_fps=150.0, frames_read=1500))
+
+        self.assertEqual(2, len(comparison))
+        self.assertFalse(any(entry["regression"] for entry in comparison))
+
+    def test_throughput_decrease_is_regression(self):
+        comparison = benchmark_util.compare(_results(throughput_fps=100.0), _results(throughput_fps=50.0))
+
+        self.assertTrue(comparison[0]["regression"])
+
+    def test_latency_increase_is_regression(self):
+        comparison = benchmark_util.compare(_results(latency_p50_ms=10.0, cpu_percent=20.0),
+                                            _results(latency_p50_ms=20.0, cpu_percent=10.0))
+
+        regressions = {entry["metric"]: entry["regression"] for entry in comparison}
+        self.assertEqual({"latency_p50_ms": True, "cpu_percent": False}, regressions)
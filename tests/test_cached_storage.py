@@ -1,3 +1,4 @@
+import os
 import shutil
 import tempfile
 import unittest
@@ -6,8 +7,10 @@ from threading import Thread, Event
 
 import numpy as np
 
+from cltl.backend.api.camera import Image, Bounds, CameraResolution
+from cltl.backend.api.microphone import AudioFrame
 from cltl.backend.api.storage import AudioParameters
-from cltl.backend.impl.cached_storage import CachedAudioStorage
+from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
 
 
 def wait(lock: Event):
@@ -273,4 +276,175 @@ class SynchronizedMicrophoneTest(unittest.TestCase):
 
         self.assertEqual(AudioParameters(16000, 2, 400, 2), params)
 
-        write_thread.join(timeout=1)
\ No newline at end of file
+        write_thread.join(timeout=1)
+
+    def test_capture_metadata_from_file(self):
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (400, 2), dtype=np.int16), 100.0 + i * 0.025, 3 + i)
+                 for i in range(10)]
+        self.storage.store("1", audio, 16000)
+
+        data, params = self.storage.get("1", offset=800)
+        actual = [frame for frame in data]
+
+        np.testing.assert_array_equal(actual, audio[2:])
+        self.assertEqual([frame.timestamp for frame in audio[2:]], [frame.timestamp for frame in actual])
+        self.assertEqual([frame.sequence for frame in audio[2:]], [frame.sequence for frame in actual])
+
+    def test_capture_metadata_with_gaps(self):
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (400, 2), dtype=np.int16), 100.0 + i * 0.025, i)
+                 for i in range(10) if i not in (3, 4, 7)]
+        self.storage.store("1", audio, 16000)
+
+        capture = self.storage._read_meta_from_file("1").capture
+
+        self.assertEqual(100.0, capture.start)
+        self.assertAlmostEqual(100.25, capture.end)
+        self.assertEqual([[3, 2], [7, 1]], capture.gaps)
+
+    def test_capture_metadata_with_gaps_from_file(self):
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (400, 2), dtype=np.int16), 100.0 + i * 0.025, 3 + i)
+                 for i in range(10) if i not in (3, 4, 7)]
+        self.storage.store("1", audio, 16000)
+
+        data, params = self.storage.get("1", offset=800)
+        actual = [frame for frame in data]
+
+        np.testing.assert_array_equal(actual, audio[2:])
+        np.testing.assert_allclose([frame.timestamp for frame in audio[2:]], [frame.timestamp for frame in actual])
+        self.assertEqual([frame.sequence for frame in audio[2:]], [frame.sequence for frame in actual])
+
+    def test_concurrent_stores(self):
+        audio = {str(i): [np.random.randint(-1000, 1000, (400, 2), dtype=np.int16) for _ in range(50)]
+                 for i in range(8)}
+
+        def store(audio_id):
+            self.storage.store(audio_id, iter(audio[audio_id]), 16000)
+
+        threads = [Thread(target=store, args=(audio_id,)) for audio_id in audio]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for audio_id, frames in audio.items():
+            data, params = self.storage.get(audio_id)
+            np.testing.assert_array_equal(np.concatenate(list(data)), np.concatenate(frames))
+
+    def test_concurrent_store_of_same_id_fails(self):
+        started = Event()
+        latch = Event()
+
+        def audio():
+            yield np.random.randint(-1000, 1000, (400, 2), dtype=np.int16)
+            started.set()
+            wait(latch)
+
+        thread = Thread(target=self.storage.store, args=("1", audio(), 16000))
+        thread.start()
+        wait(started)
+
+        try:
+            with self.assertRaises(ValueError):
+                self.storage.store("1", [np.zeros((400, 2), dtype=np.int16)], 16000)
+        finally:
+            latch.set()
+            thread.join()
+
+    def test_read_from_cache_while_storing(self):
+        frames = [np.random.randint(-1000, 1000, (400, 2), dtype=np.int16) for _ in range(500)]
+
+        thread = Thread(target=self.storage.store, args=("1", iter(frames), 16000))
+        thread.start()
+
+        read = []
+        while not read:
+            try:
+                read = [frame for frame in self.storage.get("1")[0]]
+            except (KeyError, FileNotFoundError):
+                # Not yet started
+                pass
+        thread.join()
+
+        np.testing.assert_array_equal(np.concatenate(read), np.concatenate(frames))
+
+
+class CachedImageStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.image = Image(np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8), Bounds(-1, 1, -0.5, 0.5),
+                           np.random.rand(480, 640).astype(np.float32))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_full_resolution(self):
+        storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QVGA])
+        storage.store("1", self.image)
+
+        self.assertIs(self.image, storage.get("1"))
+        self.assertIs(self.image, storage.get("1", resolution=CameraResolution.NATIVE))
+
+    def test_lazy_pyramid(self):
+        storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QVGA, CameraResolution.QQVGA])
+        storage.store("1", self.image)
+
+        self.assertFalse(os.path.isfile(os.path.join(self.tmp_dir, "1_QVGA.png")))
+
+        scaled = storage.get("1", resolution=CameraResolution.QVGA)
+
+        self.assertEqual(CameraResolution.QVGA, scaled.resolution)
+        self.assertEqual((240, 320), scaled.depth.shape)
+        self.assertEqual(self.image.bounds, scaled.bounds)
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, "1_QVGA.png")))
+        self.assertIs(scaled, storage.get("1", resolution=CameraResolution.QVGA))
+
+    def test_eager_pyramid(self):
+        storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QVGA, CameraResolution.QQVGA],
+                                     eager=True)
+        storage.store("1", self.image)
+
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, "1_QVGA.png")))
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, "1_QQVGA.png")))
+
+    def test_nearest_level(self):
+        storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QVGA, CameraResolution.QQVGA])
+        storage.store("1", self.image)
+
+        self.assertEqual(CameraResolution.QQVGA, storage.get("1", CameraResolution.QQQQVGA).resolution)
+        self.assertEqual(CameraResolution.QVGA, storage.get("1", CameraResolution.QVGA).resolution)
+        self.assertEqual(CameraResolution.VGA, storage.get("1", CameraResolution.VGA).resolution)
+        self.assertEqual(CameraResolution.VGA, storage.get("1", CameraResolution.VGA4).resolution)
+
+    def test_levels_not_smaller_than_image(self):
+        small = Image(np.zeros((120, 160, 3), dtype=np.uint8), Bounds(0, 1, 0, 1))
+        storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QVGA], eager=True)
+        storage.store("1", small)
+
+        self.assertFalse(os.path.isfile(os.path.join(self.tmp_dir, "1_QVGA.png")))
+        self.assertIs(small, storage.get("1", CameraResolution.QVGA))
+
+    def test_level_keeps_aspect_ratio(self):
+        wide = Image(np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8), Bounds(0, 1, 0, 1),
+                     np.random.rand(720, 1280).astype(np.float32))
+        storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QVGA])
+        storage.store("1", wide)
+
+        scaled = storage.get("1", CameraResolution.QVGA)
+
+        self.assertEqual((180, 320, 3), scaled.image.shape)
+        self.assertEqual((180, 320), scaled.depth.shape)
+
+        restored = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QVGA])
+        self.assertEqual((180, 320, 3), restored.get("1", CameraResolution.QVGA).image.shape)
+
+    def test_level_from_file(self):
+        storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QQVGA], eager=True)
+        storage.store("1", self.image)
+        expected = storage.get("1", CameraResolution.QQVGA)
+
+        restored = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QQVGA])
+        actual = restored.get("1", CameraResolution.QQVGA)
+
+        np.testing.assert_array_equal(expected.image, actual.image)
+        np.testing.assert_array_equal(expected.depth, actual.depth)
+        self.assertEqual(self.image.bounds, actual.bounds)
@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from cltl.backend.api.microphone import AudioParameters
+from cltl_service.backend.capture import CaptureBuffer
+
+PARAMETERS = AudioParameters(16000, 1, 480, 2)
+
+
+def frame(value):
+    return np.full((480, 1), value, dtype=np.int16)
+
+
+class CaptureBufferTest(unittest.TestCase):
+    def test_sessions(self):
+        buffer = CaptureBuffer(10)
+        buffer.begin(PARAMETERS)
+        for i in range(3):
+            buffer.put(frame(i))
+        buffer.end()
+        buffer.begin(PARAMETERS)
+        buffer.put(frame(3))
+        buffer.end()
+        buffer.close()
+
+        sessions = []
+        while buffer.session():
+            sessions.append([int(f[0, 0]) for f in buffer.frames()])
+
+        self.assertEqual([[0, 1, 2], [3]], sessions)
+
+        metrics = buffer.metrics
+        self.assertEqual(4, metrics["captured"])
+        self.assertEqual(4, metrics["persisted"])
+        self.assertEqual(0, metrics["dropped"])
+        self.assertEqual({"value": 0, "max": 4}, metrics["backlog"])
+        self.assertEqual(4, metrics["delay"]["count"])
+
+    def test_close_ends_session(self):
+        buffer = CaptureBuffer(10)
+        buffer.begin(PARAMETERS)
+        buffer.put(frame(0))
+        buffer.close()
+
+        self.assertEqual(PARAMETERS, buffer.session())
+        self.assertEqual(1, len(list(buffer.frames())))
+        self.assertIsNone(buffer.session())
+
+    def test_drop_policy(self):
+        buffer = CaptureBuffer(2, policy="drop")
+        buffer.begin(PARAMETERS)
+
+        self.assertEqual([True, True, False, False], [buffer.put(frame(i)) for i in range(4)])
+        buffer.end()
+
+        buffer.session()
+        self.assertEqual([0, 1], [int(f[0, 0]) for f in buffer.frames()])
+        self.assertEqual(2, buffer.metrics["dropped"])
+
+    def test_block_policy(self):
+        buffer = CaptureBuffer(2, policy="block")
+        buffer.begin(PARAMETERS)
+
+        captured = threading.Event()
+
+        def capture():
+            for i in range(4):
+                buffer.put(frame(i))
+            buffer.end()
+            captured.set()
+
+        threading.Thread(target=capture, daemon=True).start()
+        self.assertFalse(captured.wait(0.1))
+        self.assertEqual(2, buffer.metrics["backlog"]["value"])
+
+        buffer.session()
+        self.assertEqual([0, 1, 2, 3], [int(f[0, 0]) for f in buffer.frames()])
+        self.assertTrue(captured.wait(1))
+        self.assertEqual(0, buffer.metrics["dropped"])
+
+    def test_unsupported_policy(self):
+        with self.assertRaises(ValueError):
+            CaptureBuffer(2, policy="ignore")
@@ -0,0 +1,149 @@
+import bz2
+import enum
+import importlib.util
+import json
+import threading
+import unittest
+from configparser import ConfigParser
+from types import SimpleNamespace
+
+import numpy as np
+from cltl.combot.infra.config.local import LocalConfigurationManager
+from cltl.combot.infra.event import Event
+from emissor.representation.scenario import Modality
+
+from cltl.backend.api.camera import Bounds
+from cltl.backend.api.microphone import AudioParameters
+from cltl_service.backend.event_codec import encode, decode, register_kombu_serializer, kombu_event_bus, \
+    EVENT_MIME_TYPE
+from cltl_service.backend.schema import AudioSignalStarted, AudioSignalStopped, TextSignalEvent, \
+    AudioSignalProgress, ImageSignalEvent
+
+EVENTS = [
+    AudioSignalStarted.create("9f2a3c1e-0d4b-4c8e-a7f1-3b6d5e2c9a10", 1650000000.123,
+                              ["cltl-storage:audio/9f2a3c1e-0d4b-4c8e-a7f1-3b6d5e2c9a10"],
+                              AudioParameters(16000, 1, 480, 2)),
+    AudioSignalStopped.create("9f2a3c1e-0d4b-4c8e-a7f1-3b6d5e2c9a10", 1650000003.456, 52320),
+    AudioSignalProgress.create("9f2a3c1e-0d4b-4c8e-a7f1-3b6d5e2c9a10", 1650000001.5, -1),
+    TextSignalEvent.create("1", 1650000000.0, "Hello wörld", ["file"]),
+    ImageSignalEvent.create("2", 1650000000.0, ["cltl-storage:video/2"], Bounds(0, 640, 0, 480)),
+]
+
+
+def to_json(obj):
+    # JSON serialization of the event bus, with enums by name
+    return json.dumps(obj, default=lambda o: o.name if isinstance(o, enum.Enum) else vars(o)).encode("utf-8")
+
+
+class EventCodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        for payload in EVENTS:
+            with self.subTest(payload=payload.type):
+                event = Event.for_payload(payload)
+
+                decoded = decode(encode(event))
+
+                self.assertIsInstance(decoded, Event)
+                self.assertEqual(event.id, decoded.id)
+                self.assertEqual(event.metadata, decoded.metadata)
+                self.assertEqual(payload, decoded.payload)
+                self.assertIs(type(payload), type(decoded.payload))
+
+    def test_smaller_than_json(self):
+        for payload in EVENTS:
+            with self.subTest(payload=payload.type):
+                event = Event.for_payload(payload)
+                serialized = to_json(event)
+
+                self.assertLess(len(encode(event)), len(serialized))
+                self.assertLess(len(encode(event)), len(bz2.compress(serialized)))
+
+    def test_values(self):
+        values = [None, True, False, 0, 1, -1, 2 ** 40, -2 ** 40, 0.5, "", "text", b"\x00\x01", [1, [2, "3"]],
+                  {"a": 1, 2: [None]}, Modality.VIDEO]
+
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(value, decode(encode(value)))
+
+        self.assertEqual([1, 2], decode(encode((1, 2))))
+
+    def test_numpy_values(self):
+        array = np.arange(12, dtype=np.int16).reshape(3, 4)
+
+        np.testing.assert_array_equal(array, decode(encode(array)))
+        self.assertEqual(3, decode(encode(np.int64(3))))
+        self.assertEqual(0.25, decode(encode(np.float32(0.25))))
+
+    def test_unregistered_objects_are_decoded_as_namespace(self):
+        payload = SimpleNamespace(type="Custom", values=[1, 2], nested=SimpleNamespace(text="a"))
+
+        decoded = decode(encode(Event.for_payload(payload))).payload
+
+        self.assertEqual(payload, decoded)
+
+    def test_large_payloads_are_compressed(self):
+        small = Event.for_payload(TextSignalEvent.create("1", 1.0, "short"))
+        large = Event.for_payload(TextSignalEvent.create("1", 1.0, "long " * 1000))
+
+        self.assertEqual(0, encode(small)[2])
+        self.assertEqual(1, encode(large)[2])
+        self.assertLess(len(encode(large)), 1000)
+        self.assertEqual(large.payload, decode(encode(large)).payload)
+        self.assertEqual(0, encode(large, compress_threshold=-1)[2])
+
+    def test_invalid_data(self):
+        encoded = bytearray(encode(Event.for_payload(EVENTS[0])))
+
+        with self.assertRaises(ValueError):
+            decode(b"{}")
+
+        encoded[1] = 99
+        with self.assertRaises(ValueError):
+            decode(bytes(encoded))
+
+    @unittest.skipUnless(importlib.util.find_spec("kombu"), "kombu is not installed")
+    def test_kombu_serializer(self):
+        from kombu.serialization import dumps, loads
+
+        register_kombu_serializer("cltl-binary-test")
+        event = Event.for_payload(EVENTS[0])
+
+        content_type, content_encoding, data = dumps(event, serializer="cltl-binary-test")
+        decoded = loads(data, content_type, content_encoding, accept=[EVENT_MIME_TYPE])
+
+        self.assertEqual(EVENT_MIME_TYPE, content_type)
+        self.assertEqual(event.payload, decoded.payload)
+
+    @unittest.skipUnless(importlib.util.find_spec("kombu"), "kombu is not installed")
+    def test_kombu_event_bus(self):
+        config = ConfigParser()
+        config.read_dict({"cltl.event.kombu": {"server": "memory://", "exchange": "cltl.test", "type": "direct",
+                                               "compression": "", "serializer": "binary"}})
+        event_bus = kombu_event_bus(LocalConfigurationManager(config))
+
+        received = []
+        delivered = threading.Event()
+
+        def handler(event):
+            received.append(event)
+            delivered.set()
+
+        event_bus.subscribe("cltl.test.topic", handler)
+        try:
+            event_bus.publish("cltl.test.topic", Event.for_payload(EVENTS[0]))
+            self.assertTrue(delivered.wait(5))
+        finally:
+            event_bus.unsubscribe("cltl.test.topic")
+
+        self.assertEqual(EVENTS[0], received[0].payload)
+        self.assertEqual("cltl.test.topic", received[0].metadata.topic)
+
+    @unittest.skipUnless(importlib.util.find_spec("kombu"), "kombu is not installed")
+    def test_kombu_event_bus_unsupported_serializer(self):
+        config = ConfigParser()
+        config.read_dict({"cltl.event.kombu": {"server": "memory://", "exchange": "cltl.test", "type": "direct",
+                                               "compression": "", "serializer": "pickle"}})
+
+        with self.assertRaises(ValueError):
+            kombu_event_bus(LocalConfigurationManager(config))
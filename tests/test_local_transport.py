@@ -0,0 +1,131 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from emissor.representation.scenario import Modality
+
+from cltl.backend.api.camera import CameraResolution, Image
+from cltl.backend.api.microphone import AudioFrame
+from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
+from cltl.backend.source.client_source import ClientAudioSource, ClientImageSource
+from cltl.backend.source.cv2_source import SYSTEM_BOUNDS
+from cltl.backend.source.local_transport import register_storage, unregister_storage, parse_storage_url, \
+    local_audio_storage, local_image_storage
+from cltl_service.backend.storage import StorageService
+from tests.test_storage_client import ServerThread
+
+
+class LocalTransportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.audio_storage = CachedAudioStorage(self.tmp_dir)
+        self.image_storage = CachedImageStorage(self.tmp_dir)
+
+    def tearDown(self):
+        unregister_storage()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parse_storage_url(self):
+        self.assertEqual((Modality.AUDIO, "1", {}), parse_storage_url("cltl-storage:audio/1"))
+        self.assertEqual((Modality.VIDEO, "2", {"offset": "3"}), parse_storage_url("cltl-storage:/video/2?offset=3"))
+
+        with self.assertRaises(ValueError):
+            parse_storage_url("http://localhost/audio/1")
+        with self.assertRaises(ValueError):
+            parse_storage_url("cltl-storage:unknown/1")
+
+    def test_local_storage_lookup(self):
+        self.assertIsNone(local_audio_storage("cltl-storage:audio/1"))
+
+        register_storage(self.audio_storage, self.image_storage)
+
+        self.assertIs(self.audio_storage, local_audio_storage("cltl-storage:audio/1"))
+        self.assertIs(self.image_storage, local_image_storage("cltl-storage:video/1"))
+        self.assertIsNone(local_audio_storage("cltl-storage:video/1"))
+        self.assertIsNone(local_audio_storage("http://localhost/audio/1"))
+
+    def test_audio_from_local_storage(self):
+        register_storage(audio_storage=self.audio_storage)
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 2), dtype=np.int16), 100.0 + i * 0.03, i)
+                 for i in range(10)]
+        self.audio_storage.store("1", audio, sampling_rate=16000)
+
+        with ClientAudioSource("cltl-storage:audio/1", offset=480) as source:
+            self.assertEqual(16000, source.rate)
+            self.assertEqual(2, source.channels)
+            self.assertEqual(480, source.frame_size)
+            frames = list(source.audio)
+
+        np.testing.assert_array_equal(audio[1:], frames)
+        self.assertEqual(list(range(1, 10)), [frame.sequence for frame in frames])
+
+    def test_audio_not_in_local_storage(self):
+        register_storage(audio_storage=self.audio_storage)
+
+        with self.assertRaises(ValueError):
+            with ClientAudioSource("cltl-storage:audio/unknown"):
+                pass
+
+    def test_audio_not_in_local_storage_from_http(self):
+        register_storage(audio_storage=self.audio_storage)
+        remote_storage = CachedAudioStorage(tempfile.mkdtemp(dir=self.tmp_dir))
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 2), dtype=np.int16), 100.0 + i * 0.03, i)
+                 for i in range(10)]
+        remote_storage.store("1", audio, sampling_rate=16000)
+
+        server = ServerThread(StorageService(storage_audio=remote_storage, storage_image=None).app)
+        server.start()
+        try:
+            with ClientAudioSource("cltl-storage:audio/1", "http://0.0.0.0:9999") as source:
+                frames = list(source.audio)
+        finally:
+            server.shutdown()
+            server.join()
+
+        np.testing.assert_array_equal(audio, frames)
+        self.assertEqual(list(range(10)), [frame.sequence for frame in frames])
+
+    def test_image_from_local_storage(self):
+        register_storage(image_storage=self.image_storage)
+        resolution = CameraResolution.QQQVGA
+        image = Image(np.random.randint(0, 256, (resolution.height, resolution.width, 3), dtype=np.uint8),
+                      SYSTEM_BOUNDS)
+        self.image_storage.store("1", image)
+
+        with ClientImageSource("cltl-storage:video/1", prefetch=True) as source:
+            self.assertEqual(resolution, source.resolution)
+            captured = source.capture()
+
+        self.assertIs(image, captured)
+
+    def test_image_not_in_local_storage_from_http(self):
+        register_storage(image_storage=self.image_storage)
+        remote_storage = CachedImageStorage(tempfile.mkdtemp(dir=self.tmp_dir))
+        resolution = CameraResolution.QQQVGA
+        image = Image(np.random.randint(0, 256, (resolution.height, resolution.width, 3), dtype=np.uint8),
+                      SYSTEM_BOUNDS)
+        remote_storage.store("1", image)
+
+        server = ServerThread(StorageService(storage_audio=None, storage_image=remote_storage).app)
+        server.start()
+        try:
+            with ClientImageSource("cltl-storage:video/1", "http://0.0.0.0:9999", prefetch=True) as source:
+                captured = source.capture()
+        finally:
+            server.shutdown()
+            server.join()
+
+        np.testing.assert_array_equal(image.image, captured.image)
+        self.assertEqual(SYSTEM_BOUNDS, captured.bounds)
+
+    def test_image_resolution_from_local_storage(self):
+        image_storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QQVGA])
+        register_storage(image_storage=image_storage)
+        image = Image(np.random.randint(0, 256, (480, 640, 3), dtype=np.uint8), SYSTEM_BOUNDS)
+        image_storage.store("1", image)
+
+        with ClientImageSource("cltl-storage:video/1?resolution=qqvga") as source:
+            captured = source.capture()
+
+        self.assertEqual(CameraResolution.QQVGA, captured.resolution)
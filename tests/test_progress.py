@@ -0,0 +1,52 @@
+import threading
+import time
+import unittest
+
+from cltl.combot.infra.event import Event
+from cltl.combot.infra.event.memory import SynchronousEventBus
+
+from cltl_service.backend.progress import ProgressPublisher
+from cltl_service.backend.schema import AudioSignalProgress
+
+
+class ProgressPublisherTest(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.published = threading.Event()
+
+        def handle(event: Event):
+            self.events.append(event.payload)
+            self.published.set()
+
+        self.event_bus = SynchronousEventBus()
+        self.event_bus.subscribe("topic", handle)
+        self.publisher = ProgressPublisher(self.event_bus, "topic", 0.05)
+
+    def tearDown(self):
+        self.publisher.stop()
+
+    def test_progress_is_coalesced(self):
+        for length in range(100, 1100, 100):
+            self.publisher.update("signal_1", 1.0 + length, length)
+            self.publisher.update("signal_2", 2.0 + length, 2 * length)
+
+        self.publisher.start()
+        self.assertTrue(self.published.wait(1))
+        time.sleep(0.1)
+
+        self.assertEqual(2, len(self.events))
+        self.assertTrue(all(isinstance(event, AudioSignalProgress) for event in self.events))
+        self.assertEqual({("signal_1", 1001.0, 1000), ("signal_2", 1002.0, 2000)},
+                         {(event.signal_id, event.timestamp, event.length) for event in self.events})
+        self.assertEqual({"updates": 20, "published": 2}, self.publisher.metrics)
+
+    def test_finished_progress_is_not_published(self):
+        self.publisher.update("signal_1", 1.0, 100)
+        self.publisher.update("signal_2", 1.0, 100)
+        self.publisher.finish("signal_1")
+
+        self.publisher.start()
+        self.assertTrue(self.published.wait(1))
+        time.sleep(0.1)
+
+        self.assertEqual(["signal_2"], [event.signal_id for event in self.events])
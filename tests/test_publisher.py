@@ -0,0 +1,129 @@
+import threading
+import time
+import unittest
+
+from cltl.combot.infra.event import Event
+from cltl.combot.infra.event.memory import SynchronousEventBus
+
+from cltl_service.backend.publisher import AsyncEventPublisher
+from cltl_service.backend.schema import AudioSignalProgress
+
+
+def progress(signal_id, length):
+    return Event.for_payload(AudioSignalProgress.create(signal_id, 1.0, length))
+
+
+class SlowEventBus(SynchronousEventBus):
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.latch = threading.Event()
+        self.latch.set()
+
+    def publish(self, topic: str, event: Event) -> None:
+        self.latch.wait()
+        time.sleep(self.delay)
+        super().publish(topic, event)
+
+
+class AsyncEventPublisherTest(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.event_bus = SlowEventBus()
+        self.event_bus.subscribe("topic", lambda event: self.events.append(event.payload))
+        self.publisher = None
+
+    def tearDown(self):
+        self.event_bus.latch.set()
+        if self.publisher:
+            self.publisher.stop()
+
+    def test_ordering_per_signal(self):
+        self.event_bus.delay = 0.001
+        self.publisher = AsyncEventPublisher(self.event_bus, workers=3, batch_size=4)
+        self.publisher.start()
+
+        for length in range(20):
+            for signal_id in ("a", "b", "c", "d"):
+                self.publisher.publish("topic", progress(signal_id, length))
+        self.publisher.stop()
+
+        self.assertEqual(80, len(self.events))
+        for signal_id in ("a", "b", "c", "d"):
+            self.assertEqual(list(range(20)),
+                             [event.length for event in self.events if event.signal_id == signal_id])
+
+        metrics = self.publisher.metrics
+        self.assertEqual(80, metrics["queued"])
+        self.assertEqual(80, metrics["published"])
+        self.assertEqual(0, metrics["dropped"])
+        self.assertEqual(80, metrics["latency"]["count"])
+        self.assertGreater(metrics["latency"]["max"], 0.0)
+        self.assertEqual(0, metrics["queue_depth"]["value"])
+
+    def test_publish_does_not_wait_for_event_bus(self):
+        self.event_bus.latch.clear()
+        self.publisher = AsyncEventPublisher(self.event_bus, queue_size=10)
+        self.publisher.start()
+
+        start = time.monotonic()
+        for length in range(5):
+            self.publisher.publish("topic", progress("a", length))
+
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertEqual([], self.events)
+        self.assertGreaterEqual(self.publisher.metrics["queue_depth"]["max"], 4)
+
+        self.event_bus.latch.set()
+        self.publisher.stop()
+        self.assertEqual(list(range(5)), [event.length for event in self.events])
+
+    def test_drop_policy(self):
+        self.event_bus.latch.clear()
+        self.publisher = AsyncEventPublisher(self.event_bus, queue_size=2, policy="drop")
+        self.publisher.start()
+
+        self.publisher.publish("topic", progress("a", 0))
+        # Wait until the worker took the first event
+        time.sleep(0.05)
+        for length in range(1, 10):
+            self.publisher.publish("topic", progress("a", length))
+
+        self.event_bus.latch.set()
+        self.publisher.stop()
+
+        metrics = self.publisher.metrics
+        # One event is taken by the worker, two are queued
+        self.assertEqual(3, metrics["published"])
+        self.assertEqual(7, metrics["dropped"])
+        self.assertEqual([0, 1, 2], [event.length for event in self.events])
+
+    def test_block_policy(self):
+        self.event_bus.latch.clear()
+        self.publisher = AsyncEventPublisher(self.event_bus, queue_size=2, policy="block")
+        self.publisher.start()
+
+        published = threading.Event()
+
+        def publish():
+            for length in range(5):
+                self.publisher.publish("topic", progress("a", length))
+            published.set()
+
+        threading.Thread(target=publish, daemon=True).start()
+        self.assertFalse(published.wait(0.1))
+
+        self.event_bus.latch.set()
+        self.assertTrue(published.wait(1))
+        self.publisher.stop()
+        self.assertEqual(list(range(5)), [event.length for event in self.events])
+
+    def test_unsupported_policy(self):
+        with self.assertRaises(ValueError):
+            AsyncEventPublisher(self.event_bus, policy="ignore")
+
+    def test_publish_requires_start(self):
+        publisher = AsyncEventPublisher(self.event_bus)
+
+        with self.assertRaises(ValueError):
+            publisher.publish("topic", progress("a", 0))
@@ -0,0 +1,118 @@
+import threading
+import unittest
+
+import numpy as np
+
+from cltl.backend.api.metrics import Histogram, Counter, Gauge, snapshot
+from cltl.backend.impl.ring_buffer import AudioRingBuffer, FrameBuffer
+
+
+def frame(value):
+    return np.full((4, 1), value, dtype=np.int16)
+
+
+class AudioRingBufferTest(unittest.TestCase):
+    def test_read_written_frames(self):
+        ring = AudioRingBuffer(8, 4, 1)
+        cursor = ring.cursor()
+
+        for i in range(3):
+            ring.write(frame(i), 100.0 + i)
+
+        frames = [ring.read(cursor, timeout=0) for _ in range(3)]
+
+        self.assertEqual([0, 1, 2], [f[0, 0] for f in frames])
+        self.assertEqual([100.0, 101.0, 102.0], [f.timestamp for f in frames])
+        self.assertEqual([0, 1, 2], [f.sequence for f in frames])
+        self.assertIsNone(ring.read(cursor, timeout=0))
+        self.assertEqual(0, cursor.dropped.value)
+
+    def test_lagging_reader_drops_frames(self):
+        ring = AudioRingBuffer(4, 4, 1)
+        cursor = ring.cursor()
+
+        for i in range(10):
+            ring.write(frame(i), float(i))
+
+        frames = []
+        while ring.lag(cursor):
+            frames.append(ring.read(cursor, timeout=0))
+
+        self.assertEqual([7, 8, 9], [f.sequence for f in frames])
+        self.assertEqual([7, 8, 9], [f[0, 0] for f in frames])
+        self.assertEqual(7, cursor.dropped.value)
+
+    def test_independent_cursors(self):
+        ring = AudioRingBuffer(8, 4, 1)
+        first = ring.cursor()
+        ring.write(frame(0), 0.0)
+        second = ring.cursor()
+        ring.write(frame(1), 1.0)
+
+        self.assertEqual([0, 1], [ring.read(first, timeout=0)[0, 0] for _ in range(2)])
+        self.assertEqual(1, ring.read(second, timeout=0)[0, 0])
+
+    def test_cursor_lookback(self):
+        ring = AudioRingBuffer(4, 4, 1)
+        for i in range(6):
+            ring.write(frame(i), float(i))
+
+        self.assertEqual(4, ring.read(ring.cursor(lookback=2), timeout=0)[0, 0])
+        self.assertEqual(3, ring.read(ring.cursor(lookback=10), timeout=0)[0, 0])
+
+    def test_blocking_read(self):
+        ring = AudioRingBuffer(4, 4, 1)
+        cursor = ring.cursor()
+
+        writer = threading.Timer(0.05, lambda: ring.write(frame(1), 1.0))
+        writer.start()
+
+        self.assertEqual(1, ring.read(cursor, timeout=1)[0, 0])
+        writer.join()
+
+    def test_close_releases_reader(self):
+        ring = AudioRingBuffer(4, 4, 1)
+        cursor = ring.cursor()
+
+        closer = threading.Timer(0.05, ring.close)
+        closer.start()
+
+        self.assertIsNone(ring.read(cursor))
+        closer.join()
+
+
+class FrameBufferTest(unittest.TestCase):
+    def test_wake_releases_reader(self):
+        buffer = FrameBuffer(4)
+        cursor = buffer.cursor()
+
+        waker = threading.Timer(0.05, buffer.wake)
+        waker.start()
+
+        self.assertIsNone(buffer.read(cursor))
+        waker.join()
+
+        buffer.write(frame(1))
+        self.assertEqual(1, buffer.read(cursor, timeout=0)[0, 0])
+        self.assertFalse(buffer.closed)
+
+
+class MetricsTest(unittest.TestCase):
+    def test_snapshot(self):
+        counter = Counter()
+        counter.inc(3)
+        gauge = Gauge()
+        gauge.set(5)
+        gauge.set(2)
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.observe(value)
+
+        metrics = snapshot({"counter": counter, "gauge": gauge, "histogram": histogram})
+
+        self.assertEqual(3, metrics["counter"])
+        self.assertEqual({"value": 2, "max": 5}, metrics["gauge"])
+        self.assertEqual(100, metrics["histogram"]["count"])
+        self.assertEqual(50.5, metrics["histogram"]["mean"])
+        self.assertEqual(100, metrics["histogram"]["max"])
+        self.assertAlmostEqual(50.5, metrics["histogram"]["p50"])
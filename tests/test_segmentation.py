@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from cltl.backend.api.microphone import AudioParameters, AudioFrame
+from cltl.backend.impl.segmentation import EnergyVAD, Segmenter
+
+PARAMETERS = AudioParameters(16000, 1, 480, 2)
+
+
+def frames(*pattern):
+    """Audio frames of 30ms, each 's' in the pattern is a speech frame, each '.' is a silent frame."""
+    audio = []
+    for i, kind in enumerate(pattern):
+        amplitude = 3000 if kind == 's' else 10
+        samples = np.random.randint(-amplitude, amplitude, (480, 1), dtype=np.int16)
+        audio.append(AudioFrame(samples, 100.0 + 0.03 * i, i))
+
+    return audio
+
+
+class EnergyVADTest(unittest.TestCase):
+    def test_is_speech(self):
+        audio = np.stack(frames(*'..ss.s'))
+
+        speech = EnergyVAD(-40.0).is_speech(audio, 16000)
+
+        self.assertEqual([False, False, True, True, False, True], speech.tolist())
+
+    def test_threshold(self):
+        audio = np.full((2, 480, 2), [[100, 100]], dtype=np.int16)
+        audio[1] = 400
+
+        # -50.3 dB and -38.3 dB
+        self.assertEqual([False, True], EnergyVAD(-40.0).is_speech(audio, 16000).tolist())
+        self.assertEqual([True, True], EnergyVAD(-55.0).is_speech(audio, 16000).tolist())
+
+
+class SegmenterTest(unittest.TestCase):
+    def test_segments(self):
+        audio = frames(*'..........sssss....................sss..')
+
+        for batch_frames in (1, 4, 64):
+            with self.subTest(batch_frames=batch_frames):
+                segmenter = Segmenter(EnergyVAD(), hangover_ms=90, preroll_ms=60, batch_frames=batch_frames)
+                segments = [[frame.sequence for frame in segment]
+                            for segment in segmenter.segments(audio + [None], PARAMETERS)]
+
+                self.assertEqual([list(range(8, 18)), list(range(33, 40))], segments)
+
+    def test_segment_frames_are_not_copied(self):
+        audio = frames(*'.ss.')
+
+        segment = next(Segmenter(EnergyVAD(), preroll_ms=30).segments(audio, PARAMETERS))
+
+        self.assertTrue(all(actual is expected for actual, expected in zip(segment, audio)))
+
+    def test_unconsumed_frames_are_skipped(self):
+        audio = frames(*'.sss....ss')
+
+        segmenter = Segmenter(EnergyVAD(), hangover_ms=60, preroll_ms=0)
+        starts = [next(segment).sequence for segment in segmenter.segments(audio, PARAMETERS)]
+
+        self.assertEqual([1, 8], starts)
+
+    def test_no_speech(self):
+        segmenter = Segmenter(EnergyVAD())
+
+        self.assertEqual([], list(segmenter.segments(frames(*'......'), PARAMETERS)))
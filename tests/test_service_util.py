@@ -1,8 +1,11 @@
 import unittest
 
+import numpy as np
 from parameterized import parameterized
 
-from cltl.backend.api.util import bytes_per_frame
+from cltl.backend.api.microphone import AudioFrame
+from cltl.backend.api.util import bytes_per_frame, raw_frames_to_np, np_to_raw_frames, FRAME_HEADER, \
+    raw_batch_to_np
 
 
 class ServiceUtilTest(unittest.TestCase):
@@ -24,7 +27,49 @@ class ServiceUtilTest(unittest.TestCase):
         self.assertEqual(expected, bytes_per_frame(*args), f"expected: {expected}, args: {args}")
 
     def test_raw_frames_to_np(self):
-        pass
+        audio = [np.random.randint(-1000, 1000, (480, 2), dtype=np.int16) for _ in range(3)]
+
+        frames = list(raw_frames_to_np(np_to_raw_frames(audio), frame_size=480, channels=2, sample_depth=2))
+
+        np.testing.assert_array_equal(audio, frames)
+
+    def test_raw_frames_to_np_with_timestamps(self):
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 2), dtype=np.int16), 10.0 + i, 5 + i)
+                 for i in range(3)]
+        audio.append(np.random.randint(-1000, 1000, (480, 2), dtype=np.int16))
+
+        raw = list(np_to_raw_frames(audio, timestamps=True))
+        frames = list(raw_frames_to_np(raw, frame_size=480, channels=2, sample_depth=2, timestamps=True))
+
+        self.assertEqual([480 * 2 * 2 + FRAME_HEADER.size] * 4, [len(frame) for frame in raw])
+        np.testing.assert_array_equal(audio, frames)
+        self.assertEqual([10.0, 11.0, 12.0, None], [frame.timestamp for frame in frames])
+        self.assertEqual([5, 6, 7, 3], [frame.sequence for frame in frames])
+
+    def test_raw_batch_to_np(self):
+        audio = [np.random.randint(-1000, 1000, (480, 2), dtype=np.int16) for _ in range(3)]
+        data = b''.join(np_to_raw_frames(audio))
+
+        frames, timestamps, sequences = raw_batch_to_np(data, frame_size=480, channels=2, sample_depth=2)
+
+        self.assertEqual((3, 480, 2), frames.shape)
+        np.testing.assert_array_equal(audio, frames)
+        self.assertIsNone(timestamps)
+        self.assertIsNone(sequences)
+
+    def test_raw_batch_to_np_with_timestamps(self):
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 2), dtype=np.int16), 10.0 + i, 5 + i)
+                 for i in range(3)]
+        data = bytearray(b''.join(np_to_raw_frames(audio, timestamps=True)))
+
+        frames, timestamps, sequences = raw_batch_to_np(data, frame_size=480, channels=2, sample_depth=2,
+                                                        timestamps=True)
+
+        np.testing.assert_array_equal(audio, frames)
+        self.assertEqual([10.0, 11.0, 12.0], timestamps.tolist())
+        self.assertEqual([5, 6, 7], sequences.tolist())
+        # Views on the data
+        self.assertTrue(np.shares_memory(frames, np.frombuffer(data, np.uint8)))
 
     def test_retrieve_from_storage(self):
         pass
@@ -0,0 +1,116 @@
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cltl.backend.api.camera import Image
+from cltl.backend.impl.shared_image import SharedImagePool, SharedImageHandle
+from cltl.backend.source.cv2_source import SYSTEM_BOUNDS
+
+
+def _image(height=120, width=160, depth=True):
+    return Image(np.random.randint(0, 256, (height, width, 3), dtype=np.uint8), SYSTEM_BOUNDS,
+                 np.random.rand(height, width).astype(np.float32) if depth else None)
+
+
+def _checksum(handle: SharedImageHandle):
+    with handle.attach() as image:
+        return int(image.image.sum()), float(image.depth.sum()), image.bounds
+
+
+class SharedImagePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = SharedImagePool(max_segments=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_share(self):
+        image = _image()
+
+        with self.pool.share(image) as shared:
+            np.testing.assert_array_equal(image.image, shared.image)
+            np.testing.assert_array_equal(image.depth, shared.depth)
+            self.assertEqual(image.bounds, shared.bounds)
+            self.assertEqual(image.resolution, shared.resolution)
+
+        self.assertTrue(shared.released)
+        self.assertIsNone(shared.image)
+
+    def test_share_without_depth(self):
+        image = _image(depth=False)
+
+        with self.pool.share(image) as shared:
+            np.testing.assert_array_equal(image.image, shared.image)
+            self.assertIsNone(shared.depth)
+
+    def test_attach(self):
+        image = _image()
+
+        with self.pool.share(image) as shared:
+            handle = pickle.loads(pickle.dumps(shared.handle))
+            with handle.attach() as attached:
+                np.testing.assert_array_equal(image.image, attached.image)
+                np.testing.assert_array_equal(image.depth, attached.depth)
+
+    def test_reference_counting(self):
+        shared = self.pool.share(_image())
+        shared.retain()
+
+        shared.release()
+        self.assertFalse(shared.released)
+        self.assertEqual(1, self.pool.metrics["in_use"])
+
+        shared.release()
+        self.assertTrue(shared.released)
+        self.assertEqual(0, self.pool.metrics["in_use"])
+
+        with self.assertRaises(ValueError):
+            shared.release()
+
+    def test_segments_are_reused(self):
+        for _ in range(5):
+            with self.pool.share(_image()):
+                pass
+
+        self.assertEqual({"segments": 1, "in_use": 0, "allocated": 1, "reused": 4}, self.pool.metrics)
+
+    def test_segment_too_small_is_replaced(self):
+        first = self.pool.share(_image(30, 40))
+        second = self.pool.share(_image(30, 40))
+        first.release()
+        second.release()
+
+        with self.pool.share(_image()) as shared:
+            self.assertEqual(2, self.pool.metrics["segments"])
+            self.assertEqual((120, 160), shared.depth.shape)
+
+    def test_exhausted_pool(self):
+        first = self.pool.share(_image())
+        self.pool.share(_image())
+
+        with self.assertRaises(ValueError):
+            self.pool.share(_image(), timeout=0.01)
+
+        first.release()
+        self.pool.share(_image(), timeout=0.01)
+
+    def test_process_pool(self):
+        images = [_image() for _ in range(4)]
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            shared = [self.pool.share(image) for image in images[:2]]
+            results = list(executor.map(_checksum, [image.handle for image in shared]))
+            for image in shared:
+                image.release()
+
+            shared = [self.pool.share(image) for image in images[2:]]
+            results += list(executor.map(_checksum, [image.handle for image in shared]))
+            for image in shared:
+                image.release()
+
+        expected = [(int(image.image.sum()), float(image.depth.sum()), image.bounds) for image in images]
+        self.assertEqual([result[0] for result in expected], [result[0] for result in results])
+        np.testing.assert_allclose([result[1] for result in expected], [result[1] for result in results])
+        self.assertEqual(2, self.pool.metrics["allocated"])
@@ -0,0 +1,140 @@
+import itertools
+import json
+import shutil
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+import soundfile as sf
+from emissor.representation.scenario import Modality
+
+from cltl.backend.api.camera import CameraResolution
+from cltl.backend.api.util import raw_frames_to_np
+from cltl.backend.source.pacing import Pacer
+from cltl.backend.source.replay_source import WavAudioSource, FileImageSource
+from cltl.backend.source.synthetic_source import SyntheticAudioSource, SyntheticImageSource
+from host.server import BackendServer
+
+
+class SyntheticSourceTest(unittest.TestCase):
+    def test_synthetic_audio_unthrottled(self):
+        source = SyntheticAudioSource(16000, 2, 480, "tone", duration=1.0, pacer=Pacer(speed=None))
+
+        with source:
+            frames = list(source.audio)
+
+        self.assertEqual(34, len(frames))
+        self.assertTrue(all(frame.shape == (480, 2) and frame.dtype == np.int16 for frame in frames))
+        self.assertEqual(list(range(34)), [frame.sequence for frame in frames])
+        np.testing.assert_array_equal(frames[1][:, 0], frames[1][:, 1])
+
+    def test_synthetic_audio_accelerated(self):
+        source = SyntheticAudioSource(16000, 1, 480, "noise", duration=0.3, pacer=Pacer(speed=10))
+
+        start = time.monotonic()
+        with source:
+            frames = list(source.audio)
+        duration = time.monotonic() - start
+
+        self.assertEqual(10, len(frames))
+        self.assertGreaterEqual(duration, 0.025)
+        self.assertLess(duration, 0.3)
+        self.assertAlmostEqual(0.003, frames[1].timestamp - frames[0].timestamp, places=4)
+
+    def test_synthetic_audio_dropouts(self):
+        source = SyntheticAudioSource(16000, 1, 480, "silence", duration=3.0,
+                                      pacer=Pacer(speed=None, dropout=0.5, seed=1))
+
+        with source:
+            sequence = [frame.sequence for frame in source.audio]
+
+        self.assertLess(len(sequence), 100)
+        self.assertGreater(len(sequence), 0)
+        self.assertTrue(any(b - a > 1 for a, b in zip(sequence, sequence[1:])))
+
+    def test_synthetic_audio_stop(self):
+        source = SyntheticAudioSource(16000, 1, 480, pacer=Pacer(speed=None))
+
+        with source:
+            frames = []
+            for frame in source.audio:
+                frames.append(frame)
+                if len(frames) == 5:
+                    source.stop()
+
+        self.assertEqual(5, len(frames))
+
+    def test_synthetic_images(self):
+        source = SyntheticImageSource(CameraResolution.QQVGA, rate=10, depth=True, pacer=Pacer(speed=None))
+
+        with source:
+            images = [source.capture() for _ in range(3)]
+
+        self.assertTrue(all(image.image.shape == (120, 160, 3) for image in images))
+        self.assertEqual(CameraResolution.QQVGA, images[0].resolution)
+        self.assertFalse(np.array_equal(images[0].image, images[1].image))
+        self.assertEqual((120, 160), images[0].depth.shape)
+
+
+class ReplaySourceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_wav_replay(self):
+        audio = np.random.randint(-1000, 1000, (1000, 2), dtype=np.int16)
+        sf.write(f"{self.tmp_dir}/test.wav", audio, 16000)
+
+        source = WavAudioSource(f"{self.tmp_dir}/test.wav", 480, pacer=Pacer(speed=None))
+        with source:
+            frames = list(source.audio)
+
+        self.assertEqual((16000, 2, 480), (source.rate, source.channels, source.frame_size))
+        self.assertEqual(3, len(frames))
+        np.testing.assert_array_equal(audio, np.concatenate(frames)[:1000])
+        np.testing.assert_array_equal(np.zeros((440, 2)), np.concatenate(frames)[1000:])
+
+    def test_wav_replay_loop(self):
+        audio = np.random.randint(-1000, 1000, (960, 1), dtype=np.int16)
+        sf.write(f"{self.tmp_dir}/test.wav", audio, 16000)
+
+        source = WavAudioSource(f"{self.tmp_dir}/test.wav", 480, loop=True, pacer=Pacer(speed=None))
+        with source:
+            frames = list(itertools.islice(source.audio, 5))
+
+        np.testing.assert_array_equal(frames[0], frames[2])
+        np.testing.assert_array_equal(frames[1], frames[3])
+
+    def test_image_folder_replay(self):
+        for i in range(3):
+            cv2.imwrite(f"{self.tmp_dir}/{i}.png", np.full((30, 40, 3), i, dtype=np.uint8))
+
+        source = FileImageSource(self.tmp_dir, CameraResolution.NATIVE, pacer=Pacer(speed=None))
+        with source:
+            images = [source.capture() for _ in range(4)]
+
+        self.assertEqual([0, 1, 2, 0], [image.image[0, 0, 0] for image in images])
+        self.assertEqual(CameraResolution.QQQQVGA, images[0].resolution)
+
+
+class SimulatedBackendServerTest(unittest.TestCase):
+    def test_server_with_simulated_sources(self):
+        audio_source = SyntheticAudioSource(16000, 1, 480, duration=0.3, pacer=Pacer(speed=None))
+        image_source = SyntheticImageSource(CameraResolution.QQQVGA, pacer=Pacer(speed=None))
+        server = BackendServer(16000, 1, 480, CameraResolution.NATIVE, 0, audio_source, image_source)
+
+        with server.app.test_client() as client:
+            response = client.get(f"/{Modality.AUDIO.name.lower()}?timestamps=true")
+            frames = list(raw_frames_to_np(response.iter_encoded(), 480, 1, 2, timestamps=True))
+
+            self.assertEqual(10, len(frames))
+            self.assertEqual(list(range(10)), [frame.sequence for frame in frames])
+
+            response = client.get(f"/{Modality.VIDEO.name.lower()}")
+            image = json.loads(response.data)
+
+            self.assertEqual((60, 80, 3), np.array(image['image']).shape)
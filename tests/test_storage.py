@@ -5,7 +5,9 @@ import unittest
 import numpy as np
 from cltl.backend.api.util import raw_frames_to_np
 
-from cltl.backend.impl.cached_storage import CachedAudioStorage
+from cltl.backend.api.camera import Image, Bounds, CameraResolution
+from cltl.backend.api.image_codec import IMAGE_MIME_TYPE, raw_to_image
+from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
 from cltl_service.backend.storage import StorageService
 
 
@@ -28,7 +30,7 @@ class StorageServiceTest(unittest.TestCase):
 
         with storage_service.app.test_client() as client:
             rv = client.get('/audio/1')
-            self.assertEqual("audio/L16;rate=16000;channels=2;frame_size=480",
+            self.assertEqual("audio/L16;rate=16000;channels=2;frame_size=480;offset=0",
                              rv.headers.get("content-type").replace(r' ', ''))
 
             actual = [frame for frame in rv.iter_encoded()]
@@ -38,3 +40,22 @@ class StorageServiceTest(unittest.TestCase):
             if DEBUG:
                 import soundfile as sf
                 sf.write("test.wav", data=np.concatenate(frames), samplerate=16000)
+
+    def test_image_resolution(self):
+        image_storage = CachedImageStorage(self.tmp_dir, resolutions=[CameraResolution.QVGA, CameraResolution.QQVGA])
+        storage_service = StorageService(storage_audio=None, storage_image=image_storage)
+
+        image = Image(np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8), Bounds(0, 1, 0, 1))
+        image_storage.store("1", image)
+
+        with storage_service.app.test_client() as client:
+            for resolution, expected in (("qqvga", CameraResolution.QQVGA), ("QQQVGA", CameraResolution.QQVGA),
+                                         ("QVGA", CameraResolution.QVGA), ("VGA4", CameraResolution.VGA)):
+                with self.subTest(resolution=resolution):
+                    rv = client.get(f'/video/1?resolution={resolution}', headers={"Accept": IMAGE_MIME_TYPE})
+
+                    self.assertEqual(200, rv.status_code)
+                    self.assertEqual(expected, raw_to_image(rv.data).resolution)
+
+            rv = client.get('/video/1?resolution=HD')
+            self.assertEqual(400, rv.status_code)
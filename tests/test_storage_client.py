@@ -1,16 +1,21 @@
 import shutil
 import tempfile
+import time
 import unittest
-from threading import Thread
+from itertools import islice
+from threading import Event, Thread
 
 import numpy as np
+from flask import Flask, Response
 from werkzeug.serving import make_server
 
 from cltl.backend.api.camera import CameraResolution, Image
+from cltl.backend.api.microphone import AudioFrame
 from cltl.backend.api.storage import STORAGE_SCHEME
-from cltl.backend.api.util import raw_frames_to_np
+from cltl.backend.api.util import raw_frames_to_np, np_to_raw_frames
 from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
 from cltl.backend.source.client_source import ClientAudioSource, ClientImageSource
+from cltl.backend.source.session import SessionPool
 from cltl.backend.source.cv2_source import SYSTEM_BOUNDS
 from cltl_service.backend.storage import StorageService
 
@@ -18,9 +23,9 @@ DEBUG = 0
 
 
 class ServerThread(Thread):
-    def __init__(self, app):
+    def __init__(self, app, threaded=False):
         Thread.__init__(self)
-        self.server = make_server('0.0.0.0', 9999, app)
+        self.server = make_server('0.0.0.0', 9999, app, threaded=threaded)
         self.ctx = app.app_context()
         self.ctx.push()
 
@@ -60,6 +65,24 @@ class StorageServiceTest(unittest.TestCase):
             frames = list(raw_frames_to_np(actual, frame_size=480, channels=2, sample_depth=2))
             np.testing.assert_array_equal(audio, frames)
 
+    def test_audio_client_timestamps(self):
+        audio_storage = CachedAudioStorage(self.tmp_dir)
+        storage_service = StorageService(storage_audio=audio_storage, storage_image=None)
+
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 2), dtype=np.int16), 100.0 + i * 0.03, i)
+                 for i in range(10)]
+        audio_storage.store("1", audio, sampling_rate=16000)
+
+        self.server = ServerThread(storage_service.app)
+        self.server.start()
+
+        with ClientAudioSource("http://0.0.0.0:9999/audio/1", timestamps=True) as source:
+            frames = [frame for frame in source.audio]
+
+        np.testing.assert_array_equal(audio, frames)
+        self.assertEqual(list(range(10)), [frame.sequence for frame in frames])
+        np.testing.assert_allclose([frame.timestamp for frame in audio], [frame.timestamp for frame in frames])
+
     def test_audio_client_with_custom_schema(self):
         audio_storage = CachedAudioStorage(self.tmp_dir)
         storage_service = StorageService(storage_audio=audio_storage, storage_image=None)
@@ -153,3 +176,258 @@ class StorageServiceTest(unittest.TestCase):
         self.assertEqual(SYSTEM_BOUNDS, image.bounds)
         np.testing.assert_array_equal(depth_array, image.depth)
 
+
+    def test_image_client_prefetch(self):
+        image_storage = CachedImageStorage(self.tmp_dir)
+        storage_service = StorageService(storage_audio=None, storage_image=image_storage)
+
+        resolution = CameraResolution.QQQVGA
+        image_array = np.random.randint(0, 256, (resolution.height, resolution.width, 3), dtype=np.uint8)
+        image_storage.store("1", Image(image_array, SYSTEM_BOUNDS))
+
+        self.server = ServerThread(storage_service.app, threaded=True)
+        self.server.start()
+
+        with ClientImageSource("http://0.0.0.0:9999/video/1", prefetch=True, max_age=1.0) as source:
+            images = [source.capture() for _ in range(3)]
+            self.assertEqual(resolution, source.resolution)
+            metrics = source.metrics
+
+        for image in images:
+            np.testing.assert_array_equal(image_array, image.image)
+            self.assertEqual(SYSTEM_BOUNDS, image.bounds)
+        self.assertEqual(3, metrics["frame_age"]["count"])
+        self.assertLessEqual(metrics["frame_age"]["max"], 1.0)
+        self.assertGreaterEqual(metrics["fetched"], 1)
+        self.assertEqual(0, metrics["errors"])
+
+    def test_image_client_prefetch_one_ahead(self):
+        image_storage = CachedImageStorage(self.tmp_dir)
+        storage_service = StorageService(storage_audio=None, storage_image=image_storage)
+
+        resolution = CameraResolution.QQQVGA
+        image_array = np.random.randint(0, 256, (resolution.height, resolution.width, 3), dtype=np.uint8)
+        image_storage.store("1", Image(image_array, SYSTEM_BOUNDS))
+
+        self.server = ServerThread(storage_service.app, threaded=True)
+        self.server.start()
+
+        with ClientImageSource("http://0.0.0.0:9999/video/1", prefetch=True) as source:
+            source.capture()
+            time.sleep(0.3)
+            # Only the image following the captured one is prefetched
+            self.assertEqual(2, source.metrics["fetched"])
+
+            source.capture()
+            time.sleep(0.3)
+            self.assertEqual(3, source.metrics["fetched"])
+
+    def test_image_client_prefetch_failure(self):
+        storage_service = StorageService(storage_audio=None, storage_image=CachedImageStorage(self.tmp_dir))
+
+        self.server = ServerThread(storage_service.app, threaded=True)
+        self.server.start()
+
+        with ClientImageSource("http://0.0.0.0:9999/video/unknown", prefetch=True, timeout=0.5) as source:
+            with self.assertRaises(ValueError):
+                source.capture()
+
+            self.assertGreaterEqual(source.metrics["errors"], 1)
+
+    def test_clients_share_connections(self):
+        image_storage = CachedImageStorage(self.tmp_dir)
+        audio_storage = CachedAudioStorage(self.tmp_dir)
+        storage_service = StorageService(storage_audio=audio_storage, storage_image=image_storage)
+
+        resolution = CameraResolution.QQQVGA
+        image_storage.store("1", Image(np.zeros((resolution.height, resolution.width, 3), dtype=np.uint8),
+                                       SYSTEM_BOUNDS))
+        audio_storage.store("1", [np.zeros((480, 1), dtype=np.int16) for _ in range(3)], sampling_rate=16000)
+
+        self.server = ServerThread(storage_service.app)
+        self.server.start()
+
+        session_pool = SessionPool(pool_maxsize=2)
+        for _ in range(3):
+            with ClientImageSource(f"{STORAGE_SCHEME}:/video/1", "http://0.0.0.0:9999",
+                                   session_pool=session_pool) as source:
+                source.capture()
+            with ClientAudioSource("http://0.0.0.0:9999/audio/1", session_pool=session_pool) as source:
+                self.assertEqual(3, len(list(source.audio)))
+
+        metrics = session_pool.metrics["http://0.0.0.0:9999"]
+        self.assertEqual(6, metrics["requests"])
+        self.assertEqual(1, metrics["connections"])
+        self.assertEqual(1, metrics["idle"])
+        session_pool.close()
+
+
+class InterruptedAudioStorage(CachedAudioStorage):
+    def __init__(self, storage_path, interrupt_after):
+        super().__init__(storage_path)
+        self.interrupt_after = interrupt_after
+        self.offsets = []
+
+    def get(self, id_, offset=0, length=-1):
+        self.offsets.append(offset)
+        audio, parameters = super().get(id_, offset=offset, length=length)
+        if len(self.offsets) > 1:
+            return audio, parameters
+
+        def interrupted():
+            for i, frame in enumerate(audio):
+                if i == self.interrupt_after:
+                    raise ConnectionError("Interrupted")
+                yield frame
+
+        return interrupted(), parameters
+
+
+def live_audio_app(connections, mime_type="audio/L16; rate=16000; channels=1; frame_size=480; timestamps=1"):
+    """
+    Serve one connection per entry in `connections`, each a list of (frame, stall) tuples. The stream fails after
+    the last frame of a connection, further connections are rejected.
+    """
+    app = Flask(__name__)
+    app.connections = iter(connections)
+
+    @app.route("/audio")
+    def audio():
+        frames = next(app.connections, None)
+        if frames is None:
+            return Response("No audio", status=503)
+
+        def stream():
+            for frame, stall in frames:
+                time.sleep(stall)
+                yield from np_to_raw_frames([frame], timestamps=True)
+            raise ConnectionError("Interrupted")
+
+        return Response(stream(), mimetype=mime_type)
+
+    return app
+
+
+class ClientAudioSourceReconnectTest(unittest.TestCase):
+    def setUp(self):
+        self.server = None
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.join()
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_resume_storage_stream(self):
+        audio_storage = InterruptedAudioStorage(self.tmp_dir, interrupt_after=4)
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 2), dtype=np.int16), 100.0 + i * 0.03, i)
+                 for i in range(10)]
+        audio_storage.store("1", audio, sampling_rate=16000)
+
+        # Chunked responses (HTTP/1.1) to detect the interruption of the stream
+        self.server = ServerThread(StorageService(storage_audio=audio_storage, storage_image=None).app, threaded=True)
+        self.server.start()
+
+        with ClientAudioSource("http://0.0.0.0:9999/audio/1", timestamps=True, backoff=0.01) as source:
+            frames = [frame for frame in source.audio]
+
+            self.assertEqual(1, source.metrics["reconnects"])
+            self.assertEqual([], source.gaps)
+
+        self.assertEqual([0, 4 * 480], audio_storage.offsets)
+        np.testing.assert_array_equal(audio, frames)
+        self.assertEqual(list(range(10)), [frame.sequence for frame in frames])
+
+    def test_resume_storage_stream_from_cache(self):
+        audio_storage = InterruptedAudioStorage(self.tmp_dir, interrupt_after=4)
+        audio = [np.random.randint(-1000, 1000, (480, 2), dtype=np.int16) for _ in range(10)]
+        cached, stored = Event(), Event()
+
+        def recording():
+            yield from audio
+            cached.set()
+            stored.wait()
+
+        store_thread = Thread(target=audio_storage.store, args=("1", recording()), kwargs={"sampling_rate": 16000})
+        store_thread.start()
+        cached.wait()
+
+        # Chunked responses (HTTP/1.1) to detect the interruption of the stream
+        self.server = ServerThread(StorageService(storage_audio=audio_storage, storage_image=None).app, threaded=True)
+        self.server.start()
+
+        try:
+            with ClientAudioSource("http://0.0.0.0:9999/audio/1", timestamps=True, backoff=0.01) as source:
+                frames = list(islice(source.audio, 10))
+                stored.set()
+                frames += list(source.audio)
+
+                self.assertEqual(1, source.metrics["reconnects"])
+        finally:
+            stored.set()
+            store_thread.join()
+
+        self.assertEqual([0, 4 * 480], audio_storage.offsets)
+        np.testing.assert_array_equal(audio, frames)
+        self.assertEqual(list(range(10)), [frame.sequence for frame in frames])
+
+    def test_reconnect_live_stream_reports_gap(self):
+        frames = [AudioFrame(np.full((480, 1), i, dtype=np.int16), 100.0 + i * 0.03, i) for i in range(8)]
+        # The server restarts the sequence on the second connection, frames 3 and 4 are missed
+        restarted = [AudioFrame(frame, frame.timestamp, i) for i, frame in enumerate(frames[5:])]
+        connections = [[(frame, 0) for frame in frames[:3]], [(frame, 0) for frame in restarted]]
+
+        self.server = ServerThread(live_audio_app(connections))
+        self.server.start()
+
+        with ClientAudioSource("http://0.0.0.0:9999/audio", max_reconnects=1, backoff=0.01) as source:
+            actual = [frame for frame in source.audio]
+
+            self.assertEqual([(3 * 480, 2 * 480)], source.gaps)
+            self.assertEqual(1, source.metrics["reconnects"])
+            self.assertEqual(2 * 480, source.metrics["gap_samples"])
+
+        self.assertEqual([0, 1, 2, 5, 6, 7], [frame[0, 0] for frame in actual])
+        self.assertEqual([0, 1, 2, 5, 6, 7], [frame.sequence for frame in actual])
+
+    def test_reconnect_on_stall(self):
+        frames = [AudioFrame(np.full((480, 1), i, dtype=np.int16), 100.0 + i * 0.03, i) for i in range(4)]
+        connections = [[(frames[0], 0), (frames[1], 0), (frames[2], 2.0)], [(frames[3], 0)]]
+
+        self.server = ServerThread(live_audio_app(connections), threaded=True)
+        self.server.start()
+
+        start = time.monotonic()
+        with ClientAudioSource("http://0.0.0.0:9999/audio", read_timeout=0.2, max_reconnects=1,
+                               backoff=0.01) as source:
+            actual = [frame for frame in source.audio]
+
+            self.assertEqual(1, source.metrics["reconnects"])
+            self.assertEqual([(2 * 480, 480)], source.gaps)
+
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual([0, 1, 3], [frame[0, 0] for frame in actual])
+
+    def test_batches(self):
+        # Frames 5 and 6 are missing
+        sequences = [0, 1, 2, 3, 4, 7, 8, 9, 10, 11]
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 1), dtype=np.int16), 100.0 + i * 0.03, i)
+                 for i in sequences]
+
+        self.server = ServerThread(live_audio_app([[(frame, 0) for frame in audio]]))
+        self.server.start()
+
+        with ClientAudioSource("http://0.0.0.0:9999/audio", max_reconnects=1, backoff=0.01) as source:
+            batches = list(source.batches(max_frames=4))
+
+        np.testing.assert_array_equal(np.concatenate(audio), np.concatenate(batches))
+        self.assertIn(7, [batch.sequence for batch in batches])
+        for batch in batches:
+            frames = len(batch) // 480
+            self.assertEqual((frames * 480, 1), batch.shape)
+            self.assertLessEqual(frames, 4)
+            first = sequences.index(batch.sequence)
+            self.assertEqual(list(range(batch.sequence, batch.sequence + frames)), sequences[first:first + frames])
+            self.assertAlmostEqual(100.0 + batch.sequence * 0.03, batch.timestamp)
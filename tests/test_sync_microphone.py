@@ -1,11 +1,14 @@
+import asyncio
 import logging
 import numpy as np
+import queue
 import sys
 import threading
+import time
 import unittest
 from typing import Generator
 
-from cltl.backend.api.microphone import MIC_RESOURCE_NAME, AudioParameters
+from cltl.backend.api.microphone import MIC_RESOURCE_NAME, AUDIO_RESOURCE_NAME, AudioParameters
 from cltl.backend.impl.sync_microphone import SynchronizedMicrophone
 from cltl.backend.spi.audio import AudioSource
 from cltl.combot.infra.resource.threaded import ThreadedResourceManager
@@ -59,6 +62,25 @@ class TestSource(AudioSource):
         yield None
 
 
+class QueueSource(TestSource):
+    def __init__(self):
+        super().__init__()
+        self.frames = queue.Queue()
+        self.entered = 0
+
+    def __enter__(self):
+        self.entered += 1
+        return self
+
+    @property
+    def audio(self) -> Generator[np.array, None, None]:
+        while True:
+            frame = self.frames.get()
+            yield frame
+            if frame is None:
+                return
+
+
 class SynchronizedMicrophoneTest(unittest.TestCase):
     def setUp(self):
         source = TestSource()
@@ -85,6 +107,30 @@ class SynchronizedMicrophoneTest(unittest.TestCase):
 
         self.assertFalse(self.mic.muted)
 
+    def test_preroll_requires_persistent_mode(self):
+        with self.assertRaises(ValueError):
+            with self.mic.listen(preroll_ms=10):
+                pass
+
+    def test_concurrent_listeners_require_persistent_mode(self):
+        with self.mic.listen() as (mic_audio, params):
+            with self.assertRaises(ValueError):
+                with self.mic.listen():
+                    pass
+
+    def test_listen_async(self):
+        async def listen():
+            async with self.mic.listen_async() as (mic_audio, params):
+                return [frame async for frame in mic_audio], params
+
+        audio, parameters = asyncio.run(listen())
+
+        self.assertEqual(11, len(audio))
+        self.assertIsNone(audio[10])
+        self.assertEqual([i for i in range(10)], [frame[0] for frame in audio[:-1]])
+        self.assertEqual(AudioParameters(200, 1, 2, 2), parameters)
+        self.assertFalse(self.mic.muted)
+
     def test_mute(self):
         audio_running = threading.Event()
         muted = threading.Event()
@@ -192,7 +238,197 @@ class SynchronizedMicrophoneTest(unittest.TestCase):
         self.assertTrue(lock.wait(0.1))
 
 
+class PersistentMicrophoneTest(unittest.TestCase):
+    def setUp(self):
+        self.source = QueueSource()
+        self.mic = None
+
+    def tearDown(self):
+        self.source.frames.put(None)
+        self.mic.stop()
+
+    def start_mic(self, buffer_frames=32, max_preroll_ms=0):
+        self.mic = SynchronizedMicrophone(self.source, ThreadedResourceManager(), persistent=True,
+                                          buffer_frames=buffer_frames, max_preroll_ms=max_preroll_ms)
+        self.mic.start()
+
+    def put(self, *values):
+        for value in values:
+            self.source.frames.put(np.full((2,), value, dtype=np.int16) if value is not None else None)
+
+    def await_written(self, count):
+        timeout = time.monotonic() + 1
+        while self.mic._buffer.written < count and time.monotonic() < timeout:
+            time.sleep(0.001)
+
+    def test_listen_discards_frames_while_muted(self):
+        self.start_mic()
+
+        with self.mic.listen() as (mic_audio, params):
+            self.put(0, 1)
+            audio = [next(mic_audio), next(mic_audio)]
+        self.mic.mute()
+
+        self.put(2, 3)
+        self.await_written(4)
+
+        with self.mic.listen() as (mic_audio, params):
+            self.put(4, None)
+            audio += [frame for frame in mic_audio]
+
+        self.assertEqual([0, 1, 4], [frame[0] for frame in audio[:-1]])
+        self.assertIsNone(audio[-1])
+        self.assertEqual(AudioParameters(200, 1, 2, 2), params)
+        self.assertEqual(1, self.source.entered)
+
+    def test_listen_drops_frames_of_slow_listener(self):
+        self.start_mic(buffer_frames=4)
+
+        with self.mic.listen() as (mic_audio, params):
+            self.put(*range(10))
+            self.await_written(10)
+            self.put(None)
+            audio = [frame for frame in mic_audio]
+
+        self.assertEqual([7, 8, 9], [frame[0] for frame in audio[:-1]])
+        self.assertEqual(7, self.mic.metrics["dropped_frames"])
+
+    def test_mute_wakes_up_listener(self):
+        self.start_mic()
+
+        with self.mic.listen() as (mic_audio, params):
+            threading.Timer(0.05, self.mic.mute).start()
+            start = time.monotonic()
+            audio = [frame for frame in mic_audio]
+
+        self.assertEqual([None], audio)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(self.mic.muted)
+        self.assertEqual(1, self.mic.metrics["mute_time"]["count"])
+
+    def test_concurrent_listeners(self):
+        self.start_mic(buffer_frames=4)
+
+        with self.mic.listen(name="recorder") as (recorder_audio, _), \
+                self.mic.listen(name="wake_word") as (wake_word_audio, _):
+            self.put(*range(3))
+            recorded = [next(recorder_audio) for _ in range(3)]
+            self.put(3, 4)
+            self.await_written(5)
+
+            metrics = self.mic.metrics["listeners"]
+            self.assertEqual({"frames": 3, "dropped": 0, "lag": 2}, metrics["recorder"])
+            self.assertEqual({"frames": 0, "dropped": 0, "lag": 5}, metrics["wake_word"])
+
+            detected = [next(wake_word_audio) for _ in range(3)]
+            self.mic.mute()
+
+            # Muting ends all listeners
+            recorded += [frame for frame in recorder_audio]
+            detected += [frame for frame in wake_word_audio]
+
+        self.assertEqual([0, 1, 2], [frame[0] for frame in recorded[:-1]])
+        self.assertEqual([2, 3, 4], [frame[0] for frame in detected[:-1]])
+        self.assertIsNone(recorded[-1])
+        self.assertIsNone(detected[-1])
+        self.assertEqual({}, self.mic.metrics["listeners"])
+        self.assertEqual(2, self.mic.metrics["dropped_frames"])
+
+    def test_listener_names_are_unique(self):
+        self.start_mic()
+
+        with self.mic.listen(name="recorder"):
+            with self.assertRaises(ValueError):
+                with self.mic.listen(name="recorder"):
+                    pass
 
+            self.assertEqual(["recorder"], list(self.mic.metrics["listeners"].keys()))
 
+    def test_listen_with_preroll(self):
+        # Frames of 10ms
+        self.start_mic(buffer_frames=4, max_preroll_ms=50)
+        self.mic.mute()
 
+        frames = [np.full((2,), value, dtype=np.int16) for value in range(8)]
+        for frame in frames:
+            self.source.frames.put(frame)
+        self.await_written(8)
+
+        with self.mic.listen(preroll_ms=25) as (mic_audio, params):
+            self.put(8, None)
+            audio = [frame for frame in mic_audio]
+
+        self.assertEqual([5, 6, 7, 8], [frame[0] for frame in audio[:-1]])
+        self.assertIs(frames[5], audio[0])
+        self.assertEqual(0, self.mic.metrics["dropped_frames"])
+
+    def test_preroll_is_limited(self):
+        self.start_mic(max_preroll_ms=50)
+
+        with self.assertRaises(ValueError):
+            with self.mic.listen(preroll_ms=60):
+                pass
+
+
+class HandoffTest(unittest.TestCase):
+    def setUp(self):
+        self.resource_manager = ThreadedResourceManager()
+        self.mic = SynchronizedMicrophone(TestSource(), self.resource_manager)
+        self.mic.start()
 
+    def tearDown(self):
+        self.mic.stop()
+
+    def test_unmute_waits_for_speaker(self):
+        self.mic.mute()
+        speaker_lock = self.resource_manager.get_write_lock(AUDIO_RESOURCE_NAME)
+        speaker_lock.acquire()
+
+        listened = threading.Event()
+
+        def listen():
+            with self.mic.listen() as (mic_audio, params):
+                [frame for frame in mic_audio]
+            listened.set()
+
+        listener = threading.Thread(name="listener", target=listen)
+        listener.start()
+
+        self.assertFalse(listened.wait(0.1))
+        self.assertTrue(speaker_lock.interrupted)
+        speaker_lock.release()
+
+        wait(listened)
+        listener.join()
+
+        self.assertFalse(self.mic.muted)
+        metrics = self.mic.metrics
+        self.assertEqual(1, metrics["mute_time"]["count"])
+        self.assertEqual(1, metrics["unmute_time"]["count"])
+        self.assertGreaterEqual(metrics["unmute_time"]["max"], 0.1)
+
+    def test_speaker_interrupts_listener(self):
+        started = threading.Event()
+        spoken = threading.Event()
+
+        def speak():
+            wait(started)
+            with self.resource_manager.get_write_lock(AUDIO_RESOURCE_NAME):
+                spoken.set()
+
+        speaker = threading.Thread(name="speaker", target=speak)
+        speaker.start()
+
+        # Unmuting acquires the audio lock for the mic
+        self.mic.mute()
+        with self.mic.listen() as (mic_audio, params):
+            started.set()
+            # Wait for the speaker to block on the audio lock
+            time.sleep(0.1)
+            audio = [frame for frame in mic_audio]
+
+        wait(spoken)
+        speaker.join()
+
+        self.assertEqual([None], audio)
+        self.assertTrue(self.mic.muted)
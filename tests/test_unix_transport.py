@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import unittest
+from threading import Thread
+
+import numpy as np
+from werkzeug.serving import make_server
+
+from cltl.backend.api.camera import CameraResolution, Image
+from cltl.backend.api.image_codec import image_to_raw, raw_to_image
+from cltl.backend.api.microphone import AudioFrame
+from cltl.backend.api.storage import STORAGE_SCHEME
+from cltl.backend.impl.cached_storage import CachedAudioStorage, CachedImageStorage
+from cltl.backend.source.client_source import ClientAudioSource, ClientImageSource
+from cltl.backend.source.cv2_source import SYSTEM_BOUNDS
+from cltl.backend.source.session import SessionPool, unix_socket_url, resolve_storage_url
+from cltl.backend.source.synthetic_source import SyntheticAudioSource, SyntheticImageSource
+from cltl_service.backend.storage import StorageService
+from host.server import BackendServer
+
+
+class UnixServerThread(Thread):
+    def __init__(self, app, socket_path):
+        super().__init__(daemon=True)
+        self.server = make_server(f"unix://{socket_path}", 0, app, threaded=True)
+
+    def run(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+class ImageCodecTest(unittest.TestCase):
+    def test_roundtrip(self):
+        image = Image(np.random.randint(0, 256, (120, 160, 3), dtype=np.uint8), SYSTEM_BOUNDS,
+                      np.random.rand(120, 160).astype(np.float32))
+
+        actual = raw_to_image(bytearray(b''.join(image_to_raw(image))))
+
+        np.testing.assert_array_equal(image.image, actual.image)
+        np.testing.assert_array_equal(image.depth, actual.depth)
+        self.assertEqual(np.float32, actual.depth.dtype)
+        self.assertEqual(SYSTEM_BOUNDS, actual.bounds)
+        self.assertEqual(CameraResolution.QQVGA, actual.resolution)
+
+    def test_roundtrip_without_depth(self):
+        image = Image(np.zeros((10, 20, 3), dtype=np.uint8), SYSTEM_BOUNDS)
+
+        actual = raw_to_image(b''.join(image_to_raw(image)))
+
+        np.testing.assert_array_equal(image.image, actual.image)
+        self.assertIsNone(actual.depth)
+
+
+class ResolveStorageUrlTest(unittest.TestCase):
+    def test_resolve(self):
+        self.assertEqual("http://host/audio/1", resolve_storage_url("cltl-storage:audio/1", "http://host"))
+        self.assertEqual("http://host/audio/1", resolve_storage_url("cltl-storage:/audio/1", "http://host/"))
+        self.assertEqual("http://other/audio/1", resolve_storage_url("http://other/audio/1", "http://host"))
+
+    def test_resolve_with_base_path(self):
+        self.assertEqual("http://host/storage/audio/1",
+                         resolve_storage_url("cltl-storage:audio/1", "http://host/storage"))
+        self.assertEqual("http://host/storage/video/1?resolution=qvga",
+                         resolve_storage_url("cltl-storage:/video/1?resolution=qvga", "http://host/storage/"))
+
+    def test_resolve_unix_socket(self):
+        storage_url = unix_socket_url("/tmp/backend.sock")
+
+        self.assertEqual(f"{storage_url}/audio/1", resolve_storage_url("cltl-storage:audio/1", storage_url))
+
+    def test_resolve_without_storage_url(self):
+        with self.assertRaises(ValueError):
+            resolve_storage_url("cltl-storage:audio/1", None)
+
+
+class UnixTransportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp_dir, "backend.sock")
+        self.server = None
+        self.session_pool = SessionPool()
+
+    def tearDown(self):
+        self.session_pool.close()
+        if self.server:
+            self.server.shutdown()
+            self.server.join()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_host_server(self):
+        audio_source = SyntheticAudioSource(16000, 2, 480, "tone", duration=0.3)
+        image_source = SyntheticImageSource(CameraResolution.QQVGA, depth=True)
+        server = BackendServer(16000, 2, 480, CameraResolution.QQVGA, 0, audio_source, image_source)
+        self.server = UnixServerThread(server.app, self.socket_path)
+        self.server.start()
+
+        with ClientAudioSource(unix_socket_url(self.socket_path, "/audio"), max_reconnects=0,
+                               session_pool=self.session_pool) as source:
+            self.assertEqual(16000, source.rate)
+            frames = list(source.audio)
+
+        self.assertEqual(10, len(frames))
+        self.assertTrue(all(frame.shape == (480, 2) for frame in frames))
+
+        with ClientImageSource(unix_socket_url(self.socket_path, "/video"), session_pool=self.session_pool) as source:
+            self.assertEqual(CameraResolution.QQVGA, source.resolution)
+            image = source.capture()
+
+        self.assertEqual(CameraResolution.QQVGA, image.resolution)
+        self.assertEqual((120, 160), image.depth.shape)
+        self.assertIn(unix_socket_url(self.socket_path), self.session_pool.metrics)
+
+    def test_storage(self):
+        os.makedirs(os.path.join(self.tmp_dir, "audio"))
+        os.makedirs(os.path.join(self.tmp_dir, "image"))
+        audio_storage = CachedAudioStorage(os.path.join(self.tmp_dir, "audio"))
+        image_storage = CachedImageStorage(os.path.join(self.tmp_dir, "image"))
+        audio = [AudioFrame(np.random.randint(-1000, 1000, (480, 1), dtype=np.int16), 100.0 + i * 0.03, i)
+                 for i in range(5)]
+        audio_storage.store("1", audio, sampling_rate=16000)
+        image_array = np.random.randint(0, 256, (30, 40, 3), dtype=np.uint8)
+        image_storage.store("1", Image(image_array, SYSTEM_BOUNDS))
+
+        self.server = UnixServerThread(StorageService(audio_storage, image_storage).app, self.socket_path)
+        self.server.start()
+
+        storage_url = unix_socket_url(self.socket_path)
+        with ClientAudioSource(f"{STORAGE_SCHEME}:/audio/1", storage_url, session_pool=self.session_pool) as source:
+            frames = list(source.audio)
+        with ClientImageSource(f"{STORAGE_SCHEME}:/video/1", storage_url, session_pool=self.session_pool) as source:
+            image = source.capture()
+
+        np.testing.assert_array_equal(audio, frames)
+        np.testing.assert_array_equal(image_array, image.image)
+        self.assertTrue(image.image.flags.writeable)